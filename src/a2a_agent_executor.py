@@ -1,6 +1,7 @@
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
+from a2a.server.tasks import TaskUpdater
 from a2a.utils import new_agent_text_message
 from pydantic import BaseModel
 
@@ -22,4 +23,5 @@ class GreetingAgentExecutor(AgentExecutor):
         await event_queue.enqueue_event(new_agent_text_message(result))
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        raise Exception("Cancel not supported")
\ No newline at end of file
+        # The greeting is produced in one step, so there is nothing in flight to stop
+        await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
\ No newline at end of file
@@ -3,7 +3,7 @@ import uuid
 import asyncio
 import httpx
 from a2a.client import A2ACardResolver, ClientFactory
-from a2a.types import Message, Part, Role, TextPart
+from a2a.types import Message, Part, Role, TextPart, TaskArtifactUpdateEvent, TaskStatusUpdateEvent
 
 # -------------------------------
 # Constants
@@ -29,7 +29,7 @@ class MinimalConfig:
         self.push_notification_configs = None
         self.extensions = None
         self.state_transition_history = None
-        self.streaming = None
+        self.streaming = True   # consume artifact chunks as they arrive (if the agent card allows it)
         self.other_configs = {}
 
 # -------------------------------
@@ -81,11 +81,28 @@ async def send_langgraph_message(client, text: str):
         parts=[Part(root=TextPart(text=user_message))],
     )
 
+    print("--Langgrapgh response----")
     async for response in client.send_message(message_payload):
-        # Print simplified output
-        print("--Langgrapgh response----")
-        print(f"[{response.role}] {response.parts[0].root.text}")
-        print("--Langgrapgh response----")
+        # Non-streaming agents answer with a single Message
+        if isinstance(response, Message):
+            print(f"[{response.role}] {response.parts[0].root.text}")
+            continue
+
+        # Streaming agents send (task, update) events
+        task, update = response
+        if isinstance(update, TaskArtifactUpdateEvent):
+            for part in update.artifact.parts:
+                print(part.root.text, end="", flush=True)
+            if update.last_chunk:
+                print()
+        elif isinstance(update, TaskStatusUpdateEvent):
+            status_text = update.status.message.parts[0].root.text if update.status.message else ""
+            print(f"\n[{update.status.state.value}] {status_text}".rstrip())
+        elif update is None and task.artifacts:
+            # Non-streaming transport returned the finished task in one go
+            for artifact in task.artifacts:
+                print("".join(part.root.text for part in artifact.parts))
+    print("--Langgrapgh response----")
 
 # -------------------------------
 # Main function
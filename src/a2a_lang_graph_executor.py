@@ -1,22 +1,155 @@
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
-from a2a.utils import new_agent_text_message
+from a2a.server.tasks import TaskStore, TaskUpdater
+from a2a.types import Part, TaskState, TextPart
+from a2a.utils import new_agent_text_message, new_task
 from src.lang_graph_client import build_agent_graph, AgentState
-from langchain_core.messages import HumanMessage, AIMessageChunk
+from src.admission import AdmissionController, Overloaded
+from src.client.session_pool import MCPSessionPool
+from src.graph.direct_call import DIRECT_TOOL_CALLS, DirectCall, DirectToolRouter
+from src.graph.state_graph import make_tool_node
+from src.graph.tool_output import get_tool_output_limiter
+from src.telemetry import A2A_IN_FLIGHT, A2A_REQUEST_SECONDS, A2A_REQUESTS, tracer
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, ToolMessage
+from typing import AsyncIterator
+import asyncio
+import os
+import time
 import uuid
 
 
+# Config
+STREAMING = os.getenv("A2A_STREAMING", "true").lower() == "true"
+STREAM_MIN_CHARS = int(os.getenv("A2A_STREAM_MIN_CHARS", "48"))             # flush once this much text is buffered
+STREAM_MAX_DELAY = float(os.getenv("A2A_STREAM_MAX_DELAY_MS", "100")) / 1000  # ... or the oldest text is this old
+RESPONSE_ARTIFACT = "response"
+CANCEL_TIMEOUT = float(os.getenv("A2A_CANCEL_TIMEOUT", "5"))   # max wait for a cancelled run to stop
+CANCEL_POLL_INTERVAL = float(os.getenv("A2A_CANCEL_POLL_INTERVAL", "1"))   # shared task store check for remote cancels
+DRAIN_TIMEOUT = float(os.getenv("A2A_DRAIN_TIMEOUT", "30"))     # max wait for in-flight runs on shutdown
+
+
+class ChunkCoalescer:
+    """
+    Merges tiny LLM token chunks into fewer, larger artifact updates.
+
+    Text is released once `min_chars` are buffered or the oldest buffered
+    text is `max_delay` seconds old, whichever comes first.
+    """
+    def __init__(self, min_chars: int = STREAM_MIN_CHARS, max_delay: float = STREAM_MAX_DELAY):
+        self.min_chars = min_chars
+        self.max_delay = max_delay
+        self._buffer: list[str] = []
+        self._size = 0
+        self._since = 0.0
+
+    def add(self, text: str) -> str | None:
+        """Buffer `text`; returns the coalesced text when a threshold is reached."""
+        if not self._buffer:
+            self._since = time.monotonic()
+        self._buffer.append(text)
+        self._size += len(text)
+        if self._size >= self.min_chars or time.monotonic() - self._since >= self.max_delay:
+            return self.flush()
+        return None
+
+    def flush(self) -> str:
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._size = 0
+        return text
+
+
 class LangGraphExecutor(AgentExecutor):
     """
     LangGraph executor for A2AClient.
     Sends natural language requests through the full state graph,
     including LLM nodes and MCP tools, and returns the final
     LLM-formatted response with tool results.
+
+    With streaming enabled the response is published as a task whose
+    "response" artifact grows chunk by chunk while the graph runs, with a
+    status update whenever the LLM calls a tool. Such tasks can be cancelled:
+    the graph run is stopped (including in-flight LLM and MCP tool calls) and
+    the partial turn is checkpointed.
+
+    With a task store shared between server workers, a task cancelled through
+    another worker is noticed by polling the store (CANCEL_POLL_INTERVAL).
+
+    Runs are admitted by an AdmissionController (see admission.py); requests
+    it turns away get a rejected task whose message carries "retry_after".
+
+    Structured tool-call payloads (`{"name": "add", "parameters": {...}}`)
+    skip the graph and the LLM: a DirectToolRouter (see graph/direct_call.py)
+    calls the tool and replies with its result, and the exchange is added to
+    the thread's checkpoint. They take an admission slot like graph runs, so
+    the checkpoint write never races a run on the same thread, and they use
+    the graph's tools node, so its per-server limits cover both.
     """
-    def __init__(self, tools):
-        # Build the full state graph including LLM node
-        self.graph = build_agent_graph(tools=tools)
+    def __init__(
+        self,
+        tools=None,
+        pool: MCPSessionPool | None = None,
+        streaming: bool = STREAMING,
+        task_store: TaskStore | None = None,
+        admission: AdmissionController | None = None,
+        direct_tool_calls: bool = DIRECT_TOOL_CALLS,
+    ):
+        self.pool = pool
+        self.streaming = streaming
+        self.task_store = task_store
+        self.direct_tool_calls = direct_tool_calls
+        # Limits concurrent graph runs; requests beyond its queue are rejected
+        self.admission = admission or AdmissionController()
+        # Running graph executions by A2A task id, for cancel()
+        self._runs: dict[str, asyncio.Task] = {}
+        # Build the full state graph including LLM node. When no tools are
+        # given (e.g. no tool snapshot yet) the graph is built in startup(),
+        # once the pool can reach the servers inside the server's event loop.
+        self.graph = None
+        self.direct: DirectToolRouter | None = None
+        if tools is not None:
+            self.build_graph(tools)
+
+    def build_graph(self, tools, checkpointer=None):
+        """Build the graph (and the direct tool-call router) for `tools`."""
+        tool_node = make_tool_node(tools)
+        self.graph = build_agent_graph(tools=tools, checkpointer=checkpointer, tool_node=tool_node)
+        self.direct = DirectToolRouter(tools, tool_node) if self.direct_tool_calls else None
+
+    async def startup(self):
+        """Start the MCP session pool and build the graph from its tools."""
+        if self.pool is None:
+            return
+        await self.pool.start()
+        if self.graph is None:
+            self.build_graph(await self.pool.load_tools())
+        else:
+            self.pool.refresh_in_background(on_change=self.rebuild_graph)
+
+    def rebuild_graph(self, tools):
+        """Swap in a graph for a changed tool set, keeping the conversation memory."""
+        print("MCP tool schemas changed, rebuilding graph with", len(tools), "tools")
+        self.build_graph(tools, checkpointer=self.graph.checkpointer)
+
+    async def shutdown(self):
+        """Drain in-flight runs, then close the MCP session pool (terminates the MCP server subprocesses)."""
+        await self.drain()
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT):
+        """Let in-flight runs finish for up to `timeout` seconds, then cancel the rest."""
+        runs = list(self._runs.values())
+        if not runs:
+            return
+        print(f"Draining {len(runs)} in-flight LangGraph runs (up to {timeout}s)")
+        _, pending = await asyncio.wait(runs, timeout=timeout)
+        if pending:
+            print(f"Cancelling {len(pending)} runs still in flight")
+            for run in pending:
+                run.cancel()
+            await asyncio.wait(pending, timeout=CANCEL_TIMEOUT)
 
     async def get_full_response(self, input_state: AgentState, config: dict = {}) -> str:
         """
@@ -30,7 +163,8 @@ class LangGraphExecutor(AgentExecutor):
             stream_mode="messages",
             config=config
         ):
-            if isinstance(message_chunk, AIMessageChunk):
+            # AIMessage too: cached responses are emitted whole, not as chunks
+            if isinstance(message_chunk, AIMessage):
                 # Include tool return values if present
                 if hasattr(message_chunk, "tool_return") and message_chunk.tool_return:
                     buffer.append(str(message_chunk.tool_return))
@@ -42,6 +176,116 @@ class LangGraphExecutor(AgentExecutor):
         # Join all chunks into a single human-readable string
         return " ".join(buffer).strip()
 
+    async def stream_response(self, input_state: AgentState, config: dict = {}) -> AsyncIterator[tuple[str, str]]:
+        """
+        Run the graph and yield ("text", chunk) as LLM tokens arrive (coalesced)
+        and ("tool", name) when the LLM calls a tool.
+        """
+        coalescer = ChunkCoalescer()
+
+        async for message_chunk, metadata in self.graph.astream(
+            input=input_state,
+            stream_mode="messages",
+            config=config
+        ):
+            # AIMessage too: cached responses (and non-streaming nodes) emit the whole message once
+            if not isinstance(message_chunk, AIMessage):
+                continue
+
+            tool_names = [call.get("name") for call in (
+                message_chunk.tool_call_chunks if isinstance(message_chunk, AIMessageChunk) else message_chunk.tool_calls
+            ) if call.get("name")]
+            if tool_names:
+                # Don't hold back text the LLM produced before deciding to call tools
+                text = coalescer.flush()
+                if text:
+                    yield "text", text
+                for name in tool_names:
+                    yield "tool", name
+
+            if isinstance(message_chunk.content, str) and message_chunk.content:
+                text = coalescer.add(message_chunk.content)
+                if text:
+                    yield "text", text
+
+        text = coalescer.flush()
+        if text:
+            yield "text", text
+
+    async def execute_streaming(self, context: RequestContext, event_queue: EventQueue, state: AgentState, config: dict):
+        """Publish the response as incremental artifact updates of a task."""
+        task = context.current_task or new_task(context.message)
+        if not context.current_task:
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await updater.start_work()
+
+        artifact_id = str(uuid.uuid4())
+        chunks = 0
+        partial = []    # text of the current LLM reply, checkpointed if the run is cancelled
+        try:
+            async for kind, value in self.stream_response(state, config=config):
+                if kind == "tool":
+                    partial.clear()
+                    await updater.update_status(
+                        TaskState.working, message=updater.new_agent_message([Part(root=TextPart(text=f"Calling tool {value}"))])
+                    )
+                    continue
+                await updater.add_artifact(
+                    [Part(root=TextPart(text=value))],
+                    artifact_id=artifact_id,
+                    name=RESPONSE_ARTIFACT,
+                    append=chunks > 0,
+                    last_chunk=False,
+                )
+                chunks += 1
+                partial.append(value)
+
+            await updater.add_artifact(
+                [Part(root=TextPart(text=""))],
+                artifact_id=artifact_id,
+                name=RESPONSE_ARTIFACT,
+                append=chunks > 0,
+                last_chunk=True,
+            )
+            await updater.complete()
+
+        except asyncio.CancelledError:
+            await asyncio.shield(self.save_partial_state(config, "".join(partial)))
+            await updater.cancel()
+            raise
+
+        except Exception as e:
+            print("Executor error:", e)
+            await updater.failed(updater.new_agent_message([Part(root=TextPart(text=f"❌ Executor failed: {e}"))]))
+
+    async def save_partial_state(self, config: dict, partial_text: str):
+        """
+        Checkpoint what a cancelled run left behind so the thread stays usable:
+        unanswered tool calls get a "cancelled" ToolMessage and text already
+        streamed to the client is kept as the (cut off) assistant reply.
+        """
+        try:
+            snapshot = await self.graph.aget_state(config)
+            messages = snapshot.values.get("messages", []) if snapshot.values else []
+            updates = []
+
+            last_ai = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+            if last_ai is not None and last_ai.tool_calls:
+                answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+                updates += [
+                    ToolMessage(content="Tool call cancelled.", tool_call_id=call["id"], name=call["name"], status="error")
+                    for call in last_ai.tool_calls
+                    if call["id"] not in answered
+                ]
+            if partial_text:
+                updates.append(AIMessage(content=partial_text + " [cancelled]"))
+
+            if updates:
+                await self.graph.aupdate_state(config, {"messages": updates}, as_node="LLMAgent")
+        except Exception as e:
+            print("Could not checkpoint cancelled run:", e)
+
     async def execute(self, context: RequestContext, event_queue: EventQueue):
         """
         Execute LangGraph agent for an incoming A2A message.
@@ -60,6 +304,134 @@ class LangGraphExecutor(AgentExecutor):
         thread_id = str(getattr(context, "context_id", None) or uuid.uuid4())
         config = {"configurable": {"thread_id": thread_id}}
 
+        try:
+            await self.admission.acquire(thread_id)
+        except Overloaded as e:
+            await self.reject(context, event_queue, e)
+            return
+
+        call = self.direct.match(user_message) if self.direct is not None else None
+        if call is not None:
+            try:
+                await self.execute_direct(context, event_queue, user_message, call, config)
+            finally:
+                self.admission.release(thread_id)
+            return
+
+        mode = "streaming" if self.streaming else "message"
+        status = "ok"
+        started = time.perf_counter()
+        A2A_IN_FLIGHT.inc()
+        # Entered before the run task is created so node/LLM/MCP spans of the run become its children
+        with tracer.span("a2a.request", mode=mode, task_id=context.task_id or "", context_id=thread_id) as span:
+            # Own task so cancel() / drain() can stop the graph run and wait for it to clean up
+            run_id = context.task_id or thread_id
+            if self.streaming:
+                run = asyncio.create_task(self.execute_streaming(context, event_queue, state, config))
+            else:
+                run = asyncio.create_task(self.execute_message(event_queue, state, config))
+            self._runs[run_id] = run
+            watcher = None
+            if self.streaming and self.task_store is not None and context.task_id:
+                watcher = asyncio.create_task(self.watch_cancellation(context.task_id, run))
+
+            try:
+                await run
+            except asyncio.CancelledError:
+                status = "cancelled"
+                # Only propagate if this request itself was cancelled, not just its run
+                if asyncio.current_task().cancelling():
+                    raise
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                span.set_attribute("status", status)
+                A2A_IN_FLIGHT.dec()
+                A2A_REQUESTS.inc(mode=mode, status=status)
+                A2A_REQUEST_SECONDS.observe(time.perf_counter() - started, mode=mode)
+                if watcher is not None:
+                    watcher.cancel()
+                self._runs.pop(run_id, None)
+                self.admission.release(thread_id)
+                if not event_queue.is_closed():
+                    await event_queue.close()
+
+    async def execute_direct(
+        self, context: RequestContext, event_queue: EventQueue, user_message: str, call: DirectCall, config: dict
+    ):
+        """Answer a structured tool-call payload with the tool's result, without running the graph."""
+        mode = "direct"
+        status = "ok"
+        started = time.perf_counter()
+        A2A_IN_FLIGHT.inc()
+        with tracer.span("a2a.request", mode=mode, task_id=context.task_id or "", context_id=config["configurable"]["thread_id"],
+                         tool=call.name) as span:
+            try:
+                result = await self.direct.run(call)
+                text = self.direct.reply(result)
+                if result.status == "error":
+                    status = "tool_error"
+                # Before replying, so a follow-up request on the thread sees the call
+                await self.save_direct_call(config, user_message, call, result)
+                if self.streaming:
+                    task = context.current_task or new_task(context.message)
+                    if not context.current_task:
+                        await event_queue.enqueue_event(task)
+                    updater = TaskUpdater(event_queue, task.id, task.context_id)
+                    if result.status == "error":
+                        await updater.failed(updater.new_agent_message([Part(root=TextPart(text=text))]))
+                    else:
+                        await updater.add_artifact([Part(root=TextPart(text=text))], name=RESPONSE_ARTIFACT,
+                                                   last_chunk=True)
+                        await updater.complete()
+                else:
+                    await event_queue.enqueue_event(new_agent_text_message(text))
+                    await event_queue.enqueue_event(new_agent_text_message("✅ Done processing LangGraph request."))
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                span.set_attribute("status", status)
+                A2A_IN_FLIGHT.dec()
+                A2A_REQUESTS.inc(mode=mode, status=status)
+                A2A_REQUEST_SECONDS.observe(time.perf_counter() - started, mode=mode)
+                if not event_queue.is_closed():
+                    await event_queue.close()
+
+    async def save_direct_call(self, config: dict, user_message: str, call: DirectCall, result: ToolMessage):
+        """
+        Add a direct call to the thread as if the LLM had made it, so later
+        turns can refer to it. Oversized results are capped like in the graph.
+        """
+        try:
+            limiter = get_tool_output_limiter()
+            if limiter is not None:
+                result = await limiter.alimit(result, self.direct.tool_node.tools_by_name[call.name])
+            await self.graph.aupdate_state(config, {"messages": [
+                HumanMessage(content=user_message),
+                AIMessage(content="", tool_calls=[call.tool_call()]),
+                result,
+                AIMessage(content=result.content),
+            ]}, as_node="LLMAgent")
+        except Exception as e:
+            print("Could not checkpoint direct tool call:", e)
+
+    async def reject(self, context: RequestContext, event_queue: EventQueue, error: Overloaded):
+        """Answer a request that was not admitted with a rejected task carrying the retry-after hint."""
+        print("Rejecting request:", error)
+        task = context.current_task or new_task(context.message)
+        if not context.current_task:
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await updater.reject(updater.new_agent_message(
+            [Part(root=TextPart(text=f"❌ {error}"))],
+            metadata={"reason": error.reason, "retry_after": error.retry_after},
+        ))
+        await event_queue.close()
+
+    async def execute_message(self, event_queue: EventQueue, state: AgentState, config: dict):
+        """Reply with a single message once the graph is done (non-streaming mode)."""
         try:
             # Run full graph: LLM -> MCP tools
             response_text = await self.get_full_response(state, config=config)
@@ -68,23 +440,53 @@ class LangGraphExecutor(AgentExecutor):
             if response_text and not event_queue.is_closed():
                 await event_queue.enqueue_event(new_agent_text_message(response_text))
 
-        except Exception as e:
-            print("Executor error:", e)
+            # Graceful termination
             if not event_queue.is_closed():
                 await event_queue.enqueue_event(
-                    new_agent_text_message(f"❌ Executor failed: {e}")
+                    new_agent_text_message("✅ Done processing LangGraph request.")
                 )
 
-        finally:
-            # Graceful termination
+        except asyncio.CancelledError:
+            # Nothing reached the client yet: only close the dangling tool calls
+            await asyncio.shield(self.save_partial_state(config, ""))
+            raise
+
+        except Exception as e:
+            print("Executor error:", e)
             if not event_queue.is_closed():
                 await event_queue.enqueue_event(
-                    new_agent_text_message("✅ Done processing LangGraph request.")
+                    new_agent_text_message(f"❌ Executor failed: {e}")
                 )
-                await event_queue.close()
+
+    async def watch_cancellation(self, task_id: str, run: asyncio.Task):
+        """Cancel `run` once its task shows up as canceled in the (shared) task store."""
+        while not run.done():
+            await asyncio.sleep(CANCEL_POLL_INTERVAL)
+            try:
+                task = await self.task_store.get(task_id)
+            except Exception as e:
+                print("Task store lookup failed:", e)
+                continue
+            if task is not None and task.status.state == TaskState.canceled:
+                run.cancel()
+                return
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        raise Exception("Cancel not supported")
+        """
+        Cancel the graph run of a task. Cancelling the run cancels the in-flight
+        LLM request and MCP tool calls; the run then checkpoints its partial
+        state and publishes the canceled status itself.
+        """
+        run = self._runs.get(context.task_id)
+        if run is not None and not run.done():
+            run.cancel()
+            done, _ = await asyncio.wait({run}, timeout=CANCEL_TIMEOUT)
+            if done:
+                return
+            print(f"Run of task {context.task_id} did not stop within {CANCEL_TIMEOUT}s")
+
+        # No run in this process (or it is stuck): just mark the task canceled
+        await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
 
 
 
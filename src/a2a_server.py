@@ -1,17 +1,39 @@
 from a2a.types import AgentSkill, AgentCard, AgentCapabilities
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
-from src.a2a_lang_graph_executor import LangGraphExecutor
-from src.lang_graph_client import MultiServerMCPClient 
+from src.a2a_lang_graph_executor import LangGraphExecutor, STREAMING, DRAIN_TIMEOUT
+from src.a2a_task_store import get_task_store
+from src.client.session_pool import MCPSessionPool
+from src.graph.llm_cache import get_llm_cache
+from src.telemetry import REGISTRY, metrics_endpoint
 from a2a.server.apps import A2AStarletteApplication
+from contextlib import asynccontextmanager
 import uvicorn
-import asyncio
 import json
+import os
 
-def main():
+# Config
+MCP_CONFIG_FILE = os.getenv(
+    "MCP_CONFIG_FILE",
+    "/Users/shivamverma/Documents/python/PycharmProjects/LangGraph-MCP-Demo/src/config/mcp_server.json",
+)
+A2A_HOST = os.getenv("A2A_HOST", "0.0.0.0")
+A2A_PORT = int(os.getenv("A2A_PORT", "9999"))
+A2A_WORKERS = int(os.getenv("A2A_WORKERS", "1"))
+# URL advertised in the agent card; a wildcard bind address is not something a client can connect to
+A2A_PUBLIC_URL = os.getenv(
+    "A2A_PUBLIC_URL",
+    f"http://{'localhost' if A2A_HOST in ('0.0.0.0', '::', '') else A2A_HOST}:{A2A_PORT}/",
+)
+MCP_PREWARM = os.getenv("MCP_PREWARM", "false").lower() == "true"   # open MCP sessions at worker start
+
+def create_app():
+    """
+    Build the A2A app. Called once per uvicorn worker, so every worker has its
+    own MCP session pool and graph; tasks (and, with CHECKPOINTER=sqlite,
+    conversations) are shared between workers through SQLite.
+    """
     # 1. Load MCP config
-    JSON_DIR = "/Users/shivamverma/Documents/python/PycharmProjects/LangGraph-MCP-Demo/src/config/mcp_server.json"
-    with open(JSON_DIR, "r") as f:
+    with open(MCP_CONFIG_FILE, "r") as f:
         mcp_config = json.load(f)
     
     # 2. Define the LangGraph skill
@@ -27,20 +49,24 @@ def main():
     agent_card = AgentCard(
         name="MultiAgent Server",
         description="Server exposing LangGraph agent",
-        url="http://localhost:9999/",
+        url=A2A_PUBLIC_URL,
         defaultInputModes=["text"],
         defaultOutputModes=["text"],
         skills=[langgraph_skill],
         version="1.0.0",
-        capabilities=AgentCapabilities()
+        # Streaming: the response artifact is sent in chunks as the LLM generates it
+        capabilities=AgentCapabilities(streaming=STREAMING)
     )
 
-    # 4. Get tools from MCP
-    mcp_client = MultiServerMCPClient(connections=mcp_config)
-    tools_list = asyncio.run(mcp_client.get_tools())
+    # 4. Long-lived MCP session pool. Servers are started lazily, on the first
+    #    call of one of their tools (or at worker start with MCP_PREWARM),
+    #    inside uvicorn's event loop (see lifespan)
+    mcp_pool = MCPSessionPool(mcp_config, lazy=not MCP_PREWARM)
+    task_store = get_task_store()
 
-    # 5. Create executor instance
-    langgraph_executor = LangGraphExecutor(tools_list)
+    # 5. Create executor instance straight from the on-disk tool snapshot
+    #    (None on first run: tools are then discovered during startup)
+    langgraph_executor = LangGraphExecutor(tools=mcp_pool.tools_from_snapshot(), pool=mcp_pool, task_store=task_store)
 
     print("LangGraphExecutor type:", type(langgraph_executor))
     print("Has execute:", hasattr(langgraph_executor, "execute"))
@@ -48,7 +74,7 @@ def main():
     # 6. Register executor (single executor, not a dict)
     request_handler = DefaultRequestHandler(
         agent_executor=langgraph_executor,  # <-- direct instance
-        task_store=InMemoryTaskStore()
+        task_store=task_store
     )
 
     # 7. Start server
@@ -57,7 +83,57 @@ def main():
         agent_card=agent_card
     )
 
-    uvicorn.run(server.build(), host="0.0.0.0", port=9999)
+    @asynccontextmanager
+    async def lifespan(app):
+        await langgraph_executor.startup()
+        yield
+        # Drains in-flight runs before the MCP servers are stopped
+        await langgraph_executor.shutdown()
+
+    app = server.build(lifespan=lifespan)
+    # Prometheus scrape endpoint (per worker)
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+    cache = get_llm_cache()
+    if cache is not None:
+        REGISTRY.add_collector(lambda: llm_cache_metrics(cache.stats()))
+    return app
+
+
+# kind and description of each LLM cache stat, exported as llm_cache_<stat>
+LLM_CACHE_METRICS = {
+    "entries": ("gauge", "Responses in the LLM cache"),
+    "hits": ("counter", "LLM cache exact hits"),
+    "semantic_hits": ("counter", "LLM cache semantic hits"),
+    "misses": ("counter", "LLM cache misses"),
+    "evictions": ("counter", "LLM cache evictions"),
+    "hit_rate": ("gauge", "LLM cache hit rate (exact and semantic)"),
+}
+
+
+def llm_cache_metrics(stats: dict) -> list[str]:
+    lines = []
+    for key, value in stats.items():
+        kind, description = LLM_CACHE_METRICS.get(key, ("gauge", f"LLM cache {key}"))
+        lines += [f"# HELP llm_cache_{key} {description}", f"# TYPE llm_cache_{key} {kind}", f"llm_cache_{key} {value}"]
+    return lines
+
+
+def main():
+    if A2A_WORKERS > 1:
+        # Workers are separate processes: tasks and conversations must live in a shared store
+        os.environ.setdefault("A2A_TASK_STORE", "sqlite")
+        os.environ.setdefault("CHECKPOINTER", "sqlite")
+        if os.environ["A2A_TASK_STORE"] == "memory" or os.environ["CHECKPOINTER"] == "memory":
+            print("Warning: in-memory task store / checkpointer with several workers; tasks are not shared")
+
+    uvicorn.run(
+        "src.a2a_server:create_app",
+        factory=True,
+        host=A2A_HOST,
+        port=A2A_PORT,
+        workers=A2A_WORKERS,
+        timeout_graceful_shutdown=DRAIN_TIMEOUT,
+    )
 
 
 if __name__ == "__main__":
@@ -1,12 +1,17 @@
+import os
 import uvicorn
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 from a2a_agent_executor import GreetingAgentExecutor
+from a2a_task_store import get_task_store
 
+# Config
+A2A_WORKERS = int(os.getenv("A2A_WORKERS", "1"))
 
-def main():
+
+def create_app():
+    """Build the A2A app (called once per uvicorn worker)."""
     skill = AgentSkill(
         id="hello_world",
         name="Greet",
@@ -28,7 +33,7 @@ def main():
 
     request_handler = DefaultRequestHandler(
         agent_executor=GreetingAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        task_store=get_task_store(),
     )
 
     server = A2AStarletteApplication(
@@ -36,7 +41,14 @@ def main():
         agent_card=agent_card,
     )
 
-    uvicorn.run(server.build(), host="0.0.0.0", port=9999)
+    return server.build()
+
+
+def main():
+    if A2A_WORKERS > 1:
+        # Tasks must be visible to every worker process
+        os.environ.setdefault("A2A_TASK_STORE", "sqlite")
+    uvicorn.run("a2a_server_agent:create_app", factory=True, host="0.0.0.0", port=9999, workers=A2A_WORKERS)
 
 
 if __name__ == "__main__":
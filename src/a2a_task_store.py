@@ -0,0 +1,123 @@
+"""
+A2A task stores.
+
+`InMemoryTaskStore` only works with a single server process: with several
+uvicorn workers a task created by one worker is invisible to the worker that
+receives its tasks/get or tasks/cancel. `SQLiteTaskStore` keeps tasks in a
+local SQLite database (WAL mode) shared by all workers.
+
+Terminal states are sticky: once a task is completed/failed/canceled/rejected
+a later save with a non-terminal state (e.g. a "working" update still in
+flight in the worker running the task) is ignored. That is also how the
+worker running a task learns that another worker cancelled it.
+
+Pick the store with A2A_TASK_STORE=memory|sqlite (see get_task_store()).
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+from a2a.types import Task, TaskState
+
+
+# Config
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+A2A_TASK_DB = os.getenv("A2A_TASK_DB", os.path.join(PROJECT_ROOT, "a2a_tasks.sqlite"))
+A2A_TASK_TTL = float(os.getenv("A2A_TASK_TTL", str(24 * 3600)))   # finished tasks older than this are pruned
+
+TERMINAL_STATES = (TaskState.completed, TaskState.failed, TaskState.canceled, TaskState.rejected)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    context_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    task TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at);
+"""
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    A2A TaskStore backed by an embedded SQLite database shared by all workers.
+
+    Args:
+        path: Database file.
+        ttl: Seconds after which finished tasks are pruned (at startup and by prune()).
+    """
+
+    def __init__(self, path: str = A2A_TASK_DB, ttl: float = A2A_TASK_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._terminal = tuple(state.value for state in TERMINAL_STATES)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.prune()
+
+    def _save(self, task: Task):
+        placeholders = ",".join("?" * len(self._terminal))
+        with self._lock:
+            self.conn.execute(
+                f"""
+                INSERT INTO tasks (id, context_id, state, task, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    context_id = excluded.context_id, state = excluded.state,
+                    task = excluded.task, updated_at = excluded.updated_at
+                WHERE tasks.state NOT IN ({placeholders}) OR excluded.state IN ({placeholders})
+                """,
+                (task.id, task.context_id, task.status.state.value, task.model_dump_json(), time.time(),
+                 *self._terminal, *self._terminal),
+            )
+
+    def _get(self, task_id: str) -> Task | None:
+        with self._lock:
+            row = self.conn.execute("SELECT task FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return Task.model_validate_json(row[0]) if row else None
+
+    def _delete(self, task_id: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def prune(self) -> int:
+        """Delete finished tasks not updated for `ttl` seconds; returns how many."""
+        if self.ttl <= 0:
+            return 0
+        placeholders = ",".join("?" * len(self._terminal))
+        with self._lock:
+            cursor = self.conn.execute(
+                f"DELETE FROM tasks WHERE updated_at < ? AND state IN ({placeholders})",
+                (time.time() - self.ttl, *self._terminal),
+            )
+        return cursor.rowcount
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        await asyncio.to_thread(self._save, task)
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        return await asyncio.to_thread(self._get, task_id)
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        await asyncio.to_thread(self._delete, task_id)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def get_task_store(kind: str | None = None) -> TaskStore:
+    """Task store selected by A2A_TASK_STORE ("memory" or "sqlite")."""
+    kind = (kind or os.getenv("A2A_TASK_STORE", "memory")).lower()
+    if kind == "sqlite":
+        return SQLiteTaskStore()
+    return InMemoryTaskStore()
@@ -0,0 +1,187 @@
+"""
+Admission control for the A2A executor.
+
+Without it every incoming request immediately starts a graph run, so a burst
+fans out into unbounded concurrent LLM calls and MCP tool calls (each
+Playwright call is an `npx` browser session) until the machine or the LLM
+provider's rate limit gives out. The AdmissionController instead
+
+* runs at most A2A_MAX_CONCURRENT graph runs at a time,
+* runs at most A2A_MAX_PER_CONTEXT runs of one conversation (context) at a
+  time, so turns of a thread don't race on its checkpoint,
+* lets up to A2A_QUEUE_SIZE requests wait (FIFO) for a slot, each for at
+  most A2A_QUEUE_TIMEOUT seconds,
+* and rejects everything else right away with Overloaded, which carries a
+  retry-after estimate for the client.
+
+Outbound LLM requests are additionally limited per provider with a token
+bucket (see get_llm_rate_limiter()).
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+from src.telemetry import REGISTRY
+
+
+# Config
+A2A_MAX_CONCURRENT = int(os.getenv("A2A_MAX_CONCURRENT", "16"))
+A2A_MAX_PER_CONTEXT = int(os.getenv("A2A_MAX_PER_CONTEXT", "1"))
+A2A_QUEUE_SIZE = int(os.getenv("A2A_QUEUE_SIZE", "64"))
+A2A_QUEUE_TIMEOUT = float(os.getenv("A2A_QUEUE_TIMEOUT", "30"))   # max wait for a slot (s)
+DURATION_EWMA_ALPHA = 0.2      # weight of the latest run in the average run time (retry-after estimate)
+
+ADMISSION_RUNNING = REGISTRY.gauge("admission_running", "Graph runs admitted and running")
+ADMISSION_QUEUED = REGISTRY.gauge("admission_queued", "Requests waiting for a run slot")
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram("admission_wait_seconds", "Time requests waited for a run slot")
+ADMISSION_REJECTED = REGISTRY.counter("admission_rejected_total", "Requests rejected by admission control", ("reason",))
+
+
+class Overloaded(Exception):
+    """The request was not admitted; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Global and per-context concurrency limits with a bounded FIFO wait queue.
+
+    Usage:
+        await admission.acquire(context_id)     # may raise Overloaded
+        try:
+            ...
+        finally:
+            admission.release(context_id)
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = A2A_MAX_CONCURRENT,
+        max_per_context: int = A2A_MAX_PER_CONTEXT,
+        max_queue: int = A2A_QUEUE_SIZE,
+        queue_timeout: float = A2A_QUEUE_TIMEOUT,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_context = max_per_context
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._per_context: dict[str, int] = {}
+        self._started: dict[str, deque[float]] = {}
+        self._waiters: deque[tuple[str, asyncio.Future]] = deque()
+        self._avg_duration = 1.0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _has_room(self, context_id: str) -> bool:
+        return (
+            self.running < self.max_concurrent
+            and self._per_context.get(context_id, 0) < self.max_per_context
+        )
+
+    def _grant(self, context_id: str):
+        self.running += 1
+        self._per_context[context_id] = self._per_context.get(context_id, 0) + 1
+        self._started.setdefault(context_id, deque()).append(time.monotonic())
+        self.admitted += 1
+        ADMISSION_RUNNING.set(self.running)
+
+    def retry_after(self) -> float:
+        """Rough time until a slot frees up for a new request: the queue ahead of it drained at full concurrency."""
+        return max(1.0, math.ceil(self._avg_duration * (len(self._waiters) + 1) / self.max_concurrent))
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.rejected += 1
+        ADMISSION_REJECTED.inc(reason=reason)
+        return Overloaded(reason, self.retry_after())
+
+    async def acquire(self, context_id: str):
+        """Wait for a run slot for `context_id`; raises Overloaded if the queue is full or the wait times out."""
+        # Queued waiters that could run go first; ones held only by their own context's cap don't block others
+        if self._has_room(context_id) and not any(self._has_room(waiting) for waiting, _ in self._waiters):
+            self._grant(context_id)
+            ADMISSION_WAIT_SECONDS.observe(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (context_id, waiter)
+        self._waiters.append(entry)
+        ADMISSION_QUEUED.set(len(self._waiters))
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the wait ended: hand the slot on
+                self.release(context_id)
+            else:
+                waiter.cancel()
+                self._waiters.remove(entry)
+                ADMISSION_QUEUED.set(len(self._waiters))
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject("queue_timeout") from None
+            raise
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - start)
+
+    def release(self, context_id: str):
+        """Free the slot of a finished run and admit the first waiters that now fit."""
+        started = self._started[context_id].popleft()
+        self._avg_duration += DURATION_EWMA_ALPHA * (time.monotonic() - started - self._avg_duration)
+        self.running -= 1
+        self._per_context[context_id] -= 1
+        if not self._per_context[context_id]:
+            del self._per_context[context_id]
+            del self._started[context_id]
+
+        # FIFO, except that waiters of a context at its cap don't block the others
+        for entry in list(self._waiters):
+            if self.running >= self.max_concurrent:
+                break
+            waiting_context, waiter = entry
+            if self._has_room(waiting_context):
+                self._waiters.remove(entry)
+                self._grant(waiting_context)
+                waiter.set_result(None)
+        ADMISSION_QUEUED.set(len(self._waiters))
+        ADMISSION_RUNNING.set(self.running)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "running": self.running,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_run_s": self._avg_duration,
+        }
+
+
+# One limiter per LLM provider, shared by every model client of the process
+_llm_rate_limiters: dict[str, InMemoryRateLimiter | None] = {}
+
+
+def get_llm_rate_limiter(provider: str) -> InMemoryRateLimiter | None:
+    """
+    Token bucket for outbound requests to `provider`, configured with
+    <PROVIDER>_RATE_LIMIT_RPS (0 = unlimited, the default) and
+    <PROVIDER>_RATE_LIMIT_BURST, e.g. GROQ_RATE_LIMIT_RPS=0.5 for 30 req/min.
+    """
+    provider = provider.lower()
+    if provider not in _llm_rate_limiters:
+        rps = float(os.getenv(f"{provider.upper()}_RATE_LIMIT_RPS", "0"))
+        burst = float(os.getenv(f"{provider.upper()}_RATE_LIMIT_BURST", "1"))
+        _llm_rate_limiters[provider] = (
+            InMemoryRateLimiter(requests_per_second=rps, check_every_n_seconds=0.05, max_bucket_size=burst)
+            if rps > 0 else None
+        )
+    return _llm_rate_limiters[provider]
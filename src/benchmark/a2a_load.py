@@ -0,0 +1,168 @@
+"""
+Load generator for the A2A servers (src/a2a_server.py, src/a2a_server_agent.py).
+
+Uses the same A2ACardResolver / ClientFactory / MinimalConfig path as
+src/a2a_client.py and sweeps either
+
+* open-loop arrival rates (--mode open --rates 5,10,20): requests arrive as a
+  Poisson process regardless of how fast the server answers, and latency is
+  measured from the scheduled arrival, so queueing inside the server shows
+  up instead of being hidden by a slowed-down client, or
+* closed-loop concurrency levels (--mode closed --concurrency 1,8,32): N
+  clients each send their next request as soon as the previous one is done.
+
+Each level reports throughput, error rate, latency percentiles and a
+histogram, and time to first event (first streamed update or the reply).
+
+    uv run python -m src.benchmark.a2a_load --mode open --rates 5,10,20,40 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from bisect import bisect_left
+from typing import Any
+
+import httpx
+from a2a.client import A2ACardResolver, ClientFactory
+from a2a.types import Message, Part, Role, TaskState, TextPart
+
+from src.a2a_client import BASE_URL, MinimalConfig
+from src.benchmark.stats import summarize
+
+
+HISTOGRAM_BOUNDS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+FAILED_STATES = {TaskState.failed, TaskState.rejected, TaskState.canceled}
+
+
+def histogram(latencies_ms: list[float]) -> dict[str, int]:
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for latency in latencies_ms:
+        counts[bisect_left(HISTOGRAM_BOUNDS_MS, latency)] += 1
+    labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+    return dict(zip(labels, counts))
+
+
+async def send_one(client, text: str, scheduled: float, timeout: float) -> dict[str, Any]:
+    """One request; timings are relative to `scheduled` (its planned start)."""
+    message = Message(role=Role.user, messageId=str(uuid.uuid4()), parts=[Part(root=TextPart(text=text))])
+    first_event = None
+    error = None
+
+    async def run():
+        nonlocal first_event, error
+        async for response in client.send_message(message):
+            if first_event is None:
+                first_event = time.perf_counter() - scheduled
+            if not isinstance(response, Message):
+                task, _ = response
+                if task.status.state in FAILED_STATES:
+                    error = f"task {task.status.state.value}"
+
+    try:
+        await asyncio.wait_for(run(), timeout=timeout)
+    except asyncio.TimeoutError:
+        error = "timeout"
+    except Exception as e:
+        error = type(e).__name__
+    return {"latency": time.perf_counter() - scheduled, "first_event": first_event, "error": error}
+
+
+def level_report(results: list[dict[str, Any]], elapsed: float, **level) -> dict[str, Any]:
+    ok = [r for r in results if r["error"] is None]
+    errors: dict[str, int] = {}
+    for r in results:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    latencies_ms = [r["latency"] * 1000 for r in ok]
+    return {
+        **level,
+        "requests": len(results),
+        "ok": len(ok),
+        "error_rate": (len(results) - len(ok)) / len(results) if results else 0.0,
+        "errors": errors,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "latency_ms": summarize(latencies_ms),
+        "histogram_ms": histogram(latencies_ms),
+        "first_event_ms": summarize([r["first_event"] * 1000 for r in ok if r["first_event"] is not None]),
+    }
+
+
+async def open_loop(client, text: str, rate: float, duration: float, timeout: float, seed: int) -> dict[str, Any]:
+    rng = random.Random(seed)
+    running = []
+    start = time.perf_counter()
+    scheduled = start
+    while True:
+        scheduled += rng.expovariate(rate)
+        if scheduled - start > duration:
+            break
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        running.append(asyncio.create_task(send_one(client, text, scheduled, timeout)))
+    results = await asyncio.gather(*running)
+    return level_report(results, time.perf_counter() - start, mode="open", rate_rps=rate)
+
+
+async def closed_loop(client, text: str, concurrency: int, duration: float, timeout: float) -> dict[str, Any]:
+    results = []
+    start = time.perf_counter()
+
+    async def worker():
+        while time.perf_counter() - start < duration:
+            results.append(await send_one(client, text, time.perf_counter(), timeout))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return level_report(results, time.perf_counter() - start, mode="closed", concurrency=concurrency)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--mode", choices=("open", "closed"), default="open")
+    parser.add_argument("--rates", default="1,2,5,10,20", help="open loop: comma-separated arrival rates (req/s)")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="closed loop: comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (s)")
+    parser.add_argument("--message", default="add two numbers 23 and 45")
+    parser.add_argument("--no-streaming", action="store_true", help="use message/send even if the agent streams")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(args.timeout, connect=60.0), limits=limits) as httpx_client:
+        agent_card = await A2ACardResolver(httpx_client=httpx_client, base_url=args.base_url).get_agent_card()
+        config = MinimalConfig(httpx_client)
+        config.polling = False      # message/send blocks until the task is done
+        config.streaming = not args.no_streaming
+        client = ClientFactory(config=config).create(card=agent_card)
+
+        levels = []
+        if args.mode == "open":
+            for rate in (float(r) for r in args.rates.split(",")):
+                levels.append(await open_loop(client, args.message, rate, args.duration, args.timeout, args.seed))
+        else:
+            for concurrency in (int(c) for c in args.concurrency.split(",")):
+                levels.append(await closed_loop(client, args.message, concurrency, args.duration, args.timeout))
+        for level in levels:
+            print(f"{level['mode']} {level.get('rate_rps', level.get('concurrency'))}: "
+                  f"{level['throughput_rps']:.1f} req/s, p50 {level['latency_ms']['p50']:.0f} ms, "
+                  f"p99 {level['latency_ms']['p99']:.0f} ms, errors {level['error_rate']:.1%}")
+
+    report = {
+        "agent": agent_card.name,
+        "streaming": bool(config.streaming and agent_card.capabilities.streaming),
+        "duration_s": args.duration,
+        "levels": levels,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Overload test of the A2A executor's admission control.
+
+Serves the A2A app (LangGraphExecutor) in-process under uvicorn with a
+scripted LLM that takes --llm-latency seconds per call and serves at most
+--llm-capacity calls at once (like a provider under its rate limit), then
+sweeps open-loop arrival rates through it with src/benchmark/a2a_load.py,
+once with effectively unlimited admission and once with the configured
+AdmissionController. Capacity is llm-capacity / llm-latency requests/s;
+rates above it show whether latency of accepted requests stays bounded and
+how much is rejected (with a retry-after) instead.
+
+    uv run python -m src.benchmark.admission --rates 8,16,32,64 --duration 15
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any
+
+import httpx
+import uvicorn
+from a2a.client import ClientFactory
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities, AgentCard
+from langchain_core.messages import AIMessage
+
+from src.a2a_client import MinimalConfig
+from src.admission import AdmissionController
+from src.benchmark.a2a_load import open_loop
+from src.benchmark.stub_llm import ScriptedChatModel
+import src.graph.state_graph as state_graph
+from src.a2a_lang_graph_executor import LangGraphExecutor
+
+
+UNLIMITED = 10 ** 6
+
+
+async def run_mode(mode: str, rates: list[float], args) -> dict[str, Any]:
+    llm = ScriptedChatModel(
+        responses=[AIMessage(content="The sum of 23 and 45 is 68.")],
+        first_token_delay=args.llm_latency,
+        max_concurrency=args.llm_capacity,
+    )
+    state_graph.get_llm = lambda: llm
+    if mode == "admission":
+        admission = AdmissionController(
+            max_concurrent=args.max_concurrent, max_queue=args.queue_size, queue_timeout=args.queue_timeout
+        )
+    else:
+        admission = AdmissionController(max_concurrent=UNLIMITED, max_queue=UNLIMITED, queue_timeout=UNLIMITED)
+    executor = LangGraphExecutor(tools=[], streaming=True, admission=admission)
+
+    card = AgentCard(
+        name="admission-check", description="", url="http://127.0.0.1/", version="1.0.0",
+        defaultInputModes=["text"], defaultOutputModes=["text"], skills=[],
+        capabilities=AgentCapabilities(streaming=True),
+    )
+    app = A2AStarletteApplication(
+        http_handler=DefaultRequestHandler(agent_executor=executor, task_store=InMemoryTaskStore()), agent_card=card
+    ).build()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    card.url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}/"
+
+    levels = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(args.timeout, connect=60.0), limits=limits) as httpx_client:
+        config = MinimalConfig(httpx_client)
+        config.polling = False
+        client = ClientFactory(config=config).create(card=card)
+        for rate in rates:
+            level = await open_loop(client, "add two numbers 23 and 45", rate, args.duration, args.timeout, args.seed)
+            levels.append({**level, "admission": admission.stats()})
+            print(f"{mode} {rate:g} req/s: {level['throughput_rps']:.1f} ok/s, p50 {level['latency_ms']['p50']:.0f} ms, "
+                  f"p99 {level['latency_ms']['p99']:.0f} ms, errors {level['error_rate']:.1%}")
+            # Let the backlog of this level drain before the next one starts
+            while admission.running:
+                await asyncio.sleep(0.1)
+
+    server.should_exit = True
+    await serving
+    return {"mode": mode, "levels": levels}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="8,16,32,64", help="comma-separated arrival rates (req/s)")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per level")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request client timeout (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="scripted LLM latency per call (s)")
+    parser.add_argument("--llm-capacity", type=int, default=8, help="concurrent calls the scripted LLM serves")
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    parser.add_argument("--mode", choices=("unlimited", "admission"), action="append", help="run only these (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Identical prompts would otherwise be answered from the cache without touching the LLM
+    state_graph.get_llm_cache = lambda: None
+    rates = [float(r) for r in args.rates.split(",")]
+    report = {
+        "capacity_rps": args.llm_capacity / args.llm_latency,
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": [await run_mode(mode, rates, args) for mode in args.mode or ("unlimited", "admission")],
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
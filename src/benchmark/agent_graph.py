@@ -0,0 +1,219 @@
+"""
+Offline benchmark of the `build_agent_graph` pipeline.
+
+`get_llm()` is replaced by a ScriptedChatModel (scripted tool calls and
+token streams with injectable delays) and the tools come from the repo's own
+MCP servers, `mcp_server.py` and `mcp_weather_server.py`, with the weather
+server backed by a local FakeNWS. Neither Groq/Ollama nor internet access is
+needed. The servers run either in-process (MCP memory streams) or as local
+stdio subprocesses behind MCPSessionPool.
+
+Scenarios:
+    single_turn  one LLM reply streamed token by token, new thread per request
+    multi_tool   one LLM step with parallel add/multiply/forecast/alerts calls, then a reply
+    long_thread  many turns (tool call + reply) in one thread (checkpoint + history growth)
+
+Reports per scenario: steps/s, request latency and time-to-first-token
+percentiles, p50/p95/p99 per graph node, RSS and child process counts.
+
+    uv run python -m src.benchmark.agent_graph --transport stdio --requests 50 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.tools import load_mcp_tools
+from langgraph.checkpoint.memory import MemorySaver
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.process import child_processes, max_rss_kb, rss_kb
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel, tool_call
+from src.client.session_pool import MCPSessionPool
+from src.client.tool_snapshot import PROJECT_ROOT
+import src.graph.state_graph as state_graph
+from src.model.agentstate import AgentState
+
+
+SCENARIOS = ("single_turn", "multi_tool", "long_thread")
+
+
+class NodeTimer(AsyncCallbackHandler):
+    """Collects the wall time of every graph node run (LLMAgent, tools) from chain callbacks."""
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self._started: dict[Any, tuple[str, float]] = {}
+
+    async def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        # Node runs are the chains named like the node they belong to
+        if metadata and name and metadata.get("langgraph_node") == name:
+            self._started[run_id] = (name, time.perf_counter())
+
+    async def on_chain_end(self, outputs, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            self.durations[started[0]].append(time.perf_counter() - started[1])
+
+    async def on_chain_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+def stdio_config(nws_base_url: str) -> dict[str, dict[str, Any]]:
+    """The two local servers of mcp_server.json, run with this interpreter from the project root."""
+    return {
+        "Shivam_MCP_Server": {
+            "command": sys.executable,
+            "args": ["-m", "src.server.mcp_server"],
+            "cwd": PROJECT_ROOT,
+            "transport": "stdio",
+        },
+        "weather": {
+            "command": sys.executable,
+            "args": ["-m", "src.server.mcp_weather_server"],
+            "cwd": PROJECT_ROOT,
+            "env": {"NWS_API_BASE": nws_base_url},
+            "transport": "stdio",
+        },
+    }
+
+
+@asynccontextmanager
+async def mcp_tools(transport: str, nws_base_url: str) -> AsyncIterator[list[BaseTool]]:
+    if transport == "stdio":
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = MCPSessionPool(stdio_config(nws_base_url), snapshot_path=os.path.join(tmp, "snapshot.json"))
+            async with pool:
+                yield await pool.get_tools()
+        return
+
+    import src.server.mcp_server as math_server
+    import src.server.mcp_weather_server as weather_server
+
+    weather_server.NWS_API_BASE = nws_base_url
+    async with AsyncExitStack() as stack:
+        tools = []
+        for server in (math_server.mcp, weather_server.mcp):
+            session = await stack.enter_async_context(create_connected_server_and_client_session(server._mcp_server))
+            tools += await load_mcp_tools(session)
+        yield tools
+
+
+def scripted_llm(scenario: str, answer_tokens: int, first_token_delay: float, token_delay: float) -> ScriptedChatModel:
+    answer = AIMessage(content=" ".join(f"token{i}" for i in range(answer_tokens)))
+    if scenario == "single_turn":
+        responses = [answer]
+    elif scenario == "multi_tool":
+        calls = [
+            tool_call("add", {"a": 23, "b": 45}),
+            tool_call("multiply", {"a": 23, "b": 45}),
+            tool_call("get_forecast", {"latitude": 39.7456, "longitude": -97.0892}),
+            tool_call("get_alerts", {"state": "CA"}),
+        ]
+        responses = [AIMessage(content="", tool_calls=[call.tool_calls[0] for call in calls]), answer]
+    else:
+        responses = [tool_call("add", {"a": 23, "b": 45}), answer]
+    return ScriptedChatModel(responses=responses, first_token_delay=first_token_delay, token_delay=token_delay)
+
+
+async def run_scenario(scenario: str, tools: list[BaseTool], args) -> dict[str, Any]:
+    state_graph.get_llm = lambda: scripted_llm(scenario, args.answer_tokens, args.first_token_delay, args.token_delay)
+    graph = state_graph.build_agent_graph(tools=tools, checkpointer=MemorySaver())
+    timer = NodeTimer()
+
+    if scenario == "long_thread":
+        conversations, turns = 1, args.turns
+    else:
+        conversations, turns = args.requests, 1
+
+    latencies, ttfts = [], []
+    rss_before = rss_kb()
+    start = time.perf_counter()
+    for _ in range(conversations):
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": [timer]}
+        for turn in range(turns):
+            request_start = time.perf_counter()
+            first_token = None
+            async for chunk, metadata in graph.astream(
+                AgentState(messages=[HumanMessage(content=f"request turn {turn}")]), config, stream_mode="messages"
+            ):
+                if first_token is None and isinstance(chunk, AIMessageChunk) and chunk.content:
+                    first_token = time.perf_counter() - request_start
+            latencies.append(time.perf_counter() - request_start)
+            if first_token is not None:
+                ttfts.append(first_token)
+    elapsed = time.perf_counter() - start
+
+    steps = sum(len(samples) for samples in timer.durations.values())
+    to_ms = lambda summary: {key: value * 1000 if key != "count" else value for key, value in summary.items()}
+    return {
+        "scenario": scenario,
+        "requests": conversations * turns,
+        "elapsed_s": elapsed,
+        "steps": steps,
+        "steps_per_s": steps / elapsed,
+        "latency_ms": to_ms(summarize(latencies)),
+        "ttft_ms": to_ms(summarize(ttfts)),
+        "nodes_ms": {node: to_ms(summarize(samples)) for node, samples in timer.durations.items()},
+        "rss_kb": {"before": rss_before, "after": rss_kb(), "max": max_rss_kb()},
+        "child_processes": child_processes(),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="run only these (repeatable)")
+    parser.add_argument("--transport", choices=("inproc", "stdio"), default="inproc")
+    parser.add_argument("--requests", type=int, default=50, help="requests for single_turn / multi_tool")
+    parser.add_argument("--turns", type=int, default=50, help="turns of the long_thread conversation")
+    parser.add_argument("--answer-tokens", type=int, default=50)
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="scripted LLM time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="scripted LLM delay between tokens (s)")
+    parser.add_argument("--nws-latency", type=float, default=0.0, help="fake NWS latency per request (s)")
+    parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache on")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    if not args.llm_cache:
+        state_graph.get_llm_cache = lambda: None
+    # Scripts expect the LLM to phrase every tool result (no return-direct shortcut)
+    state_graph.get_tool_response_policy = lambda tools: None
+
+    results = []
+    with FakeNWS(latency=args.nws_latency) as nws:
+        children_before = child_processes()
+        async with mcp_tools(args.transport, nws.base_url) as tools:
+            for scenario in args.scenario or SCENARIOS:
+                results.append(await run_scenario(scenario, tools, args))
+                print(f"{scenario}: {results[-1]['steps_per_s']:.0f} steps/s, "
+                      f"p50 {results[-1]['latency_ms']['p50']:.1f} ms", file=sys.stderr)
+
+    report = {
+        "transport": args.transport,
+        "tools": len(tools),
+        "child_processes_before": children_before,
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Compare per-pair arithmetic tool calls with the add_batch/multiply_batch tools.
+
+Runs "add these N pairs" through the agent graph (scripted LLM with
+--llm-latency per step, mcp_server.py in-process or over stdio) three ways:
+
+    sequential  one `add` call per LLM step: N + 1 LLM steps
+    parallel    all N `add` calls in one LLM step (concurrent tools node): 2 steps
+    batch       one `add_batch` call with all N pairs: 2 steps
+
+and reports request latency, LLM steps, MCP tool calls, prompt tokens sent
+to the LLM and bytes of tool output kept in the state, per batch size.
+
+    uv run python -m src.benchmark.batch_tools --sizes 1,10,50 --llm-latency 0.3
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.benchmark.agent_graph import mcp_tools
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel
+from src.benchmark.tool_output import PromptTokens
+from src.graph.history import message_text
+import src.graph.state_graph as state_graph
+from src.model.agentstate import AgentState
+
+
+MODES = ("sequential", "parallel", "batch")
+
+
+def call(name: str, args: dict[str, Any]) -> dict[str, Any]:
+    return {"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}
+
+
+def script(mode: str, pairs: list[tuple[int, int]]) -> list[AIMessage]:
+    answer = AIMessage(content="The sums are " + ", ".join(str(a + b) for a, b in pairs) + ".")
+    if mode == "sequential":
+        return [AIMessage(content="", tool_calls=[call("add", {"a": a, "b": b})]) for a, b in pairs] + [answer]
+    if mode == "parallel":
+        return [AIMessage(content="", tool_calls=[call("add", {"a": a, "b": b}) for a, b in pairs]), answer]
+    batch = call("add_batch", {"pairs": [{"a": a, "b": b} for a, b in pairs]})
+    return [AIMessage(content="", tool_calls=[batch]), answer]
+
+
+async def run_case(mode: str, size: int, tools, args) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    pairs = [(rng.randint(0, 1000), rng.randint(0, 1000)) for _ in range(size)]
+    responses = script(mode, pairs)
+    state_graph.get_llm = lambda: ScriptedChatModel(responses=responses, first_token_delay=args.llm_latency)
+    graph = state_graph.build_agent_graph(tools=tools, checkpointer=MemorySaver())
+
+    latencies, steps, prompt_tokens, tool_bytes, tool_calls = [], 0, [], 0, 0
+    for _ in range(args.repeats):
+        counter = PromptTokens()
+        # Sequential needs 2 graph steps per pair, past LangGraph's default recursion limit of 25
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": [counter],
+                  "recursion_limit": 2 * size + 10}
+        start = time.perf_counter()
+        result = await graph.ainvoke(AgentState(messages=[HumanMessage(content=f"add these {size} pairs")]), config)
+        latencies.append(time.perf_counter() - start)
+        steps = len(counter.tokens)
+        prompt_tokens.append(sum(counter.tokens))
+        tool_messages = [message for message in result["messages"] if isinstance(message, ToolMessage)]
+        tool_calls = len(tool_messages)
+        tool_bytes = sum(len(message_text(message).encode()) for message in tool_messages)
+        assert not any(message.status == "error" for message in tool_messages), tool_messages
+
+    return {
+        "mode": mode,
+        "pairs": size,
+        "llm_steps": steps,
+        "tool_calls": tool_calls,
+        "prompt_tokens": summarize(prompt_tokens)["mean"],
+        "tool_output_bytes": tool_bytes,
+        "latency_ms": {key: value * 1000 if key != "count" else value for key, value in summarize(latencies).items()},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,10,50", help="comma-separated numbers of pairs")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--transport", choices=("inproc", "stdio"), default="inproc")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="scripted LLM latency per step (s)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    state_graph.get_llm_cache = lambda: None
+    # Scripts expect the LLM to phrase every tool result (no return-direct shortcut)
+    state_graph.get_tool_response_policy = lambda tools: None
+    results = []
+    with FakeNWS() as nws:
+        async with mcp_tools(args.transport, nws.base_url) as tools:
+            for size in (int(s) for s in args.sizes.split(",")):
+                for mode in args.modes.split(","):
+                    results.append(await run_case(mode, size, tools, args))
+                    r = results[-1]
+                    print(f"{size} pairs {mode}: {r['latency_ms']['p50']:.0f} ms, {r['llm_steps']} LLM steps, "
+                          f"{r['tool_calls']} tool calls, {r['prompt_tokens']:.0f} prompt tokens")
+    report = {"config": {key: value for key, value in vars(args).items() if key != "output"}, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
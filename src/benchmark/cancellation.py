@@ -0,0 +1,151 @@
+"""
+Check that cancelling an A2A task really stops its LangGraph run.
+
+Serves the A2A app (streaming LangGraphExecutor) in-process under uvicorn
+with a scripted LLM, sends a request, cancels it through `tasks/cancel` and
+reports how long the run took to stop, CPU time and open sockets while
+running vs. after the cancel, and what got checkpointed for the thread.
+
+Scenarios:
+    llm   cancelled while the LLM streams a long answer
+    tool  cancelled while a tool waits on a slow HTTP upstream (FakeNWS)
+
+    uv run python -m src.benchmark.cancellation --cancel-after 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any
+
+import httpx
+import uvicorn
+from a2a.client import ClientFactory
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities, AgentCard, Message, Part, Role, TaskIdParams, TaskStatusUpdateEvent, TextPart
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from src.a2a_client import MinimalConfig
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.process import open_sockets
+from src.benchmark.stub_llm import ScriptedChatModel, tool_call
+import src.graph.state_graph as state_graph
+from src.a2a_lang_graph_executor import LangGraphExecutor
+
+
+def slow_alerts_tool(base_url: str) -> StructuredTool:
+    async def get_alerts(state: str) -> str:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{base_url}/alerts/active/area/{state}", timeout=120)
+            return response.text
+
+    return StructuredTool.from_function(coroutine=get_alerts, name="get_alerts", description="Weather alerts for a US state")
+
+
+async def run_scenario(scenario: str, cancel_after: float, nws: FakeNWS) -> dict[str, Any]:
+    if scenario == "llm":
+        responses = [AIMessage(content=" ".join(f"word{i}" for i in range(5000)))]
+    else:
+        responses = [tool_call("get_alerts", {"state": "CA"}), AIMessage(content="done")]
+    state_graph.get_llm = lambda: ScriptedChatModel(responses=responses, first_token_delay=0.05, token_delay=0.01)
+
+    executor = LangGraphExecutor(tools=[slow_alerts_tool(nws.base_url)], streaming=True)
+    card = AgentCard(
+        name="cancel-check", description="", url="http://127.0.0.1/", version="1.0.0",
+        defaultInputModes=["text"], defaultOutputModes=["text"], skills=[],
+        capabilities=AgentCapabilities(streaming=True),
+    )
+    app = A2AStarletteApplication(
+        http_handler=DefaultRequestHandler(agent_executor=executor, task_store=InMemoryTaskStore()), agent_card=card
+    ).build()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    card.url = f"http://127.0.0.1:{port}/"
+
+    nws_port = int(nws.base_url.rsplit(":", 1)[1])
+    sockets_idle = open_sockets()
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as httpx_client:
+        client = ClientFactory(config=MinimalConfig(httpx_client)).create(card=card)
+        message = Message(role=Role.user, messageId=str(uuid.uuid4()), parts=[Part(root=TextPart(text="go"))])
+        first_event = asyncio.get_running_loop().create_future()
+        states = []
+
+        async def consume():
+            async for task, update in client.send_message(message):
+                if not first_event.done():
+                    first_event.set_result(task)
+                if isinstance(update, TaskStatusUpdateEvent):
+                    states.append(update.status.state.value)
+
+        consumer = asyncio.create_task(consume())
+        task = await first_event
+        await asyncio.sleep(cancel_after)
+
+        sockets_running = open_sockets()
+        upstream_running = open_sockets(nws_port)
+        cpu_start = time.process_time()
+        await asyncio.sleep(0.5)
+        cpu_running = time.process_time() - cpu_start
+
+        start = time.perf_counter()
+        cancelled = await client.cancel_task(TaskIdParams(id=task.id))
+        cancel_latency = time.perf_counter() - start
+        while executor._runs:
+            await asyncio.sleep(0.001)
+        stop_latency = time.perf_counter() - start
+        await asyncio.wait_for(consumer, timeout=5)
+
+        cpu_start = time.process_time()
+        await asyncio.sleep(0.5)
+        cpu_after = time.process_time() - cpu_start
+        sockets_after = open_sockets()
+        upstream_after = open_sockets(nws_port)
+
+    snapshot = await executor.graph.aget_state({"configurable": {"thread_id": task.context_id}})
+    checkpointed = [
+        {"type": m.type, "content": str(m.content)[:60]} for m in snapshot.values.get("messages", [])
+    ]
+    server.should_exit = True
+    await serving
+
+    return {
+        "scenario": scenario,
+        "task_state": cancelled.status.state.value,
+        "streamed_states": states,
+        "cancel_latency_ms": cancel_latency * 1000,
+        "run_stopped_ms": stop_latency * 1000,
+        "cpu_s_per_0.5s": {"running": cpu_running, "after_cancel": cpu_after},
+        # All sockets of the process, including the A2A client/server keep-alive connections
+        "sockets": {"idle": sockets_idle, "running": sockets_running, "after_cancel": sockets_after},
+        "upstream_sockets": {"running": upstream_running, "after_cancel": upstream_after},
+        "checkpointed_messages": checkpointed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cancel-after", type=float, default=0.5, help="seconds into the run to cancel")
+    parser.add_argument("--upstream-latency", type=float, default=30.0, help="FakeNWS latency for the tool scenario (s)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    with FakeNWS(latency=args.upstream_latency) as nws:
+        results = [await run_scenario(scenario, args.cancel_after, nws) for scenario in ("llm", "tool")]
+
+    report = {"cancel_after_s": args.cancel_after, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
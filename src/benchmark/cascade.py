@@ -0,0 +1,214 @@
+"""
+Checks and a load run for the small/large model cascade (src/graph/cascade.py).
+
+Both tiers are stub models (a fast "small" one, a slow "large" one) that
+answer the usual "add a and b" flow through the agent graph with the
+in-process MCP server: first an `add` tool call, then a one-line answer.
+
+Checks (pass/fail, reported under "checks"):
+    routine           tool call and answer both come from the small model
+    bad_arguments     small calls add with a string argument: escalated, large answers
+    unknown_tool      small calls a tool that isn't bound: escalated
+    invalid_tool_call small sends unparsable arguments: escalated
+    empty             small returns nothing: escalated
+    long_query        a long request goes straight to the large model
+    stream_once       stream_mode="messages" shows only the kept answer, never a rejected one
+
+Load run (--requests graph runs, --concurrency at a time): request latency
+and per-tier calls, latency and tokens for
+    large             every step on the large model (the current setup)
+    cascade           the cascade, with --bad-rate bad small tool calls and
+                      --complex-rate long requests that skip the small model
+
+    uv run python -m src.benchmark.cascade --requests 200 --concurrency 8 --bad-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.benchmark.agent_graph import mcp_tools
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel
+from src.graph.cascade import CascadeChatModel
+import src.graph.state_graph as state_graph
+from src.model.agentstate import AgentState
+
+
+QUERY = "add two numbers 23 and 45"
+LONG_QUERY = QUERY + ". " + " ".join(["Please explain every step of the addition in detail."] * 40)
+
+
+class StepModel(ScriptedChatModel):
+    """Calls `add` after the user's message and answers after the tool result; `bad` picks a broken first step."""
+
+    responses: List[AIMessage] = []
+    bad: str = ""           # "", "bad_arguments", "unknown_tool", "invalid_tool_call" or "empty"
+    bad_rate: float = 1.0   # share of first steps that are broken
+
+    def _next(self, messages: List[BaseMessage]) -> AIMessage:
+        if isinstance(messages[-1], ToolMessage):
+            self.responses = [AIMessage(content=f"{messages[-1].content}.")]
+        elif self.bad and self._random.random() < self.bad_rate:
+            call = {"name": "add", "args": {"a": "twenty-three", "b": 45}, "id": "call_bad"}
+            self.responses = [{
+                "bad_arguments": AIMessage(content="", tool_calls=[call]),
+                "unknown_tool": AIMessage(content="", tool_calls=[{**call, "name": "sum", "args": {"a": 23, "b": 45}}]),
+                "invalid_tool_call": AIMessage(content="", invalid_tool_calls=[
+                    {"name": "add", "args": '{"a": 23, "b": ', "id": "call_bad", "error": None}
+                ]),
+                "empty": AIMessage(content=""),
+            }[self.bad]]
+        else:
+            self.responses = [AIMessage(content="", tool_calls=[{"name": "add", "args": {"a": 23, "b": 45}, "id": "x"}])]
+        self._index = 0
+        return super()._next(messages)
+
+
+def tiers(args, bad: str = "", bad_rate: float = 1.0, seed: int = 0) -> tuple[StepModel, StepModel]:
+    small = StepModel(first_token_delay=args.small_latency, token_delay=args.small_token_delay, bad=bad,
+                      bad_rate=bad_rate, seed=seed)
+    large = StepModel(first_token_delay=args.large_latency, token_delay=args.large_token_delay, seed=seed + 1)
+    return small, large
+
+
+async def run(graph, query: str = QUERY, stream: bool = False) -> tuple[list, str]:
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    if not stream:
+        result = await graph.ainvoke(AgentState(messages=[HumanMessage(content=query)]), config)
+        return result["messages"], ""
+    text = ""
+    async for chunk, _ in graph.astream(AgentState(messages=[HumanMessage(content=query)]), config,
+                                        stream_mode="messages"):
+        if isinstance(chunk, AIMessageChunk):
+            text += chunk.content
+    return [], text
+
+
+def graph_for(llm, tools):
+    state_graph.get_llm = lambda: llm
+    return state_graph.build_agent_graph(tools=tools, checkpointer=MemorySaver())
+
+
+async def check(tools, args, bad: str = "", query: str = QUERY, stream: bool = False) -> dict[str, Any]:
+    small, large = tiers(args, bad)
+    cascade = CascadeChatModel(small=small, large=large, min_confidence=0)
+    messages, text = await run(graph_for(cascade, tools), query, stream)
+    stats = cascade.stats()
+    answer = "The sum of 23 and 45 is 68."
+    if stream:
+        return {"ok": text == answer, "text": text, "stats": stats}
+    ok = messages[-1].content == answer and not any(getattr(m, "status", None) == "error" for m in messages)
+    if bad:
+        ok = ok and stats["reasons"] == {f"large:{bad}": 1, "small:ok": 1}
+    elif query == LONG_QUERY:
+        ok = ok and stats["small"]["calls"] == 0 and stats["reasons"] == {"large:long_query": 2}
+    else:
+        ok = ok and stats["large"]["calls"] == 0
+    return {"ok": ok, "stats": stats}
+
+
+async def load(llm, tools, args, rng: random.Random) -> dict[str, Any]:
+    graph = graph_for(llm, tools)
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    queries = [LONG_QUERY if rng.random() < args.complex_rate else QUERY for _ in range(args.requests)]
+
+    async def one(query: str):
+        async with semaphore:
+            start = time.perf_counter()
+            await run(graph, query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in queries))
+    wall = time.perf_counter() - start
+    report = {
+        "wall_s": wall,
+        "latency_ms": {key: value * 1000 if key != "count" else value for key, value in summarize(latencies).items()},
+    }
+    if isinstance(llm, CascadeChatModel):
+        report["tiers"] = llm.stats()
+        steps = sum(llm.stats()["reasons"].values())
+        report["small_share"] = llm.stats()["reasons"].get("small:ok", 0) / steps
+    else:
+        usage = llm.usage
+        report["tiers"] = {"large": usage}
+    return report
+
+
+class CountingStepModel(StepModel):
+    """StepModel that adds up its calls and tokens, for the large-only baseline."""
+
+    usage: dict[str, int] = {}
+
+    def _next(self, messages: List[BaseMessage]) -> AIMessage:
+        message = super()._next(messages)
+        self.usage = {
+            "calls": self.usage.get("calls", 0) + 1,
+            "input_tokens": self.usage.get("input_tokens", 0) + message.usage_metadata["input_tokens"],
+            "output_tokens": self.usage.get("output_tokens", 0) + message.usage_metadata["output_tokens"],
+        }
+        return message
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--small-latency", type=float, default=0.15, help="small model first-token latency (s)")
+    parser.add_argument("--small-token-delay", type=float, default=0.005)
+    parser.add_argument("--large-latency", type=float, default=0.8, help="large model first-token latency (s)")
+    parser.add_argument("--large-token-delay", type=float, default=0.03)
+    parser.add_argument("--bad-rate", type=float, default=0.1, help="share of bad small-model tool calls")
+    parser.add_argument("--complex-rate", type=float, default=0.1, help="share of long requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    state_graph.get_llm_cache = lambda: None
+    # Scripts expect the LLM to phrase every tool result (no return-direct shortcut)
+    state_graph.get_tool_response_policy = lambda tools: None
+    with FakeNWS() as nws:
+        async with mcp_tools("inproc", nws.base_url) as tools:
+            checks = {
+                "routine": await check(tools, args),
+                "bad_arguments": await check(tools, args, "bad_arguments"),
+                "unknown_tool": await check(tools, args, "unknown_tool"),
+                "invalid_tool_call": await check(tools, args, "invalid_tool_call"),
+                "empty": await check(tools, args, "empty"),
+                "long_query": await check(tools, args, query=LONG_QUERY),
+                "stream_once": await check(tools, args, "bad_arguments", stream=True),
+            }
+            for name, result in checks.items():
+                print(f"check {name}: {'ok' if result['ok'] else 'FAILED'}")
+
+            large = CountingStepModel(first_token_delay=args.large_latency, token_delay=args.large_token_delay)
+            results = {"large": await load(large, tools, args, random.Random(args.seed))}
+            small, large = tiers(args, "bad_arguments", args.bad_rate, args.seed)
+            results["cascade"] = await load(CascadeChatModel(small=small, large=large), tools, args,
+                                            random.Random(args.seed))
+    for name, result in results.items():
+        print(f"{name}: p50 {result['latency_ms']['p50']:.0f} ms, p99 {result['latency_ms']['p99']:.0f} ms, "
+              f"wall {result['wall_s']:.2f} s")
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "checks": checks,
+        "load": results,
+    }
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
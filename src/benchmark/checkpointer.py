@@ -0,0 +1,135 @@
+"""
+Benchmark checkpoint write/read cost per graph step.
+
+Runs a one-node graph (no LLM, no tools) over many conversation threads so
+that checkpointing dominates, and times every aput / aput_writes / aget_tuple
+the graph issues. Compares MemorySaver with SQLiteCheckpointSaver in
+write-through and batched mode, then times compaction and eviction of the
+populated database.
+
+    uv run python -m src.benchmark.checkpointer --threads 10000 --turns 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END
+
+from src.benchmark.stats import summarize
+from src.graph.checkpointer import SQLiteCheckpointSaver
+from src.model.agentstate import AgentState
+
+
+def build_graph(checkpointer):
+    def reply(state: AgentState) -> dict:
+        return {"messages": [AIMessage(content=f"reply {len(state.messages)} " + "x" * 200)]}
+
+    builder = StateGraph(AgentState)
+    builder.add_node("LLMAgent", reply)
+    builder.add_edge(START, "LLMAgent")
+    builder.add_edge("LLMAgent", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def instrument(saver) -> dict[str, list[float]]:
+    """Time the async checkpointer calls the graph makes (instance-level wrappers)."""
+    timings: dict[str, list[float]] = defaultdict(list)
+    for name in ("aput", "aput_writes", "aget_tuple"):
+        original = getattr(saver, name)
+
+        async def timed(*args, _original=original, _name=name, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await _original(*args, **kwargs)
+            finally:
+                timings[_name].append(time.perf_counter() - start)
+
+        setattr(saver, name, timed)
+    return timings
+
+
+async def run_backend(name: str, saver, threads: int, turns: int, concurrency: int) -> dict[str, Any]:
+    timings = instrument(saver)
+    graph = build_graph(saver)
+    semaphore = asyncio.Semaphore(concurrency)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    async def conversation(thread: int):
+        config = {"configurable": {"thread_id": f"thread-{thread}"}}
+        async with semaphore:
+            for turn in range(turns):
+                await graph.ainvoke(AgentState(messages=[HumanMessage(content=f"turn {turn}")]), config)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation(thread) for thread in range(threads)))
+    elapsed = time.perf_counter() - start
+
+    steps = threads * turns
+    report = {
+        "backend": name,
+        "threads": threads,
+        "steps": steps,
+        "elapsed_s": elapsed,
+        "steps_per_s": steps / elapsed,
+        "max_rss_growth_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before,
+        "calls_us": {
+            call: {key: value * 1e6 if key != "count" else value for key, value in summarize(samples).items()}
+            for call, samples in timings.items()
+        },
+        "checkpoint_us_per_step": sum(sum(samples) for samples in timings.values()) / steps * 1e6,
+    }
+
+    if isinstance(saver, SQLiteCheckpointSaver):
+        saver.flush()
+        report["db_bytes"] = os.path.getsize(saver.path) + os.path.getsize(saver.path + "-wal")
+        start = time.perf_counter()
+        report["compacted_checkpoints"] = saver.compact(keep_last=2)
+        report["compact_s"] = time.perf_counter() - start
+        start = time.perf_counter()
+        report["evicted_threads"] = saver.evict(idle_ttl=0, max_threads=threads // 2)
+        report["evict_s"] = time.perf_counter() - start
+        saver.close()
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent conversations (adds lock/thread-pool queueing to the timings)")
+    parser.add_argument("--batch-size", type=int, default=64, help="batch size of the batched SQLite run")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [
+            ("memory", MemorySaver()),
+            ("sqlite", SQLiteCheckpointSaver(os.path.join(tmp, "through.sqlite"), batch_size=1, maintenance_every=0)),
+            ("sqlite_batched", SQLiteCheckpointSaver(
+                os.path.join(tmp, "batched.sqlite"), batch_size=args.batch_size, maintenance_every=0
+            )),
+        ]
+        for name, saver in backends:
+            results.append(await run_backend(name, saver, args.threads, args.turns, args.concurrency))
+            print(f"{name}: {results[-1]['steps_per_s']:.0f} steps/s, "
+                  f"{results[-1]['checkpoint_us_per_step']:.0f} us checkpointing per step")
+
+    report = {"threads": args.threads, "turns": args.turns, "concurrency": args.concurrency, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
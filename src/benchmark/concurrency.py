@@ -0,0 +1,135 @@
+"""
+Do concurrent graph runs overlap their LLM waits?
+
+Starts N requests at once (one event loop, like one uvicorn worker) against
+a scripted LLM that takes --first-token-delay seconds to its first token and
+streams --answer-tokens words --token-delay apart, and compares
+
+    async  the graph from build_agent_graph (async assistant node, ainvoke)
+    sync   the same graph shape with the original sync node (`llm.invoke`),
+           which LangGraph runs in the loop's default thread pool
+
+Reports per concurrency level: wall time vs. one request's LLM time
+(overlap = N * single-request time / wall time, N is perfect), request
+latency and time-to-first-token percentiles from stream_mode="messages",
+and the event loop lag seen by a ticker task while the requests ran.
+
+    uv run python -m src.benchmark.concurrency --concurrency 1,8,32,64 --first-token-delay 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel
+import src.graph.state_graph as state_graph
+from src.model.agentstate import AgentState
+
+
+MODES = ("async", "sync")
+
+
+def sync_graph(llm):
+    """The assistant node as it was: a sync function calling llm.invoke."""
+
+    def assistant(state: AgentState) -> dict:
+        return {"messages": [llm.invoke([SystemMessage(content="You are a helpful assistant.")] + state.messages)]}
+
+    builder = StateGraph(AgentState)
+    builder.add_node("LLMAgent", assistant)
+    builder.add_edge(START, "LLMAgent")
+    builder.add_edge("LLMAgent", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+
+async def ticker(lags: list[float], interval: float = 0.01):
+    """Records how late every `interval` sleep wakes up."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def one_request(graph) -> tuple[float, float | None]:
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    start = time.perf_counter()
+    first_token = None
+    async for chunk, _ in graph.astream(
+        AgentState(messages=[HumanMessage(content="add two numbers 23 and 45")]), config, stream_mode="messages"
+    ):
+        if first_token is None and isinstance(chunk, AIMessageChunk) and chunk.content:
+            first_token = time.perf_counter() - start
+    return time.perf_counter() - start, first_token
+
+
+def ms(summary: dict[str, float]) -> dict[str, float]:
+    return {key: value * 1000 if key != "count" else value for key, value in summary.items()}
+
+
+async def run_level(mode: str, concurrency: int, args) -> dict[str, Any]:
+    llm = ScriptedChatModel(
+        responses=[AIMessage(content=" ".join(f"token{i}" for i in range(args.answer_tokens)))],
+        first_token_delay=args.first_token_delay,
+        token_delay=args.token_delay,
+    )
+    if mode == "async":
+        state_graph.get_llm = lambda: llm
+        graph = state_graph.build_agent_graph(tools=[], checkpointer=MemorySaver())
+    else:
+        graph = sync_graph(llm)
+    await one_request(graph)   # warm-up
+
+    lags: list[float] = []
+    tick = asyncio.create_task(ticker(lags))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one_request(graph) for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    tick.cancel()
+
+    single = args.first_token_delay + args.token_delay * args.answer_tokens
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "overlap": concurrency * single / wall,
+        "latency_ms": ms(summarize([latency for latency, _ in results])),
+        "ttft_ms": ms(summarize([ttft for _, ttft in results if ttft is not None])),
+        "loop_lag_ms": ms(summarize(lags)),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32,64", help="comma-separated numbers of simultaneous requests")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--first-token-delay", type=float, default=0.5, help="scripted LLM time to first token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="scripted LLM delay between words (s)")
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    state_graph.get_llm_cache = lambda: None
+    results = []
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        for mode in args.modes.split(","):
+            results.append(await run_level(mode, concurrency, args))
+            r = results[-1]
+            print(f"{mode} x{concurrency}: wall {r['wall_s']:.2f} s, overlap {r['overlap']:.1f}, "
+                  f"p50 ttft {r['ttft_ms']['p50']:.0f} ms, max loop lag {r['loop_lag_ms']['max']:.1f} ms")
+    report = {"config": {key: value for key, value in vars(args).items() if key != "output"}, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,202 @@
+"""
+Structured tool-call payloads through the A2A server, with and without the
+direct fast path (src/graph/direct_call.py).
+
+Serves the A2A app (streaming LangGraphExecutor) in-process with the MCP
+servers (in-process or over stdio, FakeNWS behind the weather tools) and a
+scripted LLM with --llm-latency per step, then sends
+`{"name": "add", "parameters": {"a": "23", "b": "45"}}`-style payloads:
+
+    graph   A2A_DIRECT_TOOL_CALLS off: LLM picks the tool, tool runs, LLM phrases it
+    direct  the payload is validated and the tool called without the LLM
+
+Checks (pass/fail, reported under "checks"):
+    direct_reply      string numbers are coerced, the reply is the tool result, no LLM call
+    checkpointed      the call and its result are in the thread's checkpoint
+    unknown_name      {"name": "weather alert", ...} is not a tool: handled by the graph
+    bad_arguments     {"a": "twenty-three"} doesn't fit the schema: handled by the graph
+    natural_language  plain text is handled by the graph
+
+    uv run python -m src.benchmark.direct_call --requests 100 --llm-latency 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any
+
+import httpx
+import uvicorn
+from a2a.client import ClientFactory
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities, AgentCard, Message, Part, Role, TextPart
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from src.a2a_client import MinimalConfig
+from src.a2a_lang_graph_executor import LangGraphExecutor
+from src.benchmark.agent_graph import mcp_tools
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel
+import src.graph.state_graph as state_graph
+
+
+MODES = ("graph", "direct")
+
+
+class AddModel(ScriptedChatModel):
+    """Calls `add` for the numbers in the request, then repeats the tool result; counts its calls."""
+
+    responses: list[AIMessage] = []
+    calls: int = 0
+
+    def _next(self, messages: list[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        if isinstance(messages[-1], ToolMessage):
+            self.responses = [AIMessage(content=str(messages[-1].content))]
+        else:
+            args = json.loads(messages[-1].content).get("parameters", {}) if messages[-1].content.startswith("{") else {}
+            numbers = {"a": int(args.get("a", 23)) if str(args.get("a", "")).isdigit() else 23,
+                       "b": int(args.get("b", 45)) if str(args.get("b", "")).isdigit() else 45}
+            self.responses = [AIMessage(content="", tool_calls=[{"name": "add", "args": numbers, "id": "x"}])]
+        self._index = 0
+        return super()._next(messages)
+
+
+def payload(name: str, **parameters) -> str:
+    return json.dumps({"name": name, "parameters": parameters})
+
+
+async def send(client, text: str, context_id: str | None = None) -> tuple[str, str, str]:
+    """(reply text, final task state, context id) of one request."""
+    message = Message(role=Role.user, messageId=str(uuid.uuid4()), parts=[Part(root=TextPart(text=text))],
+                      contextId=context_id)
+    reply, state, context = "", "", context_id
+    async for response in client.send_message(message):
+        if isinstance(response, Message):
+            reply += "".join(part.root.text for part in response.parts)
+            continue
+        task, _ = response
+        state, context = task.status.state.value, task.context_id
+        if task.artifacts:
+            reply = "".join(part.root.text for artifact in task.artifacts for part in artifact.parts)
+        elif task.status.message:
+            reply = "".join(part.root.text for part in task.status.message.parts)
+    return reply, state, context
+
+
+async def serve(executor: LangGraphExecutor):
+    card = AgentCard(
+        name="direct-call-check", description="", url="http://127.0.0.1/", version="1.0.0",
+        defaultInputModes=["text"], defaultOutputModes=["text"], skills=[],
+        capabilities=AgentCapabilities(streaming=True),
+    )
+    app = A2AStarletteApplication(
+        http_handler=DefaultRequestHandler(agent_executor=executor, task_store=InMemoryTaskStore()), agent_card=card
+    ).build()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    card.url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}/"
+    return card, server, serving
+
+
+async def checks(client, executor: LangGraphExecutor, llm: AddModel) -> dict[str, Any]:
+    results = {}
+
+    before = llm.calls
+    reply, state, context = await send(client, payload("add", a="23", b="45"))
+    results["direct_reply"] = {"ok": reply == "The sum of 23 and 45 is 68" and state == "completed"
+                               and llm.calls == before, "reply": reply}
+
+    snapshot = await executor.graph.aget_state({"configurable": {"thread_id": context}})
+    types = [m.type for m in snapshot.values.get("messages", [])]
+    results["checkpointed"] = {"ok": types == ["human", "ai", "tool", "ai"] and not snapshot.next, "messages": types}
+
+    for name, text in (
+        ("unknown_name", payload("weather alert", state="CA")),
+        ("bad_arguments", payload("add", a="twenty-three", b="45")),
+        ("natural_language", "add two numbers 23 and 45"),
+    ):
+        before = llm.calls
+        reply, state, _ = await send(client, text)
+        results[name] = {"ok": llm.calls - before == 2 and state == "completed", "reply": reply}
+    return results
+
+
+async def run_mode(mode: str, tools, args) -> dict[str, Any]:
+    llm = AddModel(first_token_delay=args.llm_latency)
+    state_graph.get_llm = lambda: llm
+    executor = LangGraphExecutor(tools=tools, streaming=True, direct_tool_calls=mode == "direct")
+    card, server, serving = await serve(executor)
+
+    rng = random.Random(args.seed)
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as httpx_client:
+        config = MinimalConfig(httpx_client)
+        config.polling = False
+        client = ClientFactory(config=config).create(card=card)
+        result = {"mode": mode}
+        if mode == "direct":
+            result["checks"] = await checks(client, executor, llm)
+
+        async def one():
+            nonlocal errors
+            a, b = rng.randint(0, 1000), rng.randint(0, 1000)
+            async with semaphore:
+                start = time.perf_counter()
+                reply, state, _ = await send(client, payload("add", a=str(a), b=str(b)))
+                latencies.append(time.perf_counter() - start)
+                errors += state != "completed" or str(a + b) not in reply
+
+        calls = llm.calls
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        result["llm_calls_per_request"] = (llm.calls - calls) / args.requests
+
+    server.should_exit = True
+    await serving
+    result["latency_ms"] = {key: value * 1000 if key != "count" else value for key, value in summarize(latencies).items()}
+    result["error_rate"] = errors / args.requests
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--transport", choices=("inproc", "stdio"), default="inproc")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="scripted LLM latency per step (s)")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    state_graph.get_llm_cache = lambda: None
+    # Scripts expect the LLM to phrase every tool result (no return-direct shortcut)
+    state_graph.get_tool_response_policy = lambda tools: None
+    results = []
+    with FakeNWS() as nws:
+        async with mcp_tools(args.transport, nws.base_url) as tools:
+            for mode in args.modes.split(","):
+                results.append(await run_mode(mode, tools, args))
+                r = results[-1]
+                for name, check in r.get("checks", {}).items():
+                    print(f"check {name}: {'ok' if check['ok'] else 'FAILED'}")
+                print(f"{mode}: p50 {r['latency_ms']['p50']:.1f} ms, p99 {r['latency_ms']['p99']:.1f} ms, "
+                      f"{r['llm_calls_per_request']:.1f} LLM calls/request, errors {r['error_rate']:.1%}")
+    report = {"config": {key: value for key, value in vars(args).items() if key != "output"}, "results": results}
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
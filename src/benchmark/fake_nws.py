@@ -0,0 +1,174 @@
+"""
+Local stand-in for the National Weather Service API (api.weather.gov).
+
+Serves just enough of /points, /gridpoints/.../forecast and
+/alerts/active/area for `mcp_weather_server.py`, with injectable latency and
+request/connection counters, so weather benchmarks run offline:
+
+    with FakeNWS(latency=0.05) as nws:
+        os.environ["NWS_API_BASE"] = nws.base_url
+        ...
+        print(nws.requests, nws.connections)
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+POINTS_RE = re.compile(r"^/points/(-?[\d.]+),(-?[\d.]+)$")
+FORECAST_RE = re.compile(r"^/gridpoints/(\w+)/(\d+),(\d+)/forecast$")
+ALERTS_RE = re.compile(r"^/alerts/active/area/(\w+)$")
+
+
+class FakeNWS:
+    """
+    Threaded HTTP/1.1 stub of the NWS API.
+
+    Args:
+        latency: Seconds added to every request (server think time).
+        handshake_latency: Seconds added once per new TCP connection, standing
+            in for the TCP+TLS handshake cost of the real API.
+        alerts_per_state: Number of alert features returned per state.
+        points_max_age / forecast_max_age / alerts_max_age: Cache-Control
+            max-age sent with each kind of response.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        handshake_latency: float = 0.0,
+        alerts_per_state: int = 3,
+        points_max_age: int = 86400,
+        forecast_max_age: int = 300,
+        alerts_max_age: int = 30,
+    ):
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.alerts_per_state = alerts_per_state
+        self.max_age = {"points": points_max_age, "forecast": forecast_max_age, "alerts": alerts_max_age}
+        self.requests: Counter[str] = Counter()
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests.clear()
+            self.connections = 0
+
+    def start(self) -> "FakeNWS":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-nws", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeNWS":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    # -------------------------------
+    # Payloads
+    # -------------------------------
+    def points(self, lat: str, lon: str) -> dict:
+        x, y = abs(int(float(lat) * 10)) % 100, abs(int(float(lon) * 10)) % 100
+        return {"properties": {"forecast": f"{self.base_url}/gridpoints/FAK/{x},{y}/forecast"}}
+
+    def forecast(self, office: str, x: str, y: str) -> dict:
+        periods = [
+            {
+                "name": f"Period {i}",
+                "temperature": 60 + i,
+                "temperatureUnit": "F",
+                "windSpeed": f"{5 + i} mph",
+                "windDirection": "NW",
+                "detailedForecast": f"Sunny at grid {office} {x},{y}, period {i}.",
+            }
+            for i in range(1, 8)
+        ]
+        return {"properties": {"periods": periods}}
+
+    def alerts(self, state: str) -> dict:
+        features = [
+            {
+                "properties": {
+                    "event": f"Test Advisory {i}",
+                    "areaDesc": f"County {i}, {state}",
+                    "severity": "Minor",
+                    "description": "Synthetic alert served by FakeNWS.",
+                    "instruction": "None.",
+                }
+            }
+            for i in range(self.alerts_per_state)
+        ]
+        return {"features": features}
+
+    def _route(self, path: str) -> tuple[str, dict] | None:
+        if match := POINTS_RE.match(path):
+            return "points", self.points(*match.groups())
+        if match := FORECAST_RE.match(path):
+            return "forecast", self.forecast(*match.groups())
+        if match := ALERTS_RE.match(path):
+            return "alerts", self.alerts(match.group(1))
+        return None
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, so connection reuse is observable
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+                if fake.handshake_latency:
+                    time.sleep(fake.handshake_latency)
+
+            def do_GET(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                routed = fake._route(self.path.split("?", 1)[0])
+                kind = routed[0] if routed else "not_found"
+                with fake._lock:
+                    fake.requests[kind] += 1
+
+                if routed is None:
+                    body, status, max_age = b'{"title": "Not Found"}', 404, 0
+                else:
+                    body, status, max_age = json.dumps(routed[1]).encode(), 200, fake.max_age[kind]
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/geo+json")
+                self.send_header("Content-Length", str(len(body)))
+                if max_age:
+                    self.send_header("Cache-Control", f"public, max-age={max_age}")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
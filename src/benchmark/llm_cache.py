@@ -0,0 +1,90 @@
+"""
+Benchmark the LLM response cache of the assistant node.
+
+Runs a workload of repeated prompts (each as a new conversation, like A2A
+requests) through the real agent graph with a scripted LLM that takes
+--llm-latency seconds per call, once without and once with the cache, and
+reports request latency, the number of LLM calls made and the cache stats.
+
+    uv run python -m src.benchmark.llm_cache --distinct 5 --repeats 20 --llm-latency 0.3
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import StructuredTool
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel, tool_call
+from src.graph.llm_cache import LLMResponseCache
+import src.graph.state_graph as state_graph
+from src.model.agentstate import AgentState
+
+
+def add(a: int, b: int) -> int:
+    """Add two numbers"""
+    return a + b
+
+
+async def run_mode(mode: str, prompts: list[str], llm_latency: float) -> dict[str, Any]:
+    llm = ScriptedChatModel(
+        responses=[tool_call("add", {"a": 23, "b": 45}), AIMessage(content="The sum of 23 and 45 is 68.")],
+        first_token_delay=llm_latency,
+    )
+    cache = LLMResponseCache() if mode == "cached" else None
+    state_graph.get_llm = lambda: llm
+    state_graph.get_llm_cache = lambda: cache
+    graph = state_graph.build_agent_graph(tools=[StructuredTool.from_function(add)], checkpointer=MemorySaver())
+
+    latencies = []
+    start = time.perf_counter()
+    for prompt in prompts:
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        request_start = time.perf_counter()
+        await graph.ainvoke(AgentState(messages=[HumanMessage(content=prompt)]), config)
+        latencies.append(time.perf_counter() - request_start)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "requests": len(prompts),
+        "elapsed_s": elapsed,
+        "llm_calls": llm._index,
+        "latency_ms": {key: value * 1000 if key != "count" else value for key, value in summarize(latencies).items()},
+        "cache": cache.stats() if cache else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--distinct", type=int, default=5, help="number of distinct prompts")
+    parser.add_argument("--repeats", type=int, default=20, help="times each prompt is sent")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="scripted LLM latency per call (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    prompts = [f"add two numbers 23 and 45 (variant {i})" for i in range(args.distinct)] * args.repeats
+    random.Random(args.seed).shuffle(prompts)
+
+    report = {
+        "distinct_prompts": args.distinct,
+        "repeats": args.repeats,
+        "llm_latency_s": args.llm_latency,
+        "results": [await run_mode(mode, prompts, args.llm_latency) for mode in ("uncached", "cached")],
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,205 @@
+"""
+Failover and hedging checks and load runs for the LLM router (src/graph/llm_router.py).
+
+Backends are local stub providers (ScriptedChatModel) with injected
+first-token latency, slow tails and HTTP-style failures, so nothing here
+needs Groq or Ollama.
+
+Checks (pass/fail, reported under "checks"):
+    failover_429      primary always 429s: answered by the secondary, primary in cooldown
+    non_retryable     primary 400s: the error is raised, the secondary is never called and
+                      a run of them doesn't put the primary in cooldown
+    timeout           primary hangs: the secondary answers after the attempt timeout
+    hedge             primary is slow: the hedge answers and the primary is cancelled
+    stream_once       through the agent graph (stream_mode="messages") every token arrives once
+
+Load runs (--requests streamed calls, --concurrency at a time), latency to
+first token and error rate for:
+    single            one provider with a slow tail and --failure-rate 429s
+    failover          the same provider first, a healthy second provider behind it
+    hedged            two providers with slow tails, hedging at their p95
+
+    uv run python -m src.benchmark.llm_router --requests 400 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from contextlib import aclosing
+from typing import Any
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel, StubProviderError
+from src.graph.llm_router import RouterChatModel
+import src.graph.state_graph as state_graph
+from src.model.agentstate import AgentState
+
+
+ANSWER = AIMessage(content="The sum of 23 and 45 is 68.")
+PROMPT = [HumanMessage(content="add two numbers 23 and 45")]
+
+
+def stub(**kwargs) -> ScriptedChatModel:
+    return ScriptedChatModel(responses=[ANSWER], **kwargs)
+
+
+async def warm_up(router: RouterChatModel, calls: int = 10):
+    """Fill the latency windows so hedge delays are known."""
+    for _ in range(calls):
+        await router.ainvoke(PROMPT)
+
+
+async def check_failover_429() -> dict[str, Any]:
+    router = RouterChatModel(backends=[stub(failure_rate=1.0, failure_status=429), stub()], names=["primary", "secondary"])
+    message = await router.ainvoke(PROMPT)
+    stats = router.stats()
+    return {"ok": message.content == ANSWER.content and stats["primary"]["cooling_down_s"] > 0
+            and stats["secondary"]["ok"] == 1, "stats": stats}
+
+
+async def check_non_retryable() -> dict[str, Any]:
+    router = RouterChatModel(backends=[stub(failure_rate=1.0, failure_status=400), stub()], names=["primary", "secondary"])
+    raised = []
+    for _ in range(10):
+        try:
+            await router.ainvoke(PROMPT)
+            raised.append(None)
+        except StubProviderError as e:
+            raised.append(e.status_code)
+    stats = router.stats()
+    return {"ok": raised == [400] * 10 and stats["secondary"]["ok"] == 0 and stats["primary"]["cooling_down_s"] == 0
+            and stats["primary"]["error_rate"] == 0, "raised": raised, "stats": stats}
+
+
+async def check_timeout() -> dict[str, Any]:
+    router = RouterChatModel(
+        backends=[stub(first_token_delay=5.0), stub(first_token_delay=0.05)], names=["primary", "secondary"], timeout=0.3
+    )
+    start = time.perf_counter()
+    message = await router.ainvoke(PROMPT)
+    elapsed = time.perf_counter() - start
+    return {"ok": message.content == ANSWER.content and 0.3 <= elapsed < 1.0 and router.stats()["primary"]["timeout"] == 1,
+            "elapsed_s": elapsed}
+
+
+async def check_hedge() -> dict[str, Any]:
+    primary = stub(first_token_delay=0.05)
+    router = RouterChatModel(backends=[primary, stub(first_token_delay=0.05)], names=["primary", "secondary"],
+                             hedge=True, hedge_min_delay=0.05)
+    await warm_up(router)
+    primary.first_token_delay = 2.0
+    start = time.perf_counter()
+    chunks = [chunk async for chunk in router.astream(PROMPT)]
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0)
+    stats = router.stats()
+    return {"ok": "".join(c.content for c in chunks) == ANSWER.content and elapsed < 0.5
+            and stats["secondary"]["hedge_won"] == 1 and stats["primary"]["cancelled"] == 1
+            and stats["primary"]["in_flight"] == 0, "elapsed_s": elapsed, "stats": stats}
+
+
+async def check_stream_once() -> dict[str, Any]:
+    router = RouterChatModel(backends=[stub(failure_rate=1.0), stub(token_delay=0.001)], names=["primary", "secondary"])
+    state_graph.get_llm = lambda: router
+    graph = state_graph.build_agent_graph(tools=[], checkpointer=MemorySaver())
+    text = ""
+    async for chunk, _ in graph.astream(AgentState(messages=PROMPT), {"configurable": {"thread_id": str(uuid.uuid4())}},
+                                        stream_mode="messages"):
+        if isinstance(chunk, AIMessageChunk):
+            text += chunk.content
+    return {"ok": text == ANSWER.content, "text": text}
+
+
+async def load(router, args) -> dict[str, Any]:
+    ttfts, errors = [], 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                # Stop at the first chunk; the router's attempts are cancelled when the stream is closed
+                async with aclosing(router.astream(PROMPT)) as stream:
+                    async for _ in stream:
+                        ttfts.append(time.perf_counter() - start)
+                        break
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    await asyncio.sleep(0.1)   # abandoned streams are closed by the loop's async generator finalizer
+    to_ms = lambda summary: {key: value * 1000 if key != "count" else value for key, value in summary.items()}
+    report = {"ttft_ms": to_ms(summarize(ttfts)), "error_rate": errors / args.requests}
+    if isinstance(router, RouterChatModel):
+        report["backends"] = router.stats()
+    return report
+
+
+async def run_load(args) -> dict[str, Any]:
+    tail = dict(first_token_delay=args.latency, tail_rate=args.tail_rate, tail_delay=args.tail_delay)
+    flaky = dict(tail, failure_rate=args.failure_rate, failure_status=429)
+    results = {}
+
+    results["single"] = await load(stub(seed=1, **flaky), args)
+
+    router = RouterChatModel(backends=[stub(seed=1, **flaky), stub(seed=2, **tail)], names=["primary", "secondary"],
+                             cooldown=args.cooldown)
+    results["failover"] = await load(router, args)
+
+    single = stub(seed=3, **tail)
+    results["single_tail"] = await load(single, args)
+    router = RouterChatModel(backends=[stub(seed=3, **tail), stub(seed=4, **tail)], names=["primary", "secondary"],
+                             hedge=True, hedge_quantile=args.hedge_quantile, hedge_min_delay=args.latency)
+    await warm_up(router, 20)
+    results["hedged"] = await load(router, args)
+    stats = router.stats()
+    results["hedged"]["extra_requests"] = sum(backend["hedge"] for backend in stats.values()) / args.requests
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.1, help="normal first-token latency (s)")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="share of slow calls")
+    parser.add_argument("--tail-delay", type=float, default=1.5, help="first-token latency of slow calls (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.2, help="share of 429s of the flaky provider")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="router cooldown after a 429 (s)")
+    parser.add_argument("--hedge-quantile", type=float, default=0.9)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    state_graph.get_llm_cache = lambda: None
+    checks = {
+        "failover_429": await check_failover_429(),
+        "non_retryable": await check_non_retryable(),
+        "timeout": await check_timeout(),
+        "hedge": await check_hedge(),
+        "stream_once": await check_stream_once(),
+    }
+    for name, result in checks.items():
+        print(f"check {name}: {'ok' if result['ok'] else 'FAILED'}")
+    results = await run_load(args)
+    for name, result in results.items():
+        print(f"{name}: p50 {result['ttft_ms']['p50']:.0f} ms, p99 {result['ttft_ms']['p99']:.0f} ms, "
+              f"errors {result['error_rate']:.1%}")
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "checks": checks,
+        "load": results,
+    }
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""
+Benchmark the weather MCP server's shared HTTP client + response cache.
+
+Runs repeated `get_forecast` / `get_alerts` queries against a local FakeNWS
+twice: once with the original request path (a new httpx.AsyncClient per
+request, no cache) and once with `make_nws_request` as shipped. Reports
+upstream request/connection counts and p50/p99 tool latency for both, plus
+the upstream cost of a burst of identical concurrent lookups (single-flight).
+
+    uv run python -m src.benchmark.nws_cache --queries 200 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+import httpx
+
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.stats import summarize
+import src.server.mcp_weather_server as weather
+
+
+COORDINATES = [(39.7456, -97.0892), (40.7128, -74.0060), (34.0522, -118.2437), (47.6062, -122.3321), (29.7604, -95.3698)]
+STATES = ["CA", "NY", "TX"]
+
+
+async def uncached_nws_request(url: str) -> dict[str, Any] | None:
+    """The original make_nws_request: one client (and TCP connection) per request, no cache."""
+    headers = {
+        "User-Agent": weather.USER_AGENT,
+        "Accept": "application/geo+json"
+    }
+    async with httpx.AsyncClient() as client:
+        try:
+            response = await client.get(url, headers=headers, timeout=30.0)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            return None
+
+
+async def run_queries(queries: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> float:
+        async with semaphore:
+            start = time.perf_counter()
+            if i % 2:
+                await weather.get_alerts(STATES[i % len(STATES)])
+            else:
+                await weather.get_forecast(*COORDINATES[i % len(COORDINATES)])
+            return time.perf_counter() - start
+
+    return list(await asyncio.gather(*(one(i) for i in range(queries))))
+
+
+async def run_mode(nws: FakeNWS, mode: str, queries: int, concurrency: int) -> dict[str, Any]:
+    original = weather.make_nws_request
+    weather._response_cache.clear()
+    nws.reset_counters()
+    if mode == "uncached":
+        weather.make_nws_request = uncached_nws_request
+    try:
+        latencies = await run_queries(queries, concurrency)
+    finally:
+        weather.make_nws_request = original
+        if weather._http_client is not None:
+            await weather._http_client.aclose()
+
+    return {
+        "mode": mode,
+        "upstream_requests": dict(nws.requests),
+        "upstream_total": nws.total_requests,
+        "connections": nws.connections,
+        "latency_ms": {key: value * 1000 if key != "count" else value for key, value in summarize(latencies).items()},
+    }
+
+
+async def run_burst(nws: FakeNWS, mode: str, size: int) -> dict[str, Any]:
+    """`size` concurrent get_forecast calls for the same coordinates on a cold cache."""
+    original = weather.make_nws_request
+    weather._response_cache.clear()
+    nws.reset_counters()
+    if mode == "uncached":
+        weather.make_nws_request = uncached_nws_request
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(weather.get_forecast(*COORDINATES[0]) for _ in range(size)))
+        elapsed = time.perf_counter() - start
+    finally:
+        weather.make_nws_request = original
+        if weather._http_client is not None:
+            await weather._http_client.aclose()
+
+    return {"mode": mode, "burst_size": size, "upstream_total": nws.total_requests, "elapsed_ms": elapsed * 1000}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake NWS think time per request (s)")
+    parser.add_argument("--handshake-latency", type=float, default=0.03, help="fake cost of a new connection (s)")
+    parser.add_argument("--burst", type=int, default=50, help="identical concurrent lookups for the burst test")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    with FakeNWS(latency=args.latency, handshake_latency=args.handshake_latency) as nws:
+        weather.NWS_API_BASE = nws.base_url
+        report = {
+            "queries": args.queries,
+            "concurrency": args.concurrency,
+            "results": [
+                await run_mode(nws, "uncached", args.queries, args.concurrency),
+                await run_mode(nws, "pooled_cached", args.queries, args.concurrency),
+            ],
+            "burst": [
+                await run_burst(nws, "uncached", args.burst),
+                await run_burst(nws, "pooled_cached", args.burst),
+            ],
+        }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
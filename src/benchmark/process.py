@@ -0,0 +1,69 @@
+"""Process resource helpers shared by the benchmark scripts (Linux /proc; -1 elsewhere)."""
+
+import os
+import resource
+
+
+def rss_kb() -> int:
+    """Current resident set size of this process in KiB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return -1
+
+
+def max_rss_kb() -> int:
+    """Peak resident set size of this process in KiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child_processes() -> int:
+    """Number of live child processes (e.g. stdio MCP servers) of this process."""
+    pid = str(os.getpid())
+    count = 0
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return -1
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Fields after the parenthesised command name: state, ppid, ...
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if fields[1] == pid and fields[0] != "Z":
+            count += 1
+    return count
+
+
+def open_sockets(remote_port: int | None = None) -> int:
+    """
+    Sockets held by this process, optionally only TCP connections to
+    `remote_port`.
+    """
+    try:
+        inodes = set()
+        for fd in os.listdir("/proc/self/fd"):
+            try:
+                link = os.readlink(f"/proc/self/fd/{fd}")
+            except OSError:
+                continue
+            if link.startswith("socket:["):
+                inodes.add(link[len("socket:["):-1])
+        if remote_port is None:
+            return len(inodes)
+
+        count = 0
+        for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+            with open(table) as f:
+                for line in f.readlines()[1:]:
+                    fields = line.split()
+                    if int(fields[2].rsplit(":", 1)[1], 16) == remote_port and fields[9] in inodes:
+                        count += 1
+        return count
+    except OSError:
+        return -1
@@ -0,0 +1,155 @@
+"""
+Benchmark of prompt-prefix construction (src/graph/prompt.py).
+
+Uses the tools of the repo's MCP servers (in-process) plus --extra-tools
+synthetic tools (Playwright/Airbnb-sized tool sets) and a real, offline
+ChatGroq client for `bind_tools`, and reports
+
+* build_agent_graph time: first build of a tool set vs. later builds,
+  compared with rendering the prompt and binding the tools every time,
+* per-step message assembly time in the assistant node (prompt_build_seconds),
+  and time to render the prefix per step the way the node used to,
+* whether the request prefix (system prompt + bound tool schemas) is
+  byte-identical across graph instances,
+* the prompt cache hit rate.
+
+    uv run python -m src.benchmark.prompt --extra-tools 40 --builds 50 --steps 500
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.tools import StructuredTool
+from langchain_groq import ChatGroq
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.benchmark.agent_graph import mcp_tools
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel
+from src.graph.llm_cache import LLMResponseCache
+from src.graph.prompt import PROMPT_BUILD_SECONDS, SYSTEM_PROMPT, PromptCache
+import src.graph.prompt as prompt
+import src.graph.state_graph as state_graph
+from src.model.agentstate import AgentState
+
+
+def synthetic_tool(i: int) -> StructuredTool:
+    def browser_action(selector: str, text: str = "", timeout_ms: int = 30000) -> str:
+        return "ok"
+
+    return StructuredTool.from_function(
+        browser_action,
+        name=f"browser_action_{i}",
+        description=f"Synthetic browser action {i}: find the element matching `selector` and act on it. " * 3,
+    )
+
+
+def render_uncached(llm, tools) -> tuple[str, Any]:
+    """What build_agent_graph did before the prompt cache: format the prompt and bind the tools."""
+    tools_json = [tool.model_dump_json(include=["name", "description"]) for tool in tools]
+    system_prompt = SYSTEM_PROMPT.format(tools="\n".join(tools_json), working_dir=None)
+    return system_prompt, llm.bind_tools(tools)
+
+
+def prefix_digest(graph_prefix, bound) -> str:
+    payload = json.dumps({"system": graph_prefix.system_message.content, "tools": bound.kwargs.get("tools")}, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def ms(summary: dict[str, float]) -> dict[str, float]:
+    return {key: value * 1000 if key != "count" else value for key, value in summary.items()}
+
+
+async def run(tools, args) -> dict[str, Any]:
+    groq = ChatGroq(model="llama-3.1-8b-instant", api_key="offline")
+
+    # Graph builds: uncached baseline vs. prompt cache (first build is the miss)
+    baseline = []
+    for _ in range(args.builds):
+        start = time.perf_counter()
+        render_uncached(groq, tools)
+        baseline.append(time.perf_counter() - start)
+
+    prompt._prompt_cache = PromptCache()
+    state_graph.get_llm = lambda: groq
+    builds, digests = [], set()
+    for _ in range(args.builds):
+        start = time.perf_counter()
+        state_graph.build_agent_graph(tools=tools, checkpointer=MemorySaver())
+        builds.append(time.perf_counter() - start)
+        prefix = prompt._prompt_cache.prefix(tools)
+        digests.add(prefix_digest(prefix, prompt._prompt_cache.bind(groq, tools, prefix)))
+
+    # Per-step message assembly, measured inside the assistant node
+    state_graph.get_llm = lambda: ScriptedChatModel(responses=[AIMessage(content="ok")])
+    graph = state_graph.build_agent_graph(tools=tools, checkpointer=MemorySaver())
+    before = PROMPT_BUILD_SECONDS._values.get((), [0] * (len(PROMPT_BUILD_SECONDS.buckets) + 2))[:]
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    for step in range(args.steps):
+        await graph.ainvoke(AgentState(messages=[HumanMessage(content=f"step {step}")]), config)
+    after = PROMPT_BUILD_SECONDS._values[()]
+    assembly_mean = (after[-2] - before[-2]) / (after[-1] - before[-1])
+
+    # Rendering the prefix per step, as the node used to (new SystemMessage from the formatted prompt)
+    system_prompt, _ = render_uncached(groq, tools)
+    per_step = []
+    for _ in range(args.steps):
+        start = time.perf_counter()
+        SystemMessage(content=system_prompt)
+        per_step.append(time.perf_counter() - start)
+
+    # LLM response cache key: the node used to hash the system prompt with every request
+    conversation = [HumanMessage(content="add two numbers 23 and 45")]
+    key_times = {}
+    for name, messages in (("with_system_prompt", [SystemMessage(content=system_prompt)] + conversation),
+                           ("conversation_only", conversation)):
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            LLMResponseCache.key("scope", messages)
+        key_times[name] = (time.perf_counter() - start) / args.steps * 1e6
+
+    stats = prompt._prompt_cache.stats()
+    lookups = stats["prefix_hits"] + stats["prefix_misses"]
+    return {
+        "tools": len(tools),
+        "system_prompt_chars": len(system_prompt),
+        "build_uncached_ms": ms(summarize(baseline)),
+        "build_first_ms": builds[0] * 1000,
+        "build_cached_ms": ms(summarize(builds[1:])),
+        "step_assembly_mean_us": assembly_mean * 1e6,
+        "step_system_message_uncached_us": summarize(per_step)["mean"] * 1e6,
+        "llm_cache_key_us": key_times,
+        "prefix_byte_identical": len(digests) == 1,
+        "prompt_cache": stats,
+        "prefix_hit_rate": stats["prefix_hits"] / lookups if lookups else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--extra-tools", type=int, default=40, help="synthetic tools added to the MCP server tools")
+    parser.add_argument("--builds", type=int, default=50, help="graph builds per mode")
+    parser.add_argument("--steps", type=int, default=500, help="assistant steps for per-step timings")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Identical prompts would otherwise be answered from the LLM response cache
+    state_graph.get_llm_cache = lambda: None
+    with FakeNWS() as nws:
+        async with mcp_tools("inproc", nws.base_url) as tools:
+            report = await run(tools + [synthetic_tool(i) for i in range(args.extra_tools)], args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
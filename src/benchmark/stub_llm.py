@@ -0,0 +1,158 @@
+"""
+Scripted chat model for running the agent graph without Groq/Ollama.
+
+Replays a fixed list of AIMessages in a loop (text replies and/or tool calls),
+streaming text word by word with configurable first-token and per-token
+delays, so graph, executor and server overhead can be measured on their own.
+`max_concurrency` simulates a provider that serves only so many requests at
+once: further async calls queue (FIFO) before their first-token delay starts.
+`tail_rate`/`tail_delay` add a slow tail to the first-token delay and
+`failure_rate`/`failure_status` make calls fail like a provider HTTP error
+(e.g. 429), for exercising the LLM router. Replies carry `usage_metadata`
+with rough token counts (4 characters per token).
+
+    llm = ScriptedChatModel(responses=[tool_call("add", {"a": 1, "b": 2}), AIMessage(content="3")])
+"""
+
+import asyncio
+import contextlib
+import json
+import random
+import time
+import uuid
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+
+class StubProviderError(Exception):
+    """HTTP error of a stub provider; `status_code` like groq/openai/ollama errors."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"stub provider error {status_code}")
+        self.status_code = status_code
+
+
+def tool_call(name: str, args: dict[str, Any]) -> AIMessage:
+    """An AIMessage asking for a single tool call."""
+    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}])
+
+
+class ScriptedChatModel(BaseChatModel):
+    responses: List[AIMessage]
+    first_token_delay: float = 0.0     # seconds before the first chunk (simulated TTFT)
+    token_delay: float = 0.0           # seconds between streamed words
+    max_concurrency: int = 0           # simulated provider capacity for async calls (0 = unlimited)
+    tail_rate: float = 0.0             # share of calls whose first token takes tail_delay instead
+    tail_delay: float = 0.0
+    failure_rate: float = 0.0          # share of calls failing with StubProviderError(failure_status)
+    failure_status: int = 429
+    seed: Optional[int] = None
+    _index: int = PrivateAttr(default=0)
+    _capacity: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _random: random.Random = PrivateAttr(default=None)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _slot(self):
+        if not self.max_concurrency:
+            return contextlib.nullcontext()
+        if self._capacity is None:
+            self._capacity = asyncio.Semaphore(self.max_concurrency)
+        return self._capacity
+
+    def _first_token_delay(self) -> float:
+        """Delay before the first token of one call; raises StubProviderError for injected failures."""
+        if self._random is None:
+            self._random = random.Random(self.seed)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise StubProviderError(self.failure_status)
+        if self.tail_rate and self._random.random() < self.tail_rate:
+            return self.tail_delay
+        return self.first_token_delay
+
+    def _next(self, messages: List[BaseMessage]) -> AIMessage:
+        response = self.responses[self._index % len(self.responses)]
+        self._index += 1
+        # Fresh tool call ids each time, like a real provider
+        tool_calls = [{**call, "id": f"call_{uuid.uuid4().hex[:8]}"} for call in response.tool_calls]
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = (len(response.content) + len(json.dumps([call["args"] for call in tool_calls]))) // 4
+        return AIMessage(content=response.content, tool_calls=tool_calls, invalid_tool_calls=response.invalid_tool_calls,
+                         usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                                         "total_tokens": input_tokens + output_tokens})
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> List[AIMessageChunk]:
+        words = message.content.split(" ") if message.content else []
+        chunks = [AIMessageChunk(content=word if i == 0 else " " + word) for i, word in enumerate(words)]
+        if message.tool_calls or message.invalid_tool_calls:
+            chunks.append(AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ] + [
+                {"name": call["name"], "args": call["args"], "id": call["id"], "index": len(message.tool_calls) + i}
+                for i, call in enumerate(message.invalid_tool_calls)
+            ]))
+        chunks = chunks or [AIMessageChunk(content="")]
+        chunks[-1].usage_metadata = message.usage_metadata
+        return chunks
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay = self._first_token_delay()
+        message = self._next(messages)
+        time.sleep(delay + self.token_delay * len(self._chunks(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        async with self._slot():
+            delay = self._first_token_delay()
+            message = self._next(messages)
+            await asyncio.sleep(delay + self.token_delay * len(self._chunks(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self._first_token_delay())
+        for chunk in self._chunks(self._next(messages)):
+            yield ChatGenerationChunk(message=chunk)
+            time.sleep(self.token_delay)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async with self._slot():
+            await asyncio.sleep(self._first_token_delay())
+            for chunk in self._chunks(self._next(messages)):
+                yield ChatGenerationChunk(message=chunk)
+                await asyncio.sleep(self.token_delay)
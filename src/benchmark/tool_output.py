@@ -0,0 +1,145 @@
+"""
+Benchmark of tool output limits (src/graph/tool_output.py).
+
+Runs a long thread through the agent graph (scripted LLM, repo MCP servers
+in-process) where every turn calls `get_alerts` against a FakeNWS serving
+--alerts alerts per state (~130 bytes each, joined with "---" like the real
+server), once with the ToolOutputLimiter off and once on, and reports
+
+* bytes of tool output kept in the state, and checkpoint bytes held by the
+  MemorySaver after the thread,
+* prompt tokens sent to the LLM per step (after history trimming),
+* request latency and limiter overhead per tool call,
+* read_tool_output paging latency over a stored blob.
+
+    uv run python -m src.benchmark.tool_output --alerts 800 --turns 20
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+from typing import Any
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.benchmark.agent_graph import mcp_tools
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel, tool_call
+from src.graph.history import _load_token_counter, message_text
+import src.graph.state_graph as state_graph
+import src.graph.tool_output as tool_output
+from src.model.agentstate import AgentState
+
+
+class PromptTokens(AsyncCallbackHandler):
+    """Tokens of every message list sent to the chat model."""
+
+    def __init__(self):
+        self.count = _load_token_counter()
+        self.tokens: list[int] = []
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs):
+        for batch in messages:
+            self.tokens.append(sum(self.count(message_text(message)) for message in batch))
+
+
+def checkpoint_bytes(saver: MemorySaver) -> int:
+    total = sum(len(blob[1]) for blob in saver.blobs.values())
+    for namespaces in saver.storage.values():
+        for checkpoints in namespaces.values():
+            for checkpoint, metadata, _ in checkpoints.values():
+                total += len(checkpoint[1]) + len(metadata[1] if isinstance(metadata, tuple) else metadata)
+    return total
+
+
+def ms(summary: dict[str, float]) -> dict[str, float]:
+    return {key: value * 1000 if key != "count" else value for key, value in summary.items()}
+
+
+async def run_mode(mode: str, tools, args) -> dict[str, Any]:
+    limiter = None
+    if mode == "limited":
+        limiter = tool_output.ToolOutputLimiter(store=tool_output.BlobStore(args.blob_dir))
+        # Time every limit() call the tools node makes
+        limit, limit_times = limiter.limit, []
+
+        def timed_limit(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return limit(*a, **kw)
+            finally:
+                limit_times.append(time.perf_counter() - start)
+
+        limiter.limit = timed_limit
+    tool_output.get_tool_output_limiter = lambda: limiter
+    state_graph.get_tool_output_limiter = lambda: limiter
+
+    llm = ScriptedChatModel(responses=[tool_call("get_alerts", {"state": "CA"}), AIMessage(content="Here are the alerts.")])
+    state_graph.get_llm = lambda: llm
+    saver = MemorySaver()
+    graph = state_graph.build_agent_graph(tools=tools, checkpointer=saver)
+    prompt_tokens = PromptTokens()
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": [prompt_tokens]}
+
+    latencies = []
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        await graph.ainvoke(AgentState(messages=[HumanMessage(content=f"any weather alerts in CA? ({turn})")]), config)
+        latencies.append(time.perf_counter() - start)
+
+    state = (await graph.aget_state(config)).values
+    tool_messages = [message for message in state["messages"] if isinstance(message, ToolMessage)]
+    report = {
+        "mode": mode,
+        "tool_output_bytes_returned": len(message_text(tool_messages[0]).encode()) if mode == "unlimited" else None,
+        "state_tool_bytes": sum(len(message_text(message).encode()) for message in tool_messages),
+        "checkpoint_bytes": checkpoint_bytes(saver),
+        "prompt_tokens": summarize(prompt_tokens.tokens),
+        "request_ms": ms(summarize(latencies)),
+    }
+    if limiter:
+        report["limit_ms"] = ms(summarize(limit_times))
+        blob_id = message_text(tool_messages[0]).split("blob_id=")[1].split(":")[0]
+        pages, offset = [], 0
+        while True:
+            start = time.perf_counter()
+            page = limiter.read(blob_id, offset)
+            pages.append(time.perf_counter() - start)
+            if "next offset=" not in page:
+                break
+            offset = int(page.rsplit("next offset=", 1)[1].rstrip("]"))
+        report["read_page_ms"] = ms(summarize(pages))
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=800, help="alerts per get_alerts answer")
+    parser.add_argument("--turns", type=int, default=20, help="turns of the thread, one get_alerts call each")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    state_graph.get_llm_cache = lambda: None
+    results = []
+    with tempfile.TemporaryDirectory() as blob_dir, FakeNWS(alerts_per_state=args.alerts) as nws:
+        args.blob_dir = blob_dir
+        async with mcp_tools("inproc", nws.base_url) as tools:
+            for mode in ("unlimited", "limited"):
+                results.append(await run_mode(mode, tools, args))
+                print(f"{mode}: state {results[-1]['state_tool_bytes']} B, checkpoints {results[-1]['checkpoint_bytes']} B, "
+                      f"mean prompt {results[-1]['prompt_tokens']['mean']:.0f} tokens")
+    report = {"alerts": args.alerts, "turns": args.turns, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
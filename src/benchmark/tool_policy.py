@@ -0,0 +1,180 @@
+"""
+LLM calls saved by per-tool response policies (src/graph/tool_policy.py).
+
+Runs a traffic mix through the agent graph (in-process MCP servers, FakeNWS
+behind the weather tools) with a scripted LLM of --llm-latency per step that
+calls the tool the request names:
+
+    add       "The sum of a and b is c" (return direct)
+    multiply  the bare product, rendered with "The product of {a} and {b} is {output}."
+    alerts    get_alerts, which has no policy
+
+once with the policies off (every tool result goes back to the LLM) and once
+with the MCP servers' annotations, and reports LLM calls per request and
+latency per request kind.
+
+Checks (pass/fail, reported under "checks"):
+    add_direct        the answer is add's output, one LLM call
+    multiply_template the multiply template is rendered, one LLM call
+    tool_error        a failed add goes back to the LLM
+    mixed_turn        add + get_alerts in one turn go back to the LLM
+    bad_template      a template naming an unknown field goes back to the LLM
+    stream_once       the CLI's stream consumer shows the rendered answer exactly once
+
+    uv run python -m src.benchmark.tool_policy --requests 300 --llm-latency 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.benchmark.agent_graph import mcp_tools
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel
+import src.graph.state_graph as state_graph
+import src.graph.tool_policy as tool_policy
+from src.lang_graph_client import stream_graph_response
+from src.model.agentstate import AgentState
+
+
+KINDS = ("add", "multiply", "alerts")
+
+
+class RequestModel(ScriptedChatModel):
+    """Calls the tools named in the request ("add 2 3", "multiply 2 3", "alerts CA", joined by " and "); counts its calls."""
+
+    responses: List[AIMessage] = []
+    calls: int = 0
+
+    def _next(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        if isinstance(messages[-1], ToolMessage):
+            self.responses = [AIMessage(content="Here is what I found.")]
+        else:
+            tool_calls = []
+            for request in messages[-1].content.split(" and "):
+                kind, *args = request.split()
+                if kind == "alerts":
+                    tool_calls.append({"name": "get_alerts", "args": {"state": args[0]}, "id": "x"})
+                else:
+                    numbers = [int(a) if a.isdigit() else a for a in args]
+                    tool_calls.append({"name": kind, "args": {"a": numbers[0], "b": numbers[1]}, "id": "x"})
+            self.responses = [AIMessage(content="", tool_calls=tool_calls)]
+        self._index = 0
+        return super()._next(messages)
+
+
+def graph_for(llm: RequestModel, tools, policies: bool = True):
+    state_graph.get_llm = lambda: llm
+    state_graph.get_tool_response_policy = tool_policy.get_tool_response_policy if policies else lambda tools: None
+    return state_graph.build_agent_graph(tools=tools, checkpointer=MemorySaver())
+
+
+async def ask(graph, text: str, stream: bool = False) -> str:
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    if not stream:
+        result = await graph.ainvoke(AgentState(messages=[HumanMessage(content=text)]), config)
+        return result["messages"][-1].content
+    # The CLI's consumer, so the check sees exactly what a user would
+    return "".join([part async for part in stream_graph_response(AgentState(messages=[HumanMessage(content=text)]), graph, config)])
+
+
+async def checks(tools) -> dict[str, Any]:
+    results = {}
+    for name, text, expected, llm_calls in (
+        ("add_direct", "add 23 45", "The sum of 23 and 45 is 68", 1),
+        ("multiply_template", "multiply 23 45", "The product of 23 and 45 is 1035.", 1),
+        ("tool_error", "add twenty-three 45", "Here is what I found.", 2),
+        ("mixed_turn", "add 23 45 and alerts CA", "Here is what I found.", 2),
+    ):
+        llm = RequestModel()
+        answer = await ask(graph_for(llm, tools), text)
+        results[name] = {"ok": answer == expected and llm.calls == llm_calls, "answer": answer, "llm_calls": llm.calls}
+
+    tool_policy.TOOL_RESPONSE_POLICIES = {"multiply": "{a} x {c} = {output}"}
+    try:
+        llm = RequestModel()
+        answer = await ask(graph_for(llm, tools), "multiply 23 45")
+    finally:
+        tool_policy.TOOL_RESPONSE_POLICIES = {}
+    results["bad_template"] = {"ok": answer == "Here is what I found." and llm.calls == 2, "answer": answer}
+
+    answer = await ask(graph_for(RequestModel(token_delay=0.001), tools), "add 23 45", stream=True)
+    # The CLI also prints the tool call before the answer
+    rendered = "The sum of 23 and 45 is 68"
+    results["stream_once"] = {"ok": answer.endswith(rendered) and answer.count(rendered) == 1, "answer": answer}
+    return results
+
+
+async def run_mode(mode: str, tools, args) -> dict[str, Any]:
+    llm = RequestModel(first_token_delay=args.llm_latency)
+    graph = graph_for(llm, tools, policies=mode == "policy")
+    rng = random.Random(args.seed)
+    weights = [float(w) for w in args.mix.split(",")]
+    kinds = rng.choices(KINDS, weights=weights, k=args.requests)
+    latencies: dict[str, list[float]] = {kind: [] for kind in KINDS}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(kind: str):
+        text = {"add": f"add {rng.randint(0, 999)} {rng.randint(0, 999)}",
+                "multiply": f"multiply {rng.randint(0, 999)} {rng.randint(0, 999)}",
+                "alerts": "alerts CA"}[kind]
+        async with semaphore:
+            start = time.perf_counter()
+            await ask(graph, text)
+            latencies[kind].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(kind) for kind in kinds))
+    wall = time.perf_counter() - start
+    to_ms = lambda summary: {key: value * 1000 if key != "count" else value for key, value in summary.items()}
+    return {
+        "mode": mode,
+        "wall_s": wall,
+        "llm_calls_per_request": llm.calls / args.requests,
+        "latency_ms": to_ms(summarize([latency for values in latencies.values() for latency in values])),
+        "latency_ms_by_kind": {kind: to_ms(summarize(values)) for kind, values in latencies.items() if values},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="scripted LLM latency per step (s)")
+    parser.add_argument("--mix", default="5,3,2", help="relative weights of add,multiply,alerts requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    state_graph.get_llm_cache = lambda: None
+    with FakeNWS() as nws:
+        async with mcp_tools("inproc", nws.base_url) as tools:
+            report_checks = await checks(tools)
+            for name, result in report_checks.items():
+                print(f"check {name}: {'ok' if result['ok'] else 'FAILED'}")
+            results = [await run_mode(mode, tools, args) for mode in ("llm", "policy")]
+    for r in results:
+        print(f"{r['mode']}: {r['llm_calls_per_request']:.2f} LLM calls/request, p50 {r['latency_ms']['p50']:.0f} ms, "
+              f"wall {r['wall_s']:.1f} s")
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "checks": report_checks,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,170 @@
+"""
+Report what per-turn tool selection (src/graph/tool_selector.py) saves.
+
+Tool set: the repo's own MCP servers (in-process) plus stand-ins for the
+Playwright and Airbnb servers of mcp_server.json (same tool names and
+similar descriptions/arguments, no browser needed). For a set of labelled
+requests it reports
+
+* request prefix tokens (system prompt + bound tool schemas) with all tools
+  vs. the selected subset, and an estimated prefill time saving at
+  --prefill-tps prompt tokens/s,
+* recall: whether the tool the request needs was selected,
+* selection latency, and prompt cache hits for the repeated subsets,
+
+using the real assistant node (scripted LLM) for the per-step numbers.
+
+    uv run python -m src.benchmark.tool_selection --top-k 8 --repeats 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.benchmark.agent_graph import mcp_tools
+from src.benchmark.fake_nws import FakeNWS
+from src.benchmark.stats import summarize
+from src.benchmark.stub_llm import ScriptedChatModel
+from src.graph.history import _load_token_counter
+import src.graph.prompt as prompt
+import src.graph.state_graph as state_graph
+import src.graph.tool_selector as tool_selector
+from src.model.agentstate import AgentState
+
+
+STAND_IN_TOOLS = {
+    "browser_close": "Close the page",
+    "browser_resize": "Resize the browser window",
+    "browser_console_messages": "Returns all console messages",
+    "browser_handle_dialog": "Handle a dialog (accept or dismiss an alert, confirm or prompt)",
+    "browser_evaluate": "Evaluate JavaScript expression on page or element",
+    "browser_file_upload": "Upload one or multiple files",
+    "browser_fill_form": "Fill multiple form fields",
+    "browser_install": "Install the browser specified in the config",
+    "browser_press_key": "Press a key on the keyboard",
+    "browser_type": "Type text into editable element",
+    "browser_navigate": "Navigate to a URL",
+    "browser_navigate_back": "Go back to the previous page",
+    "browser_network_requests": "Returns all network requests since loading the page",
+    "browser_take_screenshot": "Take a screenshot of the current page",
+    "browser_snapshot": "Capture accessibility snapshot of the current page, this is better than screenshot",
+    "browser_click": "Perform click on a web page",
+    "browser_drag": "Perform drag and drop between two elements",
+    "browser_hover": "Hover over element on page",
+    "browser_select_option": "Select an option in a dropdown",
+    "browser_tabs": "List, create, close, or select a browser tab",
+    "browser_wait_for": "Wait for text to appear or disappear or a specified time to pass",
+    "airbnb_search": "Search for Airbnb listings with various filters and pagination. Provide direct links to the user",
+    "airbnb_listing_details": "Get detailed information about a specific Airbnb listing. Provide direct links to the user",
+}
+
+# (request, tool it needs)
+REQUESTS = [
+    ("add two numbers 23 and 45", "add"),
+    ("multiply 12 by 7", "multiply"),
+    ("what is the weather forecast for latitude 39.7 longitude -97.1", "get_forecast"),
+    ("are there any weather alerts in CA", "get_alerts"),
+    ("open https://example.com in the browser", "browser_navigate"),
+    ("take a screenshot of the page", "browser_take_screenshot"),
+    ("click the login button", "browser_click"),
+    ("type my email into the search box", "browser_type"),
+    ("search airbnb listings in Paris for 2 adults", "airbnb_search"),
+    ("show details of this airbnb listing", "airbnb_listing_details"),
+    ("go back to the previous page", "browser_navigate_back"),
+    ("upload the report files", "browser_file_upload"),
+]
+
+
+def stand_in_tool(name: str, description: str) -> StructuredTool:
+    def action(target: str = "", value: str = "", timeout_ms: int = 30000) -> str:
+        return "ok"
+
+    return StructuredTool.from_function(action, name=name, description=description)
+
+
+def prefix_tokens(tools, count) -> int:
+    system_prompt = prompt.get_prompt_cache().prefix(tools).system_prompt
+    return count(system_prompt) + count(json.dumps([convert_to_openai_tool(tool) for tool in tools]))
+
+
+async def run(tools, args) -> dict[str, Any]:
+    count = _load_token_counter()
+    selector = tool_selector.ToolSelector(tools, top_k=args.top_k, backend=args.backend)
+    all_tokens = prefix_tokens(tools, count)
+
+    per_request = []
+    for text, needed in REQUESTS:
+        start = time.perf_counter()
+        subset = selector.select([HumanMessage(content=text)])
+        elapsed = time.perf_counter() - start
+        tokens = prefix_tokens(subset, count)
+        per_request.append({
+            "request": text,
+            "selected": [tool.name for tool in subset],
+            "recall": needed in {tool.name for tool in subset},
+            "prefix_tokens": tokens,
+            "selection_us": elapsed * 1e6,
+        })
+
+    # Real assistant steps: prompt cache reuse for the repeated subsets
+    prompt._prompt_cache = prompt.PromptCache()
+    tool_selector.TOOL_SELECTION_TOP_K = args.top_k
+    tool_selector.TOOL_SELECTION_BACKEND = args.backend
+    tool_selector._selectors.clear()
+    state_graph.get_llm = lambda: ScriptedChatModel(responses=[AIMessage(content="ok")])
+    graph = state_graph.build_agent_graph(tools=tools, checkpointer=MemorySaver())
+    steps = []
+    for _ in range(args.repeats):
+        for text, _ in REQUESTS:
+            start = time.perf_counter()
+            await graph.ainvoke(AgentState(messages=[HumanMessage(content=text)]),
+                                {"configurable": {"thread_id": str(uuid.uuid4())}})
+            steps.append(time.perf_counter() - start)
+
+    mean_tokens = sum(r["prefix_tokens"] for r in per_request) / len(per_request)
+    return {
+        "tools": len(tools),
+        "top_k": args.top_k,
+        "backend": type(selector.index).__name__,
+        "prefix_tokens_all": all_tokens,
+        "prefix_tokens_selected_mean": mean_tokens,
+        "prefix_tokens_saved": 1 - mean_tokens / all_tokens,
+        "estimated_prefill_ms_saved": (all_tokens - mean_tokens) / args.prefill_tps * 1000,
+        "recall": sum(r["recall"] for r in per_request) / len(per_request),
+        "selection_us": summarize([r["selection_us"] for r in per_request]),
+        "request_ms": {key: value * 1000 if key != "count" else value for key, value in summarize(steps).items()},
+        "prompt_cache": prompt.get_prompt_cache().stats(),
+        "requests": per_request,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--backend", choices=("auto", "chromadb", "lexical"), default="auto")
+    parser.add_argument("--repeats", type=int, default=20, help="times each request is run through the graph")
+    parser.add_argument("--prefill-tps", type=float, default=5000.0, help="assumed prompt processing speed (tokens/s)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    state_graph.get_llm_cache = lambda: None
+    with FakeNWS() as nws:
+        async with mcp_tools("inproc", nws.base_url) as tools:
+            tools = tools + [stand_in_tool(name, description) for name, description in STAND_IN_TOOLS.items()]
+            report = await run(tools, args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,6 +6,7 @@ from mcp_use import MCPAgent, MCPClient
 from langchain_ollama import ChatOllama
 import os
 from langchain_groq import ChatGroq
+from src.graph.llm_router import LLM_ROUTER_PROVIDERS, RouterChatModel
 
 os.environ["GROQ_API_KEY"]=os.getenv("GROQ_API_KEY")
 LLM_MODEL = os.getenv("OLLAMA_LLM_MODEL", "llama3.1")
@@ -23,9 +24,9 @@ GROQ_MODEL   = os.getenv("GROQ_LLM_MODEL", "llama-3.1-8b-instant")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 
-def get_llm():
-    """Factory to create an LLM client based on provider selection."""
-    if LLM_PROVIDER.lower() == "groq":
+def get_provider_llm(provider: str):
+    """Chat model of one provider ("groq" or "ollama")."""
+    if provider.lower() == "groq":
         if not GROQ_API_KEY:
             raise ValueError("Missing GROQ_API_KEY in environment!")
         return ChatGroq(model=GROQ_MODEL, temperature=0)
@@ -33,6 +34,16 @@ def get_llm():
         return ChatOllama(model=OLLAMA_MODEL)
 
 
+def get_llm():
+    """Factory to create an LLM client based on provider selection."""
+    if len(LLM_ROUTER_PROVIDERS) > 1:
+        # Failover (and optional hedging) across providers, in the order given
+        return RouterChatModel(
+            backends=[get_provider_llm(provider) for provider in LLM_ROUTER_PROVIDERS], names=LLM_ROUTER_PROVIDERS
+        )
+    return get_provider_llm(LLM_PROVIDER)
+
+
 async def run_memory_chat():
     """Run a chat using MCPAgent's built-in conversation memory."""
     # Load environment variables for API keys
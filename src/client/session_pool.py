@@ -0,0 +1,415 @@
+"""
+Long-lived MCP session pool.
+
+`MultiServerMCPClient.get_tools()` hands out tools that open a brand new session
+for every single call, which for the stdio servers in mcp_server.json means a
+fresh `uv run ... mcp run` / `npx` subprocess per tool call. The pool instead
+keeps a fixed number of initialised sessions per server open for the lifetime
+of the process, hands them out to tool calls, pings idle sessions and restarts
+any session whose server has died.
+
+The number of sessions per server is read from an optional "pool_size" key in
+the server config (stripped before the config reaches the MCP adapters):
+
+    "weather": {"command": "...", "args": [...], "transport": "stdio", "pool_size": 2}
+
+With `lazy=True` no server is started up front: tools come from the on-disk
+snapshot (see tool_snapshot.py) and a session is opened on its first use.
+"""
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
+
+import anyio
+from langchain_core.tools import BaseTool, StructuredTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import _convert_call_tool_result, _list_all_tools
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import (
+    CONNECTION_CLOSED,
+    CallToolResult,
+    CancelledNotification,
+    CancelledNotificationParams,
+    ClientNotification,
+    Tool as MCPTool,
+)
+
+from src.client.tool_snapshot import DEFAULT_SNAPSHOT_FILE, load_snapshot, save_snapshot
+from src.telemetry import MCP_BYTES, MCP_CALLS, MCP_SECONDS, MCP_SPAWNS, NOOP_SPAN, TELEMETRY, tracer
+
+
+# Config
+DEFAULT_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "1"))
+HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT", "10"))
+SESSION_STOP_TIMEOUT = 5.0
+CANCEL_NOTIFY_TIMEOUT = 1.0
+SNAPSHOT_REFRESH_DELAY = float(os.getenv("MCP_SNAPSHOT_REFRESH_DELAY", "5"))
+POOL_OPTIONS = ("pool_size",)
+
+
+def session_connections(connections: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Strip the pool-only keys from an mcp_server.json config so it can be handed to MultiServerMCPClient."""
+    return {
+        name: {key: value for key, value in connection.items() if key not in POOL_OPTIONS}
+        for name, connection in connections.items()
+    }
+
+
+def _is_transport_error(error: BaseException) -> bool:
+    """True when an exception means the session itself is unusable (server died, pipe closed)."""
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(
+        error,
+        (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, OSError),
+    )
+
+
+async def _notify_cancelled(session: ClientSession, request_id: int):
+    notification = ClientNotification(
+        CancelledNotification(params=CancelledNotificationParams(requestId=request_id, reason="cancelled by client"))
+    )
+    try:
+        await asyncio.wait_for(session.send_notification(notification), timeout=CANCEL_NOTIFY_TIMEOUT)
+    except Exception as e:
+        print("Could not send MCP cancellation:", e)
+
+
+class PooledSession:
+    """
+    A single initialised MCP session kept open by a background task.
+
+    The session context manager has to be entered and exited by the same task,
+    so each slot owns a task that opens the session and then parks until it is
+    asked to stop (or until the server dies underneath it).
+    """
+
+    def __init__(self, client: MultiServerMCPClient, server_name: str):
+        self.client = client
+        self.server_name = server_name
+        self.session: ClientSession | None = None
+        self.spawn_count = 0
+        self.spawned_on_checkout = False      # the last acquire() had to start the server
+        self._task: asyncio.Task | None = None
+        self._stop: asyncio.Event | None = None
+        self._error: BaseException | None = None
+
+    @property
+    def started(self) -> bool:
+        return self.spawn_count > 0
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self):
+        ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error = None
+        self._task = asyncio.create_task(self._run(ready), name=f"mcp-session-{self.server_name}")
+        await ready.wait()
+        if self.session is None:
+            raise RuntimeError(f"Could not start MCP session for '{self.server_name}'") from self._error
+        self.spawn_count += 1
+        MCP_SPAWNS.inc(server=self.server_name)
+
+    async def _run(self, ready: asyncio.Event):
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.session = session
+                ready.set()
+                await self._stop.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            ready.set()
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._stop.set()
+        await asyncio.wait([task], timeout=SESSION_STOP_TIMEOUT)
+        if not task.done():
+            task.cancel()
+            await asyncio.wait([task])
+
+    async def restart(self):
+        await self.stop()
+        await self.start()
+
+
+class ServerPool:
+    """A fixed-size set of sessions to one MCP server."""
+
+    def __init__(self, client: MultiServerMCPClient, server_name: str, size: int):
+        self.server_name = server_name
+        self.slots = [PooledSession(client, server_name) for _ in range(max(1, size))]
+        self._idle: asyncio.Queue[PooledSession] = asyncio.Queue()
+        for slot in self.slots:
+            self._idle.put_nowait(slot)
+
+    @property
+    def size(self) -> int:
+        return len(self.slots)
+
+    async def start(self):
+        await asyncio.gather(*(slot.start() for slot in self.slots if not slot.alive))
+
+    async def close(self):
+        await asyncio.gather(*(slot.stop() for slot in self.slots))
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledSession]:
+        """Check out an idle session, (re)starting it first if its server is not running."""
+        slot = await self._idle.get()
+        try:
+            slot.spawned_on_checkout = not slot.alive
+            if slot.spawned_on_checkout:
+                await slot.restart()
+            yield slot
+        except BaseException as e:
+            if _is_transport_error(e):
+                print(f"MCP session for '{self.server_name}' failed, restarting on next use:", e)
+                await slot.stop()
+            raise
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def health_check(self):
+        """Ping every idle session and restart the ones that do not answer."""
+        idle = []
+        while not self._idle.empty():
+            idle.append(self._idle.get_nowait())
+
+        async def check(slot: PooledSession):
+            try:
+                if slot.alive:
+                    await asyncio.wait_for(slot.session.send_ping(), timeout=HEALTH_CHECK_TIMEOUT)
+                elif slot.started:
+                    await slot.restart()
+            except Exception as e:
+                print(f"MCP health check failed for '{self.server_name}', restarting:", e)
+                await slot.stop()
+                try:
+                    await slot.start()
+                except Exception as restart_error:
+                    print(f"Could not restart MCP server '{self.server_name}':", restart_error)
+            finally:
+                self._idle.put_nowait(slot)
+
+        await asyncio.gather(*(check(slot) for slot in idle))
+
+
+class MCPSessionPool:
+    """
+    Per-server pools of long-lived MCP sessions, shared by every graph built
+    from `get_tools()`.
+
+    Usage:
+        async with MCPSessionPool(mcp_config, lazy=True) as pool:
+            graph = build_agent_graph(tools=await pool.load_tools())
+    """
+
+    def __init__(
+        self,
+        connections: dict[str, dict[str, Any]],
+        default_pool_size: int = DEFAULT_POOL_SIZE,
+        health_check_interval: float = HEALTH_CHECK_INTERVAL,
+        lazy: bool = False,
+        snapshot_path: str = DEFAULT_SNAPSHOT_FILE,
+    ):
+        self.connections = session_connections(connections)
+        self.client = MultiServerMCPClient(connections=self.connections)
+        self.servers = {
+            name: ServerPool(self.client, name, int(connection.get("pool_size", default_pool_size)))
+            for name, connection in connections.items()
+        }
+        self.health_check_interval = health_check_interval
+        self.lazy = lazy
+        self.snapshot_path = snapshot_path
+        self._health_task: asyncio.Task | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "MCPSessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def start(self):
+        """Open every session of every server (unless lazy) and start the health checker."""
+        if not self.lazy:
+            await asyncio.gather(*(server.start() for server in self.servers.values()))
+        self._start_health_checks()
+
+    async def close(self):
+        for task in (self._refresh_task, self._health_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.wait([task])
+        self._refresh_task = self._health_task = None
+        await asyncio.gather(*(server.close() for server in self.servers.values()))
+
+    def _start_health_checks(self):
+        if self._health_task is None and self.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_check_loop(), name="mcp-health-check")
+
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await asyncio.gather(*(server.health_check() for server in self.servers.values()))
+
+    def _server(self, server_name: str) -> ServerPool:
+        if server_name not in self.servers:
+            raise ValueError(
+                f"Couldn't find a server with name '{server_name}', expected one of '{list(self.servers)}'"
+            )
+        return self.servers[server_name]
+
+    @asynccontextmanager
+    async def session(self, server_name: str) -> AsyncIterator[ClientSession]:
+        """Borrow an initialised session to `server_name` for the duration of the block."""
+        async with self._server(server_name).acquire() as slot:
+            yield slot.session
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments: dict[str, Any]) -> CallToolResult:
+        if not TELEMETRY:
+            return await self._call_tool(server_name, tool_name, arguments)
+
+        start = time.perf_counter()
+        status = "error"
+        with tracer.span("mcp.call_tool", server=server_name, tool=tool_name) as span:
+            try:
+                result = await self._call_tool(server_name, tool_name, arguments, span)
+                status = "tool_error" if result.isError else "ok"
+                bytes_out = len(result.model_dump_json())
+                MCP_BYTES.inc(bytes_out, server=server_name, direction="out")
+                span.set_attribute("bytes_out", bytes_out)
+                return result
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            finally:
+                span.set_attribute("status", status)
+                MCP_CALLS.inc(server=server_name, tool=tool_name, status=status)
+                MCP_SECONDS.observe(time.perf_counter() - start, server=server_name, tool=tool_name)
+
+    async def _call_tool(self, server_name: str, tool_name: str, arguments: dict[str, Any], span=NOOP_SPAN) -> CallToolResult:
+        async with self._server(server_name).acquire() as slot:
+            if TELEMETRY:
+                bytes_in = len(json.dumps(arguments, default=str))
+                MCP_BYTES.inc(bytes_in, server=server_name, direction="in")
+                span.set_attribute("bytes_in", bytes_in)
+                span.set_attribute("session", "spawned" if slot.spawned_on_checkout else "reused")
+            session = slot.session
+            # The id the session assigns to the next request. ClientSession has no public accessor, so
+            # this reads a private attribute; without it the call still works, it just can't be cancelled
+            request_id = getattr(session, "_request_id", None)
+            try:
+                return await session.call_tool(tool_name, arguments)
+            except asyncio.CancelledError:
+                # Tell the server to stop the tool instead of letting it run to completion
+                if isinstance(request_id, int):
+                    await _notify_cancelled(session, request_id)
+                raise
+
+    async def list_tools(self, server_name: str) -> list[MCPTool]:
+        async with self.session(server_name) as session:
+            return await _list_all_tools(session)
+
+    def make_tool(self, server_name: str, tool: MCPTool) -> BaseTool:
+        """Wrap an MCP tool as a LangChain tool whose calls go through the pool."""
+
+        async def call_tool(**arguments: Any):
+            result = await self.call_tool(server_name, tool.name, arguments)
+            return _convert_call_tool_result(result)
+
+        metadata = tool.annotations.model_dump() if tool.annotations else {}
+        metadata["mcp_server"] = server_name
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.inputSchema,
+            coroutine=call_tool,
+            response_format="content_and_artifact",
+            metadata=metadata,
+        )
+
+    def make_tools(self, tools_by_server: dict[str, list[MCPTool]]) -> list[BaseTool]:
+        return [
+            self.make_tool(name, tool)
+            for name, server_tools in tools_by_server.items()
+            for tool in server_tools
+        ]
+
+    async def list_server_tools(self, server_name: str | None = None) -> dict[str, list[MCPTool]]:
+        names = [server_name] if server_name else list(self.servers)
+        listed = await asyncio.gather(*(self.list_tools(name) for name in names))
+        return dict(zip(names, listed))
+
+    async def get_tools(self, server_name: str | None = None) -> list[BaseTool]:
+        """List tools from one or all servers, bound to the pooled sessions."""
+        return self.make_tools(await self.list_server_tools(server_name))
+
+    # -------------------------------
+    # Tool-schema snapshot
+    # -------------------------------
+    def tools_from_snapshot(self) -> list[BaseTool] | None:
+        """Tools from the on-disk snapshot without connecting to any server (None if stale/missing)."""
+        tools_by_server = load_snapshot(self.connections, self.snapshot_path)
+        if tools_by_server is None:
+            return None
+        return self.make_tools(tools_by_server)
+
+    async def refresh_snapshot(self) -> list[BaseTool]:
+        """List the tools of every server and persist them as the new snapshot."""
+        tools_by_server = await self.list_server_tools()
+        try:
+            save_snapshot(self.connections, tools_by_server, self.snapshot_path)
+        except OSError as e:
+            print("Could not write MCP tool snapshot:", e)
+        return self.make_tools(tools_by_server)
+
+    def refresh_in_background(
+        self,
+        on_change: Callable[[list[BaseTool]], Any] | None = None,
+        delay: float = SNAPSHOT_REFRESH_DELAY,
+    ):
+        """Re-list the tools after `delay` seconds; call `on_change` if the schemas differ from the snapshot."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        async def refresh():
+            await asyncio.sleep(delay)
+            before = load_snapshot(self.connections, self.snapshot_path)
+            try:
+                tools = await self.refresh_snapshot()
+            except Exception as e:
+                print("Background MCP tool snapshot refresh failed:", e)
+                return
+            if on_change is not None and load_snapshot(self.connections, self.snapshot_path) != before:
+                on_change(tools)
+
+        self._refresh_task = asyncio.create_task(refresh(), name="mcp-snapshot-refresh")
+
+    async def load_tools(self) -> list[BaseTool]:
+        """
+        Tools for building the graph: from the snapshot when it matches the
+        current config (refreshed in the background), otherwise discovered
+        from the servers and written to a new snapshot.
+        """
+        tools = self.tools_from_snapshot()
+        if tools is None:
+            return await self.refresh_snapshot()
+        self.refresh_in_background()
+        return tools
@@ -0,0 +1,76 @@
+"""
+On-disk snapshot of the MCP tool schemas.
+
+Listing tools means starting every server in mcp_server.json (including the
+`npx` ones), which dominates startup time. The snapshot stores the listed tool
+schemas per server, keyed on a hash of the server config, so the next start
+can build the graph straight from disk and only connect to a server when one
+of its tools is actually called.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any
+
+from mcp.types import Tool as MCPTool
+
+
+# Config
+SNAPSHOT_VERSION = 1
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_SNAPSHOT_FILE = os.getenv(
+    "MCP_TOOL_SNAPSHOT", os.path.join(PROJECT_ROOT, "src/config/.tool_snapshot.json")
+)
+
+
+def config_hash(connections: dict[str, dict[str, Any]]) -> str:
+    """Stable hash of the server connection config; any change invalidates the snapshot."""
+    canonical = json.dumps(connections, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def load_snapshot(
+    connections: dict[str, dict[str, Any]], path: str = DEFAULT_SNAPSHOT_FILE
+) -> dict[str, list[MCPTool]] | None:
+    """Tools per server from the snapshot, or None when it is missing, stale or unreadable."""
+    try:
+        with open(path, "r") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("config_hash") != config_hash(connections):
+        return None
+    if set(snapshot.get("servers", {})) != set(connections):
+        return None
+
+    try:
+        return {
+            server: [MCPTool.model_validate(tool) for tool in tools]
+            for server, tools in snapshot["servers"].items()
+        }
+    except ValueError:
+        return None
+
+
+def save_snapshot(
+    connections: dict[str, dict[str, Any]],
+    tools_by_server: dict[str, list[MCPTool]],
+    path: str = DEFAULT_SNAPSHOT_FILE,
+):
+    """Atomically write the snapshot (write to a temp file, then rename over the old one)."""
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "config_hash": config_hash(connections),
+        "created_at": time.time(),
+        "servers": {
+            server: [tool.model_dump(mode="json", exclude_none=True) for tool in tools]
+            for server, tools in tools_by_server.items()
+        },
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,322 @@
+"""
+Small/large model cascade for the assistant node.
+
+Most `LLMAgent` steps are cheap: pick a tool for "add 23 and 45", or turn a
+one-line tool result into a sentence. With LLM_CASCADE on,
+`CascadeChatModel` sends them to a fast small model (LLM_CASCADE_SMALL_MODEL
+tier) and uses the large model only when it is likely needed:
+
+* before the call (straight to large): long conversations
+  (LLM_CASCADE_MAX_CONTEXT_TOKENS), long user requests
+  (LLM_CASCADE_MAX_QUERY_TOKENS), many tool results to combine in the
+  current turn (LLM_CASCADE_MAX_TOOL_RESULTS) or a failed tool call to
+  recover from,
+* after the small model answered (escalate): unparsable tool calls, calls
+  to unknown tools or with arguments that don't match the tool schema, an
+  empty answer, an error, or - opt-in, for a small tier whose provider
+  returns logprobs - a mean token probability under
+  LLM_CASCADE_MIN_CONFIDENCE.
+
+The small model's streamed text is passed on as it arrives; from the first
+tool-call chunk on, the rest is held back until the whole answer is
+validated, so rejected tool calls never reach the client. With a confidence
+threshold set every small answer is held back, since the score needs all of
+it. Per-tier calls,
+latency and token counts are exported as metrics and returned by `stats()`.
+"""
+
+import math
+import os
+import time
+from functools import reduce
+from operator import add
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.constants import TAG_NOSTREAM
+from pydantic import PrivateAttr
+
+from src.graph.history import _load_token_counter, message_text
+from src.telemetry import REGISTRY
+
+
+# Config
+LLM_CASCADE = os.getenv("LLM_CASCADE", "false").lower() == "true"
+GROQ_SMALL_MODEL = os.getenv("GROQ_SMALL_LLM_MODEL", "llama-3.1-8b-instant")
+GROQ_LARGE_MODEL = os.getenv("GROQ_LARGE_LLM_MODEL", "llama-3.3-70b-versatile")
+OLLAMA_SMALL_MODEL = os.getenv("OLLAMA_SMALL_LLM_MODEL", "llama3.2:3b")
+OLLAMA_LARGE_MODEL = os.getenv("OLLAMA_LARGE_LLM_MODEL", "llama3.1")
+LLM_CASCADE_MAX_CONTEXT_TOKENS = int(os.getenv("LLM_CASCADE_MAX_CONTEXT_TOKENS", "3000"))
+LLM_CASCADE_MAX_QUERY_TOKENS = int(os.getenv("LLM_CASCADE_MAX_QUERY_TOKENS", "300"))
+LLM_CASCADE_MAX_TOOL_RESULTS = int(os.getenv("LLM_CASCADE_MAX_TOOL_RESULTS", "4"))
+# Opt-in: needs a provider that returns logprobs, and small answers are then buffered whole (no streaming)
+LLM_CASCADE_MIN_CONFIDENCE = float(os.getenv("LLM_CASCADE_MIN_CONFIDENCE", "0"))
+
+CASCADE_STEPS = REGISTRY.counter(
+    "llm_cascade_steps_total", "Assistant steps by the tier that answered and why", ("tier", "reason")
+)
+CASCADE_SECONDS = REGISTRY.histogram("llm_cascade_call_seconds", "LLM call time per cascade tier", ("tier",))
+CASCADE_TOKENS = REGISTRY.counter("llm_cascade_tokens_total", "Tokens per cascade tier", ("tier", "kind"))
+
+_JSON_TYPES = {
+    "integer": int, "number": (int, float), "string": str, "boolean": bool, "array": list, "object": dict,
+}
+
+
+def schema_error(schema: dict, args: Any) -> str | None:
+    """Why `args` does not fit a tool's JSON schema (required keys and top-level types), or None."""
+    if not isinstance(args, dict):
+        return "arguments are not an object"
+    properties = schema.get("properties", {})
+    missing = [name for name in schema.get("required", []) if name not in args]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    for name, value in args.items():
+        if name not in properties:
+            if schema.get("additionalProperties") is False:
+                return f"unknown argument {name}"
+            continue
+        expected = _JSON_TYPES.get(properties[name].get("type"))
+        # bool is an int in Python, but not a JSON integer/number
+        if expected and (not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool)):
+            return f"{name} is not a {properties[name]['type']}"
+    return None
+
+
+def confidence(message: AIMessage) -> float | None:
+    """Mean token probability from OpenAI-style logprobs in the response metadata, if the provider sent them."""
+    logprobs = (message.response_metadata or {}).get("logprobs") or {}
+    tokens = logprobs.get("content") if isinstance(logprobs, dict) else None
+    if not tokens:
+        return None
+    return sum(math.exp(token["logprob"]) for token in tokens) / len(tokens)
+
+
+class TierStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, tier: str, seconds: float, message: AIMessage | None):
+        self.calls += 1
+        self.seconds += seconds
+        CASCADE_SECONDS.observe(seconds, tier=tier)
+        usage = getattr(message, "usage_metadata", None) or {}
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.output_tokens += usage.get("output_tokens", 0)
+        CASCADE_TOKENS.inc(usage.get("input_tokens", 0), tier=tier, kind="prompt")
+        CASCADE_TOKENS.inc(usage.get("output_tokens", 0), tier=tier, kind="completion")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "mean_s": self.seconds / self.calls if self.calls else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class CascadeChatModel(BaseChatModel):
+    """
+    Answers with `small` unless the request looks hard or the small answer
+    fails validation, then with `large`. `bind_tools` binds both tiers and
+    keeps the tool schemas for validating the small model's tool calls.
+    """
+
+    small: Runnable
+    large: Runnable
+    tool_schemas: dict[str, dict] = {}
+    max_context_tokens: int = LLM_CASCADE_MAX_CONTEXT_TOKENS
+    max_query_tokens: int = LLM_CASCADE_MAX_QUERY_TOKENS
+    max_tool_results: int = LLM_CASCADE_MAX_TOOL_RESULTS
+    min_confidence: float = LLM_CASCADE_MIN_CONFIDENCE
+    model_name: str = ""
+    _tiers: dict[str, TierStats] = PrivateAttr(default_factory=dict)
+    _reasons: dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any):
+        if not self.model_name:
+            names = [getattr(getattr(tier, "bound", tier), "model_name", None) or getattr(tier, "model", "?")
+                     for tier in (self.small, self.large)]
+            self.model_name = ">".join(str(name) for name in names)
+        self._tiers = {"small": TierStats(), "large": TierStats()}
+        self._reasons = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "cascade"
+
+    def bind_tools(self, tools, **kwargs) -> "CascadeChatModel":
+        schemas = {}
+        for tool in tools:
+            function = convert_to_openai_tool(tool)["function"]
+            schemas[function["name"]] = function.get("parameters", {})
+        return self.model_copy(update={
+            "small": self.small.bind_tools(tools, **kwargs),
+            "large": self.large.bind_tools(tools, **kwargs),
+            "tool_schemas": schemas,
+        })
+
+    def stats(self) -> dict[str, Any]:
+        return {**{tier: stats.snapshot() for tier, stats in self._tiers.items()}, "reasons": dict(self._reasons)}
+
+    def _count(self, tier: str, reason: str):
+        key = f"{tier}:{reason}"
+        self._reasons[key] = self._reasons.get(key, 0) + 1
+        CASCADE_STEPS.inc(tier=tier, reason=reason)
+
+    # -------------------------------
+    # Routing decisions
+    # -------------------------------
+    def needs_large(self, messages: List[BaseMessage]) -> str | None:
+        """Why this request should skip the small model, or None."""
+        count = _load_token_counter()
+        turn_start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        turn = messages[turn_start:]
+        tool_results = [m for m in turn if isinstance(m, ToolMessage)]
+        if any(m.status == "error" for m in tool_results):
+            return "tool_error"
+        if len(tool_results) > self.max_tool_results:
+            return "many_tool_results"
+        if turn and isinstance(turn[0], HumanMessage) and count(message_text(turn[0])) > self.max_query_tokens:
+            return "long_query"
+        conversation = [m for m in messages if m.type != "system"]
+        if sum(count(message_text(m)) for m in conversation) > self.max_context_tokens:
+            return "long_context"
+        return None
+
+    def rejects(self, message: AIMessage) -> str | None:
+        """Why the small model's answer should not be used, or None."""
+        if message.invalid_tool_calls:
+            return "invalid_tool_call"
+        for call in message.tool_calls:
+            if self.tool_schemas and call["name"] not in self.tool_schemas:
+                return "unknown_tool"
+            if call["name"] in self.tool_schemas and schema_error(self.tool_schemas[call["name"]], call["args"]):
+                return "bad_arguments"
+        if not message.tool_calls and not message_text(message).strip():
+            return "empty"
+        score = confidence(message)
+        if self.min_confidence and score is not None and score < self.min_confidence:
+            return "low_confidence"
+        return None
+
+    @staticmethod
+    def _config(tier: str) -> dict:
+        # Tier runs are tagged nostream: the cascade emits the chunks it keeps under its own run
+        return {"tags": [TAG_NOSTREAM], "run_name": f"cascade_{tier}"}
+
+    # -------------------------------
+    # Calls
+    # -------------------------------
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reason = self.needs_large(messages)
+        if reason is None:
+            start = time.perf_counter()
+            try:
+                message = await self.small.ainvoke(messages, self._config("small"), stop=stop, **kwargs)
+                reason = self.rejects(message)
+            except Exception as e:
+                message, reason = None, "error"
+                print("Small model failed, escalating:", repr(e))
+            self._tiers["small"].record("small", time.perf_counter() - start, message)
+            if reason is None:
+                self._count("small", "ok")
+                return ChatResult(generations=[ChatGeneration(message=message)])
+        self._count("large", reason)
+        start = time.perf_counter()
+        message = await self.large.ainvoke(messages, self._config("large"), stop=stop, **kwargs)
+        self._tiers["large"].record("large", time.perf_counter() - start, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async def emit(chunk: AIMessageChunk) -> ChatGenerationChunk:
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(generation.text, chunk=generation)
+            return generation
+
+        reason = self.needs_large(messages)
+        if reason is None:
+            start = time.perf_counter()
+            held: list[AIMessageChunk] = []     # chunks not sent to the client yet
+            message = None                      # the small answer so far
+            streamed = False
+            try:
+                async for chunk in self.small.astream(messages, self._config("small"), stop=stop, **kwargs):
+                    message = chunk if message is None else message + chunk
+                    held.append(chunk)
+                    # Text goes straight through until a tool call starts; from then on the rest waits for
+                    # validation. With a confidence gate everything waits, the score needs the whole answer.
+                    if chunk.content and not message.tool_call_chunks and not self.min_confidence:
+                        streamed = True
+                        for kept in held:
+                            yield await emit(kept)
+                        held.clear()
+                message = message if message is not None else AIMessageChunk(content="")
+                reason = self.rejects(message)
+            except Exception as e:
+                if streamed:
+                    raise
+                message, reason = None, "error"
+                print("Small model failed, escalating:", repr(e))
+            self._tiers["small"].record("small", time.perf_counter() - start, message)
+            if reason is None:
+                self._count("small", "ok")
+                for kept in held:
+                    yield await emit(kept)
+                return
+            # Text already streamed before a rejected tool call stays, as the preamble of the large answer
+
+        self._count("large", reason)
+        start = time.perf_counter()
+        chunks = []
+        async for chunk in self.large.astream(messages, self._config("large"), stop=stop, **kwargs):
+            chunks.append(chunk)
+            yield await emit(chunk)
+        self._tiers["large"].record("large", time.perf_counter() - start, reduce(add, chunks) if chunks else None)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reason = self.needs_large(messages)
+        if reason is None:
+            start = time.perf_counter()
+            try:
+                message = self.small.invoke(messages, self._config("small"), stop=stop, **kwargs)
+                reason = self.rejects(message)
+            except Exception as e:
+                message, reason = None, "error"
+                print("Small model failed, escalating:", repr(e))
+            self._tiers["small"].record("small", time.perf_counter() - start, message)
+            if reason is None:
+                self._count("small", "ok")
+                return ChatResult(generations=[ChatGeneration(message=message)])
+        self._count("large", reason)
+        start = time.perf_counter()
+        message = self.large.invoke(messages, self._config("large"), stop=stop, **kwargs)
+        self._tiers["large"].record("large", time.perf_counter() - start, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
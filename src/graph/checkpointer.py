@@ -0,0 +1,488 @@
+"""
+Checkpointer backends for the agent graph.
+
+`MemorySaver` keeps every A2A thread in process memory forever and loses them
+on restart. `SQLiteCheckpointSaver` stores checkpoints in a local SQLite
+database in WAL mode, which several uvicorn worker processes can share, and
+keeps it bounded:
+
+* batched writes - checkpoints and task writes are buffered and committed in
+  one transaction per batch (CHECKPOINT_BATCH_SIZE / CHECKPOINT_FLUSH_INTERVAL),
+* eviction - threads idle for longer than CHECKPOINT_IDLE_TTL seconds, or
+  beyond the CHECKPOINT_MAX_THREADS most recently used ones, are deleted,
+* compaction - only the CHECKPOINT_KEEP_LAST newest checkpoints per thread
+  are kept.
+
+Pick the backend with CHECKPOINTER=memory|sqlite (see get_checkpointer()).
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+
+# Config
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CHECKPOINTER = os.getenv("CHECKPOINTER", "memory")   # "memory" or "sqlite"
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", os.path.join(PROJECT_ROOT, "checkpoints.sqlite"))
+CHECKPOINT_BATCH_SIZE = int(os.getenv("CHECKPOINT_BATCH_SIZE", "1"))            # 1 = write-through
+CHECKPOINT_FLUSH_INTERVAL = float(os.getenv("CHECKPOINT_FLUSH_INTERVAL", "0.05"))
+CHECKPOINT_IDLE_TTL = float(os.getenv("CHECKPOINT_IDLE_TTL", str(7 * 24 * 3600)))  # 0 = never expire
+CHECKPOINT_MAX_THREADS = int(os.getenv("CHECKPOINT_MAX_THREADS", "0"))           # 0 = unlimited
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))              # 0 = keep all
+CHECKPOINT_MAINTENANCE_EVERY = int(os.getenv("CHECKPOINT_MAINTENANCE_EVERY", "1000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_last_access ON threads (last_access);
+"""
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpointer backed by an embedded SQLite database.
+
+    Safe to share between processes: the database runs in WAL mode, every
+    batch is committed with BEGIN IMMEDIATE and lock waits are bounded by a
+    busy timeout. Within a process one connection is shared behind a lock; the
+    async methods run the SQLite work in a worker thread so the event loop is
+    never blocked on disk or on another process' lock.
+
+    Args:
+        path: Database file.
+        batch_size: Buffered put/put_writes calls that trigger a commit. 1 commits every
+            put/put_writes immediately; larger values trade up to
+            `flush_interval` seconds of visibility to other processes for
+            fewer fsyncs. Reads in this process always flush first.
+        flush_interval: Max seconds a buffered write waits before commit.
+        idle_ttl / max_threads / keep_last: Eviction and compaction policy,
+            applied every `maintenance_every` checkpoints and by maintain().
+    """
+
+    def __init__(
+        self,
+        path: str = CHECKPOINT_DB,
+        *,
+        batch_size: int = CHECKPOINT_BATCH_SIZE,
+        flush_interval: float = CHECKPOINT_FLUSH_INTERVAL,
+        idle_ttl: float = CHECKPOINT_IDLE_TTL,
+        max_threads: int = CHECKPOINT_MAX_THREADS,
+        keep_last: int = CHECKPOINT_KEEP_LAST,
+        maintenance_every: int = CHECKPOINT_MAINTENANCE_EVERY,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.idle_ttl = idle_ttl
+        self.max_threads = max_threads
+        self.keep_last = keep_last
+        self.maintenance_every = maintenance_every
+
+        self._lock = threading.RLock()
+        self._pending: list[list[tuple[str, list[tuple]]]] = []   # one entry per put / put_writes
+        self._flush_timer: threading.Timer | None = None
+        self._puts_since_maintenance = 0
+        self._touched_threads: set[str] = set()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.executescript(SCHEMA)
+
+    # -------------------------------
+    # Connection / batching helpers
+    # -------------------------------
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _queue(self, *statements: tuple[str, list[tuple]]):
+        with self._lock:
+            self._pending.append(list(statements))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._flush_timer is None and self.flush_interval > 0:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Commit every buffered write in a single transaction."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            with self._transaction() as conn:
+                for statements in pending:
+                    for sql, rows in statements:
+                        conn.executemany(sql, rows)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.conn.close()
+
+    # -------------------------------
+    # Reads
+    # -------------------------------
+    def _row_to_tuple(self, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            self.flush()
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._row_to_tuple(row) if row else None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        where, params = [], []
+        if config is not None:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+
+        sql = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+        )
+        with self._lock:
+            self.flush()
+            rows = self.conn.execute(sql, params).fetchall()
+            results = []
+            for row in rows:
+                item = self._row_to_tuple(row)
+                if filter and any(item.metadata.get(key) != value for key, value in filter.items()):
+                    continue
+                results.append(item)
+                if limit is not None and len(results) >= limit:
+                    break
+        yield from results
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            self._queue(
+                ("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [(
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized,
+                    metadata_type,
+                    serialized_metadata,
+                )]),
+                ("INSERT OR REPLACE INTO threads VALUES (?, ?)", [(thread_id, time.time())]),
+            )
+            self._puts_since_maintenance += 1
+            self._touched_threads.add(thread_id)
+            if self.maintenance_every and self._puts_since_maintenance >= self.maintenance_every:
+                self.maintain()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Regular writes keep the first value written for an index, special ones (errors, interrupts) the last
+        replace, keep = [], []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, serialized = self.serde.dumps_typed(value)
+            row = (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx, channel, type_, serialized, task_path)
+            (replace if write_idx < 0 else keep).append(row)
+        self._queue(
+            ("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", keep),
+            ("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", replace),
+        )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self.flush()
+            with self._transaction() as conn:
+                self._delete_threads(conn, [thread_id])
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # -------------------------------
+    # Eviction and compaction
+    # -------------------------------
+    @staticmethod
+    def _delete_threads(conn: sqlite3.Connection, thread_ids: Sequence[str]):
+        rows = [(thread_id,) for thread_id in thread_ids]
+        conn.executemany("DELETE FROM writes WHERE thread_id = ?", rows)
+        conn.executemany("DELETE FROM checkpoints WHERE thread_id = ?", rows)
+        conn.executemany("DELETE FROM threads WHERE thread_id = ?", rows)
+
+    def evict(self, idle_ttl: float | None = None, max_threads: int | None = None) -> int:
+        """Delete threads idle for longer than `idle_ttl` and all but the `max_threads` most recent ones."""
+        idle_ttl = self.idle_ttl if idle_ttl is None else idle_ttl
+        max_threads = self.max_threads if max_threads is None else max_threads
+        with self._lock:
+            self.flush()
+            with self._transaction() as conn:
+                expired = []
+                if idle_ttl > 0:
+                    expired += [row[0] for row in conn.execute(
+                        "SELECT thread_id FROM threads WHERE last_access < ?", (time.time() - idle_ttl,)
+                    )]
+                if max_threads > 0:
+                    expired += [row[0] for row in conn.execute(
+                        "SELECT thread_id FROM threads ORDER BY last_access DESC LIMIT -1 OFFSET ?", (max_threads,)
+                    )]
+                expired = list(dict.fromkeys(expired))
+                self._delete_threads(conn, expired)
+        return len(expired)
+
+    def compact(self, keep_last: int | None = None, thread_ids: Sequence[str] | None = None) -> int:
+        """Keep only the `keep_last` newest checkpoints (and their writes) of the given threads (default: all)."""
+        keep_last = self.keep_last if keep_last is None else keep_last
+        if keep_last <= 0:
+            return 0
+        scope, params = "", []
+        if thread_ids is not None:
+            if not thread_ids:
+                return 0
+            scope = f" WHERE thread_id IN ({', '.join('?' * len(thread_ids))})"
+            params = list(thread_ids)
+
+        with self._lock:
+            self.flush()
+            with self._transaction() as conn:
+                doomed = conn.execute(
+                    "SELECT thread_id, checkpoint_ns, checkpoint_id FROM ("
+                    " SELECT thread_id, checkpoint_ns, checkpoint_id, ROW_NUMBER() OVER ("
+                    "  PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS rn"
+                    f" FROM checkpoints{scope}) WHERE rn > ?",
+                    params + [keep_last],
+                ).fetchall()
+                conn.executemany(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", doomed
+                )
+                conn.executemany(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", doomed
+                )
+            self.conn.execute("PRAGMA incremental_vacuum")
+        return len(doomed)
+
+    def maintain(self) -> dict[str, int]:
+        """Run eviction, compact the threads written since the last run, then fold the WAL back into the database."""
+        with self._lock:
+            touched, self._touched_threads = self._touched_threads, set()
+            self._puts_since_maintenance = 0
+            result = {
+                "evicted_threads": self.evict(),
+                "compacted_checkpoints": self.compact(thread_ids=sorted(touched)),
+            }
+            self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return result
+
+    # -------------------------------
+    # Async API (SQLite work runs in a worker thread)
+    # -------------------------------
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    def _buffers_only(self) -> bool:
+        """True when the next put/put_writes only appends to the buffer (no disk I/O, no lock wait)."""
+        return (
+            len(self._pending) + 1 < self.batch_size
+            and self._puts_since_maintenance + 1 < (self.maintenance_every or float("inf"))
+        )
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        if self._buffers_only():
+            return self.put(config, checkpoint, metadata, new_versions)
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        if self._buffers_only():
+            return self.put_writes(config, writes, task_id, task_path)
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Factory to create the graph checkpointer based on the CHECKPOINTER setting."""
+    if CHECKPOINTER.lower() == "sqlite":
+        return SQLiteCheckpointSaver(CHECKPOINT_DB)
+    return MemorySaver()
@@ -0,0 +1,138 @@
+"""
+Deterministic fast path for structured tool invocations.
+
+A2A clients (see `send_langgraph_message` in src/a2a_client.py) often send a
+tool call rather than a question:
+
+    {"name": "add", "parameters": {"a": "23", "b": "45"}}
+
+Sending that through the graph costs one LLM round-trip to pick the tool and
+another to phrase its result. `DirectToolRouter` recognises such payloads
+before the graph runs, checks them against the tool schemas the graph was
+built from (the pool's cached MCP schemas), coerces string values to the
+declared number/boolean types and calls the tool over the session pool,
+through the same `ConcurrentToolNode` path the graph uses (per-call timeout,
+per-server concurrency cap). The raw tool result is the reply.
+
+Anything else falls through to the graph unchanged: plain text, JSON that
+isn't exactly a tool call, names that aren't a tool ("weather alert") and
+arguments that still don't fit the schema, so the LLM can interpret them as
+before. Disable with A2A_DIRECT_TOOL_CALLS=false.
+"""
+
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, List
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.graph.cascade import schema_error
+from src.graph.history import message_text
+from src.graph.tool_executor import ConcurrentToolNode
+from src.telemetry import REGISTRY
+
+
+# Config
+DIRECT_TOOL_CALLS = os.getenv("A2A_DIRECT_TOOL_CALLS", "true").lower() == "true"
+ARGUMENT_KEYS = ("parameters", "arguments", "args")
+
+DIRECT_CALLS = REGISTRY.counter("direct_tool_calls_total", "Tool calls answered without the LLM", ("tool", "status"))
+DIRECT_CALL_SECONDS = REGISTRY.histogram("direct_tool_call_seconds", "Direct tool call duration", ("tool",))
+
+
+@dataclass
+class DirectCall:
+    name: str
+    args: dict[str, Any]
+    id: str
+
+    def tool_call(self) -> dict[str, Any]:
+        return {"name": self.name, "args": self.args, "id": self.id, "type": "tool_call"}
+
+
+def parse_payload(text: str) -> tuple[str, dict[str, Any]] | None:
+    """(name, arguments) of a `{"name": ..., "parameters": {...}}` payload, or None for anything else."""
+    text = text.strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get("name"), str):
+        return None
+    keys = set(payload) - {"name"}
+    if len(keys) > 1 or not keys <= set(ARGUMENT_KEYS):
+        return None
+    args = payload.get(keys.pop(), {}) if keys else {}
+    return (payload["name"], args) if isinstance(args, dict) else None
+
+
+def _coerce(value: Any, kind: str | None) -> Any:
+    """`value` converted to the JSON schema `kind` when it is a string spelling of it; unchanged otherwise."""
+    if not isinstance(value, str):
+        return value
+    try:
+        if kind == "integer":
+            return int(value)
+        if kind == "number":
+            number = float(value)
+            return int(number) if number.is_integer() and "." not in value else number
+    except ValueError:
+        return value
+    if kind == "boolean" and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+def coerce_args(schema: dict, args: dict[str, Any]) -> dict[str, Any]:
+    properties = schema.get("properties", {})
+    return {name: _coerce(value, properties.get(name, {}).get("type")) for name, value in args.items()}
+
+
+class DirectToolRouter:
+    """
+    Answers structured tool-call payloads by calling the tool directly.
+
+    Args:
+        tools: The tools the graph was built with.
+        tool_node: Runs the calls; pass the graph's tools node so direct calls
+            count against the same per-server limits. Results are not
+            capped by its output limiter: the client gets the whole result.
+    """
+
+    def __init__(self, tools: List[BaseTool], tool_node: ConcurrentToolNode | None = None):
+        self.schemas = {tool.name: convert_to_openai_tool(tool)["function"].get("parameters", {}) for tool in tools}
+        self.tool_node = tool_node or ConcurrentToolNode(tools)
+
+    def match(self, text: str) -> DirectCall | None:
+        """The validated call for a direct tool-call payload, or None if the graph should handle `text`."""
+        parsed = parse_payload(text)
+        if parsed is None or parsed[0] not in self.schemas:
+            return None
+        name, args = parsed
+        schema = self.schemas[name]
+        args = coerce_args(schema, args)
+        error = schema_error(schema, args)
+        if error:
+            print(f"Direct call to {name} does not fit its schema ({error}), using the graph")
+            return None
+        return DirectCall(name=name, args=args, id=f"call_{uuid.uuid4().hex[:12]}")
+
+    async def run(self, call: DirectCall) -> ToolMessage:
+        """Call the tool; failures come back as an error ToolMessage, like in the graph."""
+        start = time.perf_counter()
+        result = await self.tool_node.run_tool_call(call.tool_call(), limit=False)
+        DIRECT_CALLS.inc(tool=call.name, status=result.status)
+        DIRECT_CALL_SECONDS.observe(time.perf_counter() - start, tool=call.name)
+        return result
+
+    @staticmethod
+    def reply(result: ToolMessage) -> str:
+        text = message_text(result)
+        return f"❌ {text}" if result.status == "error" else text
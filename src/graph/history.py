@@ -0,0 +1,189 @@
+"""
+Token-budgeted conversation history for the LLM prompt.
+
+The checkpointer keeps the whole thread, so without trimming every `LLMAgent`
+step resends all earlier turns, including bulky Playwright/Airbnb tool output.
+`HistoryTrimmer` builds the message list actually sent to the LLM:
+
+* tool results larger than TOOL_MESSAGE_TOKEN_CAP are cut down to their head,
+* the newest whole turns that fit in HISTORY_TOKEN_BUDGET are kept verbatim,
+* older turns are replaced by one short extractive summary message.
+
+Token counts, shortened tool messages and per-message summary lines are
+cached by message id, so each message is measured and summarised once no
+matter how long the thread grows. The state itself is never modified; the
+full history stays in the checkpointer.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+
+# Config
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))        # 0 disables trimming
+TOOL_MESSAGE_TOKEN_CAP = int(os.getenv("TOOL_MESSAGE_TOKEN_CAP", "1000"))
+HISTORY_SUMMARY_TOKEN_CAP = int(os.getenv("HISTORY_SUMMARY_TOKEN_CAP", "400"))
+CACHE_MAX_ENTRIES = 20000
+MESSAGE_OVERHEAD_TOKENS = 4     # role / separators added by chat templates
+SUMMARY_LINE_CHARS = 160
+
+
+@lru_cache(maxsize=1)
+def _load_token_counter() -> Callable[[str], int]:
+    """
+    tiktoken's cl100k_base when it is installed and its vocabulary can be loaded, else ~4 chars per token.
+    Loaded once per process: a failed vocabulary download is not retried on every graph build.
+    """
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: len(text) // 4 + 1
+
+
+class _LRU(OrderedDict):
+    def get_or_set(self, key, factory):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = self[key] = factory()
+        if len(self) > CACHE_MAX_ENTRIES:
+            self.popitem(last=False)
+        return value
+
+
+def message_text(message: BaseMessage) -> str:
+    """Plain text of a message (content blocks joined, tool calls rendered as JSON)."""
+    content = message.content
+    if isinstance(content, list):
+        content = "\n".join(
+            block if isinstance(block, str) else str(block.get("text", "")) for block in content
+        )
+    if isinstance(message, AIMessage) and message.tool_calls:
+        calls = json.dumps([{"name": call["name"], "args": call["args"]} for call in message.tool_calls])
+        content = f"{content}\n{calls}" if content else calls
+    return content
+
+
+class HistoryTrimmer:
+    """
+    Keeps the prompt history under a token budget.
+
+    Args:
+        budget: Max tokens of history (excluding the system prompt) sent to the LLM.
+        tool_message_cap: Max tokens of a single tool result.
+        summary_cap: Max tokens of the summary that replaces dropped turns.
+    """
+
+    def __init__(
+        self,
+        budget: int = HISTORY_TOKEN_BUDGET,
+        tool_message_cap: int = TOOL_MESSAGE_TOKEN_CAP,
+        summary_cap: int = HISTORY_SUMMARY_TOKEN_CAP,
+    ):
+        self.budget = budget
+        self.tool_message_cap = tool_message_cap
+        self.summary_cap = summary_cap
+        self.count_text_tokens = _load_token_counter()
+        self._tokens = _LRU()
+        self._shrunk = _LRU()
+        self._summary_lines = _LRU()
+
+    @staticmethod
+    def _key(message: BaseMessage) -> str:
+        if message.id:
+            return message.id
+        return f"{message.type}:{hash(message_text(message))}"
+
+    def count_tokens(self, message: BaseMessage) -> int:
+        # The length tells a shortened ToolMessage apart from the original with the same id
+        key = (self._key(message), len(message.content))
+        return self._tokens.get_or_set(
+            key, lambda: self.count_text_tokens(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+        )
+
+    def shrink_tool_message(self, message: ToolMessage) -> ToolMessage:
+        """Cut an oversized tool result down to about `tool_message_cap` tokens."""
+        if self.count_tokens(message) <= self.tool_message_cap:
+            return message
+
+        def shrink() -> ToolMessage:
+            text = message_text(message)
+            tokens = self.count_tokens(message)
+            keep_chars = int(len(text) * self.tool_message_cap / tokens)
+            content = (
+                f"{text[:keep_chars]}\n"
+                f"...[tool output truncated: {tokens - self.tool_message_cap} of {tokens} tokens omitted]"
+            )
+            return message.model_copy(update={"content": content})
+
+        return self._shrunk.get_or_set(self._key(message), shrink)
+
+    def _summary_line(self, message: BaseMessage) -> str:
+        def line() -> str:
+            text = " ".join(message_text(message).split())
+            if len(text) > SUMMARY_LINE_CHARS:
+                text = text[:SUMMARY_LINE_CHARS] + "..."
+            if isinstance(message, HumanMessage):
+                return f"- User: {text}"
+            if isinstance(message, ToolMessage):
+                return f"- Tool {message.name or ''} returned: {text}"
+            if isinstance(message, AIMessage) and message.tool_calls:
+                names = ", ".join(call["name"] for call in message.tool_calls)
+                return f"- Assistant called tools: {names}"
+            return f"- Assistant: {text}" if text else ""
+
+        return self._summary_lines.get_or_set(self._key(message), line)
+
+    def summarize(self, dropped: List[BaseMessage]) -> SystemMessage:
+        """One message summarising the dropped turns, newest lines first to go into the cap."""
+        lines, tokens = [], 0
+        for message in reversed(dropped):
+            line = self._summary_line(message)
+            if not line:
+                continue
+            tokens += self.count_text_tokens(line)
+            if tokens > self.summary_cap:
+                break
+            lines.append(line)
+        omitted = len(dropped) - len(lines)
+        header = "Summary of the earlier conversation"
+        if omitted:
+            header += f" ({omitted} older messages omitted)"
+        return SystemMessage(content=header + ":\n" + "\n".join(reversed(lines)))
+
+    def trim(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """The messages to send to the LLM for this step."""
+        if self.budget <= 0 or not messages:
+            return list(messages)
+
+        messages = [
+            self.shrink_tool_message(message) if isinstance(message, ToolMessage) else message
+            for message in messages
+        ]
+        total = sum(self.count_tokens(message) for message in messages)
+        if total <= self.budget:
+            return messages
+
+        # Only cut at turn boundaries (a HumanMessage) so an AI tool call is never
+        # separated from its ToolMessages; the latest turn is always kept whole.
+        budget = self.budget - self.summary_cap
+        turn_starts = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+        start = turn_starts[-1] if turn_starts else 0
+        suffix = sum(self.count_tokens(message) for message in messages[start:])
+        for turn_start in reversed(turn_starts[:-1]):
+            turn_tokens = sum(self.count_tokens(message) for message in messages[turn_start:start])
+            if suffix + turn_tokens > budget:
+                break
+            start, suffix = turn_start, suffix + turn_tokens
+
+        if start == 0:
+            return messages
+        return [self.summarize(messages[:start])] + messages[start:]
@@ -0,0 +1,267 @@
+"""
+Response cache for the LLM calls of the assistant node.
+
+Repeated prompts ("add two numbers 23 and 45", "forecast weather for CA")
+produce identical LLM requests, which with `temperature=0` (set on both
+providers in state_graph) have identical answers. The cache skips the
+Groq/Ollama round trip for them:
+
+* exact tier: key = sha256 over (model, bound tool schemas, system prompt,
+  messages). Tool call ids are replaced by their position before hashing, so
+  the later steps of a repeated turn (after the tool results) hit as well.
+* semantic tier (optional, LLM_CACHE_SEMANTIC=true, needs `chromadb`): on an
+  exact miss at the start of a turn, reuse the response of a previous turn
+  whose user message is at least LLM_CACHE_SIMILARITY similar, with the
+  same model, tools, system prompt and earlier conversation (so "and for
+  NY?" is only reused after the same history). Off by default: "add 23 and 45" and
+  "add 23 and 46" are very similar but need different tool arguments.
+
+Entries are evicted LRU beyond LLM_CACHE_MAX_ENTRIES and expire after
+LLM_CACHE_TTL seconds. `stats()` returns hit/miss counters. The async node
+uses `aget`/`aput`, which run the semantic tier (an embedding model call)
+in a worker thread instead of on the event loop; a lock guards the LRU and
+the counters, and the chromadb calls run outside of it.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+try:
+    import chromadb
+except ImportError:
+    chromadb = None
+
+
+# Config
+LLM_CACHE = os.getenv("LLM_CACHE", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SEMANTIC = os.getenv("LLM_CACHE_SEMANTIC", "false").lower() == "true"
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0.97"))
+
+
+def model_id(llm) -> str:
+    """Provider + model name of a chat model (bound or not)."""
+    llm = getattr(llm, "bound", llm)
+    name = getattr(llm, "model_name", None) or getattr(llm, "model", None) or ""
+    return f"{llm._llm_type}:{name}"
+
+
+def tools_hash(tools: List[BaseTool]) -> str:
+    """Hash of the tool schemas the LLM is bound to."""
+    schemas = [convert_to_openai_tool(tool) for tool in tools]
+    return hashlib.sha256(json.dumps(schemas, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _canonical_messages(messages: List[BaseMessage]) -> list[dict[str, Any]]:
+    """Message content that determines the LLM answer; tool call ids replaced by their position."""
+    call_index: dict[str, int] = {}
+    canonical = []
+    for message in messages:
+        entry = {"type": message.type, "content": message.content}
+        if isinstance(message, AIMessage) and message.tool_calls:
+            entry["tool_calls"] = []
+            for call in message.tool_calls:
+                call_index.setdefault(call["id"], len(call_index))
+                entry["tool_calls"].append({"name": call["name"], "args": call["args"], "ref": call_index[call["id"]]})
+        if isinstance(message, ToolMessage):
+            entry["ref"] = call_index.get(message.tool_call_id, message.tool_call_id)
+        canonical.append(entry)
+    return canonical
+
+
+class LLMResponseCache:
+    """
+    LRU/TTL cache of AIMessages keyed on the full LLM request.
+
+    Args:
+        max_entries: Max cached responses (least recently used evicted first).
+        ttl: Seconds a response stays valid.
+        semantic: Enable the embedding-similarity tier (requires chromadb).
+        similarity: Min cosine similarity for a semantic hit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl: float = LLM_CACHE_TTL,
+        semantic: bool = LLM_CACHE_SEMANTIC,
+        similarity: float = LLM_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries: OrderedDict[str, tuple[float, AIMessage]] = OrderedDict()
+        # aget/aput run get/put in worker threads: guards _entries and the counters
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._collection = None
+        if semantic:
+            if chromadb is None:
+                print("LLM_CACHE_SEMANTIC is set but chromadb is not installed; using exact matching only")
+            else:
+                self._collection = chromadb.EphemeralClient().get_or_create_collection(
+                    f"llm_cache_{uuid.uuid4().hex[:8]}", metadata={"hnsw:space": "cosine"}
+                )
+
+    @staticmethod
+    def scope(model: str, tools_digest: str, system_prompt: str) -> str:
+        """Everything but the conversation: a semantic hit is only valid within one scope."""
+        return hashlib.sha256(f"{model}\0{tools_digest}\0{system_prompt}".encode()).hexdigest()
+
+    @staticmethod
+    def key(scope: str, messages: List[BaseMessage]) -> str:
+        payload = json.dumps(_canonical_messages(messages), sort_keys=True, default=str)
+        return hashlib.sha256(f"{scope}\0{payload}".encode()).hexdigest()
+
+    @classmethod
+    def _semantic_scope(cls, scope: str, messages: List[BaseMessage]) -> str:
+        """`scope` narrowed to the conversation before the user message: follow-ups only match after the same history."""
+        return cls.key(scope, messages[:-1])
+
+    @staticmethod
+    def _turn_query(messages: List[BaseMessage]) -> str | None:
+        """The user message when `messages` ends at the start of a turn (the only case the semantic tier handles)."""
+        if messages and isinstance(messages[-1], HumanMessage) and isinstance(messages[-1].content, str):
+            return messages[-1].content
+        return None
+
+    def _fresh(self, key: str, stale: list[str]) -> AIMessage | None:
+        """The live response for `key`; an expired entry is removed and its key added to `stale`. Hold the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            stale.append(key)
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _forget(self, keys: list[str]):
+        """Drop removed entries from the semantic index; called outside the lock."""
+        if keys and self._collection is not None:
+            self._collection.delete(ids=keys)
+
+    @staticmethod
+    def _replay(response: AIMessage, tier: str) -> AIMessageChunk:
+        """
+        Copy of a cached response with new message / tool call ids, as one
+        AIMessageChunk so stream consumers render it like a streamed reply.
+        """
+        return AIMessageChunk(
+            id=f"run-cache-{uuid.uuid4()}",
+            content=response.content,
+            tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": f"call_{uuid.uuid4().hex[:24]}", "index": i}
+                for i, call in enumerate(response.tool_calls)
+            ],
+            response_metadata={**response.response_metadata, "cache_hit": tier},
+            usage_metadata=response.usage_metadata,
+        )
+
+    def get(self, scope: str, messages: List[BaseMessage]) -> AIMessage | None:
+        stale: list[str] = []
+        try:
+            with self._lock:
+                response = self._fresh(self.key(scope, messages), stale)
+                if response is not None:
+                    self.hits += 1
+            if response is not None:
+                return self._replay(response, "exact")
+
+            query = self._turn_query(messages)
+            if self._collection is not None and query and self._collection.count():
+                found = self._collection.query(
+                    query_texts=[query], n_results=1, where={"scope": self._semantic_scope(scope, messages)}
+                )
+                if found["ids"][0] and 1 - found["distances"][0][0] >= self.similarity:
+                    with self._lock:
+                        response = self._fresh(found["ids"][0][0], stale)
+                        if response is not None:
+                            self.semantic_hits += 1
+                    if response is not None:
+                        return self._replay(response, "semantic")
+
+            with self._lock:
+                self.misses += 1
+            return None
+        finally:
+            self._forget(stale)
+
+    async def aget(self, scope: str, messages: List[BaseMessage]) -> AIMessage | None:
+        # Exact lookups are a hash and a dict access; only embedding lookups leave the event loop
+        if self._collection is None:
+            return self.get(scope, messages)
+        return await asyncio.to_thread(self.get, scope, messages)
+
+    async def aput(self, scope: str, messages: List[BaseMessage], response: AIMessage):
+        if self._collection is None:
+            return self.put(scope, messages, response)
+        await asyncio.to_thread(self.put, scope, messages, response)
+
+    def put(self, scope: str, messages: List[BaseMessage], response: AIMessage):
+        key = self.key(scope, messages)
+        evicted = []
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                evicted.append(oldest)
+                self.evictions += 1
+
+        query = self._turn_query(messages)
+        if self._collection is not None and query:
+            self._collection.upsert(
+                ids=[key], documents=[query], metadatas=[{"scope": self._semantic_scope(scope, messages)}]
+            )
+        self._forget(evicted)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+        self._forget(keys)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+
+# One cache per process, shared by every graph built (e.g. after a tool set change)
+_llm_cache: LLMResponseCache | None = None
+
+
+def get_llm_cache() -> LLMResponseCache | None:
+    """The process-wide response cache, or None when LLM_CACHE is off."""
+    global _llm_cache
+    if not LLM_CACHE:
+        return None
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -0,0 +1,362 @@
+"""
+Chat model that routes each call across several LLM providers.
+
+With a single provider (LLM_PROVIDER) a slow or rate-limited Groq stalls
+every request. `RouterChatModel` holds an ordered list of backends (e.g.
+LLM_ROUTER_PROVIDERS=groq,ollama) and for every call
+
+* tries them in order, skipping backends in cooldown,
+* fails over to the next backend on retryable errors (429, 408, 409 - a
+  conflict the provider SDKs retry as well -, 5xx, timeouts, connection
+  errors) and when an attempt gets no first token or answer within
+  LLM_ROUTER_TIMEOUT seconds; other errors (e.g. a 400 for a bad tool
+  schema) are raised right away and, being the request's fault, leave the
+  backend's health alone,
+* puts a backend in cooldown after a 429 (for its Retry-After, else
+  LLM_ROUTER_COOLDOWN seconds) or when its rolling error rate (retryable
+  failures only) exceeds LLM_ROUTER_MAX_ERROR_RATE,
+* with LLM_ROUTER_HEDGE on, sends a second (hedged) request to the next
+  backend once the first has not answered within its rolling
+  LLM_ROUTER_HEDGE_QUANTILE latency, and cancels whichever loses.
+
+Latency is measured to the first streamed chunk (or the whole answer when
+not streaming), over the last LLM_ROUTER_WINDOW calls per backend.
+`stats()` reports it per backend together with error and hedge counts.
+Streamed calls only fail over before their first chunk: after that the
+answer is already on its way to the client.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langgraph.constants import TAG_NOSTREAM
+from pydantic import PrivateAttr
+
+from src.telemetry import REGISTRY
+
+
+# Config
+LLM_ROUTER_PROVIDERS = [p.strip() for p in os.getenv("LLM_ROUTER_PROVIDERS", "").split(",") if p.strip()]
+LLM_ROUTER_TIMEOUT = float(os.getenv("LLM_ROUTER_TIMEOUT", "30"))             # per attempt, to first token
+LLM_ROUTER_HEDGE = os.getenv("LLM_ROUTER_HEDGE", "false").lower() == "true"
+LLM_ROUTER_HEDGE_QUANTILE = float(os.getenv("LLM_ROUTER_HEDGE_QUANTILE", "0.95"))
+LLM_ROUTER_HEDGE_MIN_DELAY = float(os.getenv("LLM_ROUTER_HEDGE_MIN_DELAY", "0.2"))
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "100"))
+LLM_ROUTER_COOLDOWN = float(os.getenv("LLM_ROUTER_COOLDOWN", "30"))
+LLM_ROUTER_MAX_ERROR_RATE = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.5"))
+MIN_SAMPLES = 5     # calls before a backend's quantiles and error rate are trusted
+RETRYABLE_STATUS = {408, 409, 429}
+
+LLM_ROUTER_ATTEMPTS = REGISTRY.counter(
+    "llm_router_attempts_total", "LLM router attempts by backend and outcome", ("backend", "outcome")
+)
+
+_DONE = object()
+
+
+def status_code(error: BaseException) -> int | None:
+    """HTTP status of a provider error (groq/openai/ollama/httpx errors carry it in one of these places)."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    # groq.APITimeoutError, groq.APIConnectionError, httpx.ConnectError, httpx.ReadTimeout, ...
+    name = type(error).__name__
+    return "Timeout" in name or "Connect" in name
+
+
+def retry_after(error: BaseException) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+class BackendStats:
+    """Rolling latency / error window and cooldown state of one backend."""
+
+    def __init__(self, name: str, window: int = LLM_ROUTER_WINDOW):
+        self.name = name
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.counts = {"ok": 0, "error": 0, "timeout": 0, "rejected": 0, "hedge": 0, "hedge_won": 0, "cancelled": 0}
+
+    def record(self, outcome: str, latency: float | None = None):
+        self.counts[outcome] += 1
+        LLM_ROUTER_ATTEMPTS.inc(backend=self.name, outcome=outcome)
+        if outcome in ("hedge", "cancelled", "rejected"):
+            return      # neither a success nor a failure of the backend
+        self.outcomes.append(outcome in ("ok", "hedge_won"))
+        if latency is not None:
+            self.latencies.append(latency)
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def quantile(self, q: float) -> float | None:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def cool_down(self, seconds: float):
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **self.counts,
+            "error_rate": self.error_rate,
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "in_flight": self.in_flight,
+            "cooling_down_s": max(0.0, self.cooldown_until - time.monotonic()),
+        }
+
+
+class RouterChatModel(BaseChatModel):
+    """
+    Routes calls over `backends` (highest priority first) with failover and
+    optional hedging. `bind_tools` binds the tools to every backend; the
+    bound copies share the rolling stats.
+    """
+
+    backends: List[Runnable]
+    names: List[str] = []
+    timeout: float = LLM_ROUTER_TIMEOUT
+    hedge: bool = LLM_ROUTER_HEDGE
+    hedge_quantile: float = LLM_ROUTER_HEDGE_QUANTILE
+    hedge_min_delay: float = LLM_ROUTER_HEDGE_MIN_DELAY
+    cooldown: float = LLM_ROUTER_COOLDOWN
+    max_error_rate: float = LLM_ROUTER_MAX_ERROR_RATE
+    model_name: str = ""
+    _stats: List[BackendStats] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context: Any):
+        if not self.names:
+            self.names = [f"backend{i}" for i in range(len(self.backends))]
+        self.model_name = self.model_name or "+".join(self.names)
+        self._stats = [BackendStats(name) for name in self.names]
+
+    @property
+    def _llm_type(self) -> str:
+        return "router"
+
+    def bind_tools(self, tools, **kwargs) -> "RouterChatModel":
+        # model_copy keeps the private _stats list, so every binding feeds the same windows
+        return self.model_copy(update={"backends": [backend.bind_tools(tools, **kwargs) for backend in self.backends]})
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {stats.name: stats.snapshot() for stats in self._stats}
+
+    def _order(self) -> list[int]:
+        """Backends to try: available ones in priority order, then those in cooldown as a last resort."""
+        available = [i for i, stats in enumerate(self._stats) if stats.available()]
+        return available + [i for i in range(len(self._stats)) if i not in available]
+
+    def _hedge_delay(self, i: int) -> float | None:
+        if not self.hedge:
+            return None
+        quantile = self._stats[i].quantile(self.hedge_quantile)
+        return max(self.hedge_min_delay, quantile) if quantile is not None else None
+
+    def _failed(self, i: int, error: BaseException, latency: float):
+        stats = self._stats[i]
+        if not is_retryable(error):
+            stats.record("rejected")    # a bad request, not a bad backend
+            return
+        timed_out = isinstance(error, (TimeoutError, asyncio.TimeoutError))
+        stats.record("timeout" if timed_out else "error", None)
+        if status_code(error) == 429:
+            cooldown = retry_after(error) or self.cooldown
+        elif len(stats.outcomes) >= MIN_SAMPLES and stats.error_rate > self.max_error_rate:
+            cooldown = self.cooldown
+        else:
+            return
+        if stats.available():
+            print(f"LLM backend {stats.name} cooling down for {cooldown:g}s after {error!r} ({latency:.2f}s)")
+        stats.cool_down(cooldown)
+
+    # -------------------------------
+    # Async: failover and hedging
+    # -------------------------------
+    async def _attempt(self, i: int, messages, stop, stream: bool, queue: asyncio.Queue, kwargs):
+        stats = self._stats[i]
+        # Backend runs inherit the caller's callbacks (they are siblings of the router's run) and are
+        # tagged nostream: the router re-emits the winner's chunks under its own run
+        config = {"tags": [TAG_NOSTREAM], "run_name": stats.name}
+        stats.in_flight += 1
+        try:
+            if stream:
+                async for chunk in self.backends[i].astream(messages, config, stop=stop, **kwargs):
+                    await queue.put((i, chunk))
+            else:
+                await queue.put((i, await self.backends[i].ainvoke(messages, config, stop=stop, **kwargs)))
+            await queue.put((i, _DONE))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put((i, e))
+        finally:
+            stats.in_flight -= 1
+
+    async def _route(
+        self, messages, stop, run_manager: Optional[AsyncCallbackManagerForLLMRun], stream: bool, **kwargs
+    ) -> AsyncIterator[Any]:
+        """Yields the chunks (or the one message) of the winning attempt."""
+        order = self._order()
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks: dict[int, asyncio.Task] = {}
+        started: dict[int, float] = {}
+        pending: set[int] = set()      # attempts that have not produced anything yet
+        winner = None
+        last_error: BaseException | None = None
+        hedge_at = None
+
+        def launch(hedge: bool = False) -> bool:
+            nonlocal hedge_at
+            if len(started) >= len(order):
+                return False
+            i = order[len(started)]
+            started[i] = time.perf_counter()
+            pending.add(i)
+            tasks[i] = asyncio.create_task(self._attempt(i, messages, stop, stream, queue, kwargs))
+            if hedge:
+                self._stats[i].record("hedge")
+                hedge_at = None     # one hedge per call
+            else:
+                delay = self._hedge_delay(i)
+                hedge_at = started[i] + delay if delay is not None else None
+            return True
+
+        def drop(i: int):
+            pending.discard(i)
+            tasks[i].cancel()
+
+        launch()
+        try:
+            while True:
+                timeout = None
+                if winner is None:
+                    deadlines = [started[i] + self.timeout for i in pending]
+                    if hedge_at is not None:
+                        deadlines.append(hedge_at)
+                    timeout = max(0.0, min(deadlines) - time.perf_counter())
+                try:
+                    i, item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    now = time.perf_counter()
+                    for i in [i for i in pending if now >= started[i] + self.timeout]:
+                        drop(i)
+                        last_error = TimeoutError(f"{self._stats[i].name}: no response within {self.timeout:g}s")
+                        self._failed(i, last_error, now - started[i])
+                    if hedge_at is not None and now >= hedge_at and pending:
+                        launch(hedge=True)
+                    if not pending and not launch():
+                        raise last_error
+                    continue
+
+                if i not in pending and i != winner:
+                    continue   # late output of a dropped attempt
+                latency = time.perf_counter() - started[i]
+
+                if isinstance(item, BaseException):
+                    self._failed(i, item, latency)
+                    if i == winner:
+                        raise item      # already streaming: too late to fail over
+                    pending.discard(i)
+                    last_error = item
+                    if pending or (is_retryable(item) and launch()):
+                        continue
+                    raise item
+
+                if winner is None:
+                    winner = i
+                    pending.discard(i)
+                    raced = bool(pending)
+                    for loser in list(pending):
+                        drop(loser)
+                        self._stats[loser].record("cancelled")
+                    self._stats[i].record("hedge_won" if raced and i != order[0] else "ok", latency)
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = None
+        async for message in self._route(messages, stop, run_manager, stream=False, **kwargs):
+            pass
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self._route(messages, stop, run_manager, stream=True, **kwargs):
+            if not isinstance(chunk, AIMessageChunk):
+                continue
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(generation.text, chunk=generation)
+            yield generation
+
+    # -------------------------------
+    # Sync: failover only
+    # -------------------------------
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        last_error = None
+        for i in self._order():
+            start = time.perf_counter()
+            config = {"tags": [TAG_NOSTREAM], "run_name": self._stats[i].name}
+            try:
+                message = self.backends[i].invoke(messages, config, stop=stop, **kwargs)
+            except Exception as e:
+                self._failed(i, e, time.perf_counter() - start)
+                if not is_retryable(e):
+                    raise
+                last_error = e
+                continue
+            self._stats[i].record("ok", time.perf_counter() - start)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise last_error
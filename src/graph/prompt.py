@@ -0,0 +1,167 @@
+"""
+Precomputed prompt prefix per tool set.
+
+The system prompt embeds the manifest of every bound tool, and `bind_tools`
+converts every tool to its JSON schema. Both only depend on the tool set, so
+PromptCache renders them once per tool set (keyed by `tools_hash`) and
+shares the result across graph instances (rebuilds after a tool change, one
+graph per benchmark scenario, ...):
+
+* the system prompt text and a single SystemMessage instance reused by every
+  assistant step, so the request prefix (system prompt + tool schemas) is
+  byte-identical from request to request and provider-side prompt caching
+  (Groq prompt caching / Ollama KV reuse) can hit,
+* the tool-bound chat model, per model client.
+
+Lookups and per-request prompt construction time are exported as metrics
+(`prompt_cache_lookups_total`, `prompt_build_seconds`).
+"""
+
+import os
+from collections import OrderedDict
+from typing import Any, List
+
+from langchain_core.messages import SystemMessage
+from langchain_core.tools import BaseTool
+
+from src.graph.llm_cache import tools_hash
+from src.telemetry import REGISTRY
+
+
+# Config
+PROMPT_CACHE_MAX_ENTRIES = 64     # tool sets (incl. selected subsets) / model bindings kept
+
+PROMPT_CACHE_LOOKUPS = REGISTRY.counter("prompt_cache_lookups_total", "Prompt prefix cache lookups", ("kind", "result"))
+PROMPT_BUILD_SECONDS = REGISTRY.histogram(
+    "prompt_build_seconds", "Time to assemble the LLM messages of one assistant step",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+SYSTEM_PROMPT = """
+Your name is Scout and you are an expert data scientist. You help customers manage their data science projects by leveraging the tools available to you. Your goal is to collaborate with the customer in incrementally building their analysis or data modeling project. Version control is a critical aspect of this project, so you must use the git tools to manage the project's version history and maintain a clean, easy to understand commit history.
+
+<filesystem>
+You have access to a set of tools that allow you to interact with the user's local filesystem. 
+You are only able to access files within the working directory `projects`. 
+The absolute path to this directory is: {working_dir}
+If you try to access a file outside of this directory, you will receive an error.
+Always use absolute paths when specifying files.
+</filesystem>
+
+<version_control>
+You have access to git and Github tools.
+You should use git tools to manage the version history of the project and Github tools to manage the project's remote repository.
+Keep a clean, logical commit history for the repo where each commit should represent a logical, atomic change.
+</version_control>
+
+<projects>
+A project is a directory within the `projects` directory.
+When using the create_new_project tool to create a new project, the following commands will be run for you:
+    a. `mkdir <project_name>` - creates a new directory for the project
+    b. `cd <project_name>` - changes to the new directory
+    c. `uv init .` - initializes a new project
+    d. `git init` - initializes a new git repository
+    e. `mkdir data` - creates a data directory
+Every project has the exact same structure.
+
+<data>
+When the user refers to data for a project, they are referring to the data within the `data` directory of the project.
+All projects must use the `data` directory to store all data related to the project. 
+The user can also load data into this directory.
+You have a set of tools called dataflow that allow you to interact with the customer's data. 
+The dataflow tools are used to load data into the session to query and work with it. 
+You must always first load data into the session before you can do anything with it.
+</data>
+
+<code>
+The main.py file is the entry point for the project and will contain all the code to load, transform, and model the data. 
+You will primarily work on this file to complete the user's requests.
+main.py should only be used to implement permanent changes to the data - to be commited to git. 
+</code>
+
+<tools>
+{tools}
+</tools>
+
+Assist the customer in all aspects of their data science workflow.
+"""
+
+
+class PromptPrefix:
+    """The rendered, immutable start of every LLM request for one tool set."""
+
+    def __init__(self, system_prompt: str, digest: str):
+        self.system_prompt = system_prompt
+        self.system_message = SystemMessage(content=system_prompt)
+        self.tools_hash = digest
+
+
+class PromptCache:
+    """
+    Rendered prompt prefixes by tool set and tool-bound models by (model client, tool set).
+
+    Entries keep their tools / model client alive, so keys built from object
+    ids can't be reused by new objects while the entry exists.
+    """
+
+    def __init__(self, max_entries: int = PROMPT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._by_tools: OrderedDict[tuple, tuple[List[BaseTool], PromptPrefix]] = OrderedDict()
+        self._by_hash: OrderedDict[tuple, PromptPrefix] = OrderedDict()
+        self._bound: OrderedDict[tuple, tuple[Any, Any]] = OrderedDict()
+        self.counts = {"prefix_hits": 0, "prefix_misses": 0, "bind_hits": 0, "bind_misses": 0}
+
+    def _remember(self, cache: OrderedDict, key, value):
+        cache[key] = value
+        if len(cache) > self.max_entries:
+            cache.popitem(last=False)
+
+    def _count(self, kind: str, hit: bool):
+        self.counts[f"{kind}_{'hits' if hit else 'misses'}"] += 1
+        PROMPT_CACHE_LOOKUPS.inc(kind=kind, result="hit" if hit else "miss")
+
+    def prefix(self, tools: List[BaseTool]) -> PromptPrefix:
+        """The system prompt for `tools` (rendered on first use of an equal tool set)."""
+        working_dir = os.environ.get("MCP_FILESYSTEM_DIR")
+        # Fast path: the very same tool objects (no schema conversion needed)
+        identity = (tuple(id(tool) for tool in tools), working_dir)
+        if identity in self._by_tools:
+            self._by_tools.move_to_end(identity)
+            self._count("prefix", True)
+            return self._by_tools[identity][1]
+
+        digest = tools_hash(tools)
+        key = (digest, working_dir)
+        prefix = self._by_hash.get(key)
+        self._count("prefix", prefix is not None)
+        if prefix is None:
+            system_prompt = SYSTEM_PROMPT
+            if tools:
+                # inject tools into system prompt
+                tools_json = [tool.model_dump_json(include=["name", "description"]) for tool in tools]
+                system_prompt = SYSTEM_PROMPT.format(tools="\n".join(tools_json), working_dir=working_dir)
+            prefix = PromptPrefix(system_prompt, digest)
+            self._remember(self._by_hash, key, prefix)
+        self._remember(self._by_tools, identity, (list(tools), prefix))
+        return prefix
+
+    def bind(self, llm, tools: List[BaseTool], prefix: PromptPrefix):
+        """`llm.bind_tools(tools)`, converted once per model client and tool set."""
+        key = (id(llm), prefix.tools_hash)
+        entry = self._bound.get(key)
+        self._count("bind", entry is not None)
+        if entry is None:
+            entry = (llm, llm.bind_tools(tools))
+            self._remember(self._bound, key, entry)
+        return entry[1]
+
+    def stats(self) -> dict[str, int]:
+        return {**self.counts, "tool_sets": len(self._by_hash), "bindings": len(self._bound)}
+
+
+_prompt_cache = PromptCache()
+
+
+def get_prompt_cache() -> PromptCache:
+    """The process-wide prompt prefix cache."""
+    return _prompt_cache
@@ -3,11 +3,26 @@ from langgraph.graph import StateGraph, add_messages, START, END
 from langchain_core.messages import SystemMessage
 from pydantic import BaseModel
 from typing import List, Annotated
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import tools_condition
 from langgraph.checkpoint.memory import MemorySaver
 from langchain.tools import BaseTool
 import os
+import time
 from src.model.agentstate import AgentState
+from src.graph.tool_executor import ConcurrentToolNode
+from src.graph.checkpointer import get_checkpointer
+from src.graph.history import HistoryTrimmer
+from src.graph.llm_cache import get_llm_cache, model_id
+from src.graph.prompt import PROMPT_BUILD_SECONDS, get_prompt_cache
+from src.graph.tool_selector import get_tool_selector
+from src.graph.tool_output import get_tool_output_limiter, with_read_tool
+from src.graph.tool_policy import get_tool_response_policy
+from src.telemetry import TELEMETRY, install_langchain_callbacks
+from src.admission import get_llm_rate_limiter
+from src.graph.llm_router import LLM_ROUTER_PROVIDERS, RouterChatModel
+from src.graph.cascade import (
+    GROQ_LARGE_MODEL, GROQ_SMALL_MODEL, LLM_CASCADE, OLLAMA_LARGE_MODEL, OLLAMA_SMALL_MODEL, CascadeChatModel,
+)
 
 from IPython.display import display, Image
 from dotenv import load_dotenv
@@ -48,14 +63,39 @@ OLLAMA_MODEL = os.getenv("OLLAMA_LLM_MODEL", "llama3.1")
 GROQ_MODEL   = os.getenv("GROQ_LLM_MODEL", "llama-3.1-8b-instant")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-def get_llm():
-    """Factory to create an LLM client based on provider selection."""
-    if LLM_PROVIDER.lower() == "groq":
+# One client per process: graph rebuilds reuse its connections and its cached tool bindings
+_llm_client = None
+
+def get_provider_llm(provider: str, tier: str | None = None):
+    """Chat model of one provider ("groq" or "ollama"), optionally of a cascade tier ("small" or "large")."""
+    if provider.lower() == "groq":
         if not GROQ_API_KEY:
             raise ValueError("Missing GROQ_API_KEY in environment!")
-        return ChatGroq(model=GROQ_MODEL, temperature=0)
-    else:
-        return ChatOllama(model=OLLAMA_MODEL)
+        model = {"small": GROQ_SMALL_MODEL, "large": GROQ_LARGE_MODEL}.get(tier, GROQ_MODEL)
+        return ChatGroq(model=model, temperature=0, rate_limiter=get_llm_rate_limiter("groq"))
+    model = {"small": OLLAMA_SMALL_MODEL, "large": OLLAMA_LARGE_MODEL}.get(tier, OLLAMA_MODEL)
+    # temperature=0 on every provider: the response cache (LLM_CACHE) assumes deterministic answers
+    return ChatOllama(model=model, temperature=0, rate_limiter=get_llm_rate_limiter("ollama"))
+
+def get_tier_llm(tier: str | None = None):
+    """One provider's model, or a router across LLM_ROUTER_PROVIDERS, for the given cascade tier."""
+    if len(LLM_ROUTER_PROVIDERS) > 1:
+        # Failover (and optional hedging) across providers, in the order given
+        return RouterChatModel(
+            backends=[get_provider_llm(provider, tier) for provider in LLM_ROUTER_PROVIDERS], names=LLM_ROUTER_PROVIDERS
+        )
+    return get_provider_llm(LLM_PROVIDER, tier)
+
+def get_llm():
+    """Factory to create an LLM client based on provider selection."""
+    global _llm_client
+    if _llm_client is None:
+        if LLM_CASCADE:
+            # Small model for routine steps, large model when the cascade escalates
+            _llm_client = CascadeChatModel(small=get_tier_llm("small"), large=get_tier_llm("large"))
+        else:
+            _llm_client = get_tier_llm()
+    return _llm_client
 
 # def save_graphviz(graph_obj, filename="diagram.png"):
 #     dot = graphviz.Digraph(comment="LangGraph Diagram")
@@ -77,85 +117,99 @@ def get_llm():
 #     dot.render(filename, format="png", cleanup=True)
 #     print(f"✅ Saved graph image to {filename}.png")
 
-def build_agent_graph(tools: List[BaseTool] = []):
-    system_prompt = """
-Your name is Scout and you are an expert data scientist. You help customers manage their data science projects by leveraging the tools available to you. Your goal is to collaborate with the customer in incrementally building their analysis or data modeling project. Version control is a critical aspect of this project, so you must use the git tools to manage the project's version history and maintain a clean, easy to understand commit history.
-
-<filesystem>
-You have access to a set of tools that allow you to interact with the user's local filesystem. 
-You are only able to access files within the working directory `projects`. 
-The absolute path to this directory is: {working_dir}
-If you try to access a file outside of this directory, you will receive an error.
-Always use absolute paths when specifying files.
-</filesystem>
-
-<version_control>
-You have access to git and Github tools.
-You should use git tools to manage the version history of the project and Github tools to manage the project's remote repository.
-Keep a clean, logical commit history for the repo where each commit should represent a logical, atomic change.
-</version_control>
-
-<projects>
-A project is a directory within the `projects` directory.
-When using the create_new_project tool to create a new project, the following commands will be run for you:
-    a. `mkdir <project_name>` - creates a new directory for the project
-    b. `cd <project_name>` - changes to the new directory
-    c. `uv init .` - initializes a new project
-    d. `git init` - initializes a new git repository
-    e. `mkdir data` - creates a data directory
-Every project has the exact same structure.
-
-<data>
-When the user refers to data for a project, they are referring to the data within the `data` directory of the project.
-All projects must use the `data` directory to store all data related to the project. 
-The user can also load data into this directory.
-You have a set of tools called dataflow that allow you to interact with the customer's data. 
-The dataflow tools are used to load data into the session to query and work with it. 
-You must always first load data into the session before you can do anything with it.
-</data>
-
-<code>
-The main.py file is the entry point for the project and will contain all the code to load, transform, and model the data. 
-You will primarily work on this file to complete the user's requests.
-main.py should only be used to implement permanent changes to the data - to be commited to git. 
-</code>
-
-<tools>
-{tools}
-</tools>
-
-Assist the customer in all aspects of their data science workflow.
-"""
+def make_tool_node(tools: List[BaseTool]) -> ConcurrentToolNode:
+    """The "tools" node for `tools` (plus read_tool_output when outputs are limited)."""
+    output_limiter = get_tool_output_limiter()
+    return ConcurrentToolNode(with_read_tool(tools, output_limiter), output_limiter=output_limiter)
+
+def build_agent_graph(tools: List[BaseTool] = [], checkpointer=None, tool_node: ConcurrentToolNode | None = None):
+    """
+    The agent graph for `tools`. `tool_node` (from make_tool_node) lets the
+    caller share the tools node, and with it the per-server limits, with
+    direct tool calls.
+    """
 
     llm = get_llm()#ChatGroq(model=GROQ_MODEL)
-  
+    base_llm = llm
+
+    # Oversized tool results are stored outside the state; read_tool_output pages into them
+    output_limiter = get_tool_output_limiter()
+    tools = with_read_tool(tools, output_limiter)
+
+    # System prompt (with the tool manifest) and tool binding are rendered once per tool set
+    prompts = get_prompt_cache()
+    prefix = prompts.prefix(tools)
     if tools:
-        llm = llm.bind_tools(tools)
-        #inject tools into system prompt
-        tools_json = [tool.model_dump_json(include=["name", "description"]) for tool in tools]
-        system_prompt = system_prompt.format(
-            tools="\n".join(tools_json), 
-            working_dir=os.environ.get("MCP_FILESYSTEM_DIR")
-            )
-
-    def assistant(state: AgentState) -> AgentState:
-        response = llm.invoke([SystemMessage(content=system_prompt)] + state.messages)
-        state.messages.append(response)
-        return state
+        llm = prompts.bind(llm, tools, prefix)
+
+    # With many tools, each step binds only the ones relevant to the current turn
+    selector = get_tool_selector(tools, prefix.tools_hash)
+
+    # Only a token-budgeted window of the thread is sent to the LLM; the state keeps everything
+    history = HistoryTrimmer()
+
+    # Identical requests (same model, tools, prompt and messages) are answered from the cache
+    cache = get_llm_cache()
+    cache_scopes = {}
+
+    # Async so a cancelled graph run also cancels the in-flight LLM HTTP request, and
+    # concurrent runs wait for the LLM on the event loop instead of in executor threads
+    async def assistant(state: AgentState) -> dict:
+        start = time.perf_counter()
+        step_prefix, step_llm = prefix, llm
+        if selector:
+            subset = await selector.aselect(state.messages)
+            step_prefix = prompts.prefix(subset)
+            step_llm = prompts.bind(base_llm, subset, step_prefix)
+        conversation = history.trim(state.messages)
+        # Same SystemMessage object every step: a byte-identical prefix for provider-side prompt caching
+        messages = [step_prefix.system_message] + conversation
+        PROMPT_BUILD_SECONDS.observe(time.perf_counter() - start)
+
+        cache_scope = None
+        if cache:
+            if step_prefix.tools_hash not in cache_scopes:
+                cache_scopes[step_prefix.tools_hash] = cache.scope(
+                    model_id(step_llm), step_prefix.tools_hash, step_prefix.system_prompt
+                )
+            cache_scope = cache_scopes[step_prefix.tools_hash]
+
+        # The scope already covers the system prompt, so only the conversation is hashed
+        response = await cache.aget(cache_scope, conversation) if cache else None
+        if response is None:
+            # Streams token by token when the run is consumed with stream_mode="messages"
+            # (LangGraph's stream handler switches the call to the provider's streaming API)
+            response = await step_llm.ainvoke(messages)
+            if cache:
+                await cache.aput(cache_scope, conversation, response)
+        # Only the new message: returning the whole state re-emits earlier turns in stream_mode="messages"
+        return {"messages": [response]}
 
     builder = StateGraph(AgentState)
 
     builder.add_node("LLMAgent", assistant)
-    builder.add_node(ToolNode(tools))
+    # Runs all tool calls of one LLM turn concurrently (replaces the prebuilt ToolNode)
+    builder.add_node("tools", tool_node or ConcurrentToolNode(tools, output_limiter=output_limiter))
 
     builder.add_edge(START, "LLMAgent")
     builder.add_conditional_edges(
         "LLMAgent",
         tools_condition,
     )
-    builder.add_edge("tools", "LLMAgent")
+    # Tools whose results are the answer (return direct / template) end the turn without a second LLM call
+    policy = get_tool_response_policy(tools)
+    if policy is not None:
+        builder.add_node("respond", policy.respond)
+        builder.add_conditional_edges("tools", policy.route, ["LLMAgent", "respond"])
+        builder.add_edge("respond", END)
+    else:
+        builder.add_edge("tools", "LLMAgent")
+
+    if TELEMETRY:
+        # Node and LLM call spans/metrics for every graph run
+        install_langchain_callbacks()
 
-    return builder.compile(checkpointer=MemorySaver())
+    return builder.compile(checkpointer=checkpointer or get_checkpointer())
 
 
 # visualize graph
@@ -0,0 +1,119 @@
+"""
+Concurrent tool execution node for the agent graph.
+
+A single LLM turn often asks for several independent tools at once
+(`get_alerts` + `get_forecast`, `add` + `multiply`). This node runs all tool
+calls of the last AI message concurrently, so the turn takes about as long as
+its slowest call, while
+
+* capping how many calls run at the same time against one MCP server,
+* giving every call its own timeout,
+* moving oversized results to the blob store (src/graph/tool_output.py), and
+* returning the ToolMessages in the same order as the tool calls.
+"""
+
+import asyncio
+import os
+from typing import Any, List
+
+from langchain_core.messages import AIMessage, ToolCall, ToolMessage
+from langchain_core.tools import BaseTool
+from langgraph.prebuilt.tool_node import INVALID_TOOL_NAME_ERROR_TEMPLATE, TOOL_CALL_ERROR_TEMPLATE
+
+from src.graph.tool_output import ToolOutputLimiter
+from src.model.agentstate import AgentState
+
+
+# Config
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT_SECONDS", "60"))
+TOOL_SERVER_CONCURRENCY = int(os.getenv("TOOL_SERVER_CONCURRENCY", "4"))
+LOCAL_SERVER = "local"   # bucket for tools that do not come from an MCP server
+
+
+class ConcurrentToolNode:
+    """
+    Drop-in replacement for the prebuilt `ToolNode` ("tools" node) that runs
+    the tool calls of one turn concurrently.
+
+    Args:
+        tools: Tools the LLM can call.
+        timeout: Default per-call timeout in seconds. A tool can override it
+            with a "timeout" entry in its metadata.
+        server_concurrency: Max in-flight calls per MCP server, either one
+            limit for every server or a {server_name: limit} mapping.
+        output_limiter: Caps the size of the results kept in the state
+            (None keeps them whole).
+    """
+
+    name = "tools"
+
+    def __init__(
+        self,
+        tools: List[BaseTool],
+        timeout: float = TOOL_TIMEOUT,
+        server_concurrency: int | dict[str, int] = TOOL_SERVER_CONCURRENCY,
+        output_limiter: ToolOutputLimiter | None = None,
+    ):
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.timeout = timeout
+        self.server_concurrency = server_concurrency
+        self.output_limiter = output_limiter
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _server(self, tool: BaseTool) -> str:
+        return (tool.metadata or {}).get("mcp_server", LOCAL_SERVER)
+
+    def _semaphore(self, server: str) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; start fresh if the graph is
+        # driven from a new loop (e.g. one asyncio.run per request).
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {}
+        if server not in self._semaphores:
+            limit = self.server_concurrency
+            if isinstance(limit, dict):
+                limit = limit.get(server, TOOL_SERVER_CONCURRENCY)
+            self._semaphores[server] = asyncio.Semaphore(max(1, limit))
+        return self._semaphores[server]
+
+    def _timeout(self, tool: BaseTool) -> float:
+        return float((tool.metadata or {}).get("timeout", self.timeout))
+
+    async def run_tool_call(self, call: ToolCall, limit: bool = True) -> ToolMessage:
+        """Run one tool call, turning every failure into an error ToolMessage; `limit=False` keeps the result whole."""
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None:
+            content = INVALID_TOOL_NAME_ERROR_TEMPLATE.format(
+                requested_tool=call["name"],
+                available_tools=", ".join(self.tools_by_name),
+            )
+            return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+
+        timeout = self._timeout(tool)
+        try:
+            async with self._semaphore(self._server(tool)):
+                result = await asyncio.wait_for(
+                    tool.ainvoke({**call, "type": "tool_call"}),
+                    timeout=timeout,
+                )
+        except asyncio.TimeoutError:
+            content = f"Error: tool '{call['name']}' timed out after {timeout:g}s"
+            return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+        except Exception as e:
+            content = TOOL_CALL_ERROR_TEMPLATE.format(error=repr(e))
+            return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+
+        if not isinstance(result, ToolMessage):
+            result = ToolMessage(content=str(result), name=call["name"], tool_call_id=call["id"])
+        if limit and self.output_limiter:
+            result = await self.output_limiter.alimit(result, tool)
+        return result
+
+    async def __call__(self, state: AgentState) -> dict[str, Any]:
+        message = state.messages[-1]
+        tool_calls = message.tool_calls if isinstance(message, AIMessage) else []
+        # gather() keeps the results in tool-call order regardless of which finishes first
+        results = await asyncio.gather(*(self.run_tool_call(call) for call in tool_calls))
+        return {"messages": list(results)}
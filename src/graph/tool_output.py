@@ -0,0 +1,261 @@
+"""
+Size limits for tool results.
+
+Playwright snapshots, Airbnb listings and multi-alert `get_alerts` answers
+can be hundreds of KB. Returned as they are, they are stored in
+`AgentState.messages`, written to the checkpointer with every step and sent
+to the LLM again on later steps. `ToolOutputLimiter` post-processes every
+ToolMessage of the "tools" node:
+
+* results over a per-tool byte or token cap (TOOL_OUTPUT_MAX_BYTES /
+  TOOL_OUTPUT_MAX_TOKENS; a tool can override them with "max_output_bytes" /
+  "max_output_tokens" in its metadata, or by name in TOOL_OUTPUT_LIMITS)
+  are written to a content-addressed `BlobStore` on local disk,
+* the message keeps only a short summary (size, lines, sections) and the
+  head of the output, plus the blob id,
+* the `read_tool_output` tool lets the agent page into the blob when the
+  head is not enough.
+
+Blobs are named by the sha256 of their content, so repeated outputs are
+stored once and every worker process sharing TOOL_OUTPUT_DIR can serve
+every blob id. The store is pruned oldest first beyond
+TOOL_OUTPUT_DIR_MAX_BYTES, in a background thread. The graph limits results
+with `alimit`, which does the tokenizing and file IO in a worker thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import List
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool, StructuredTool
+
+from src.graph.history import _load_token_counter, message_text
+from src.telemetry import REGISTRY
+
+
+# Config
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TOOL_OUTPUT_LIMIT = os.getenv("TOOL_OUTPUT_LIMIT", "true").lower() == "true"
+TOOL_OUTPUT_MAX_BYTES = int(os.getenv("TOOL_OUTPUT_MAX_BYTES", "16384"))
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "4000"))
+TOOL_OUTPUT_LIMITS = json.loads(os.getenv("TOOL_OUTPUT_LIMITS", "{}"))   # {"browser_snapshot": 32768} (bytes)
+TOOL_OUTPUT_PREVIEW_CHARS = int(os.getenv("TOOL_OUTPUT_PREVIEW_CHARS", "2000"))
+TOOL_OUTPUT_PAGE_CHARS = int(os.getenv("TOOL_OUTPUT_PAGE_CHARS", "3000"))
+TOOL_OUTPUT_DIR = os.getenv("TOOL_OUTPUT_DIR", os.path.join(PROJECT_ROOT, "tool_outputs"))
+TOOL_OUTPUT_DIR_MAX_BYTES = int(os.getenv("TOOL_OUTPUT_DIR_MAX_BYTES", str(512 * 1024 * 1024)))   # 0 = unlimited
+READ_TOOL_OUTPUT = "read_tool_output"
+TOOL_OUTPUT_BLOB = "tool_output_blob"   # response_metadata key of a ToolMessage whose output was stored
+SECTION_SEPARATOR = "\n---\n"   # how get_alerts joins its alerts
+
+TOOL_OUTPUT_SPILLS = REGISTRY.counter(
+    "tool_output_spills_total", "Tool results moved to the blob store", ("tool",)
+)
+TOOL_OUTPUT_BYTES = REGISTRY.counter(
+    "tool_output_bytes_total", "Bytes of tool results, as returned and as kept in the state", ("tool", "kind")
+)
+
+
+class BlobStore:
+    """Content-addressed text blobs in a local directory (`<root>/<id[:2]>/<id>`)."""
+
+    def __init__(self, root: str = TOOL_OUTPUT_DIR, max_bytes: int = TOOL_OUTPUT_DIR_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._written = 0
+        self._lock = threading.Lock()
+
+    def path(self, blob_id: str) -> str:
+        if len(blob_id) != 64 or not all(c in "0123456789abcdef" for c in blob_id):
+            raise ValueError(f"invalid blob id: {blob_id!r}")
+        return os.path.join(self.root, blob_id[:2], blob_id)
+
+    def put(self, text: str) -> str:
+        data = text.encode()
+        blob_id = hashlib.sha256(data).hexdigest()
+        path = self.path(blob_id)
+        if os.path.exists(path):
+            os.utime(path)   # recently used: pruned last
+            return blob_id
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers in other processes never see a partial blob
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._written += len(data)
+            prune = self.max_bytes and self._written > self.max_bytes // 10
+            if prune:
+                self._written = 0
+        if prune:
+            # Walking the whole store is slow; the caller only needs its own blob
+            threading.Thread(target=self.prune, name="tool-output-prune", daemon=True).start()
+        return blob_id
+
+    def get(self, blob_id: str) -> str:
+        with open(self.path(blob_id), "rb") as f:
+            return f.read().decode()
+
+    def prune(self):
+        """Delete the least recently written blobs until the store is under max_bytes."""
+        blobs, total = [], 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        blobs.sort()
+        for _, size, path in blobs:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+class ToolOutputLimiter:
+    """
+    Replaces oversized ToolMessage contents with a blob reference and summary.
+
+    Args:
+        store: Where full outputs go.
+        max_bytes / max_tokens: Default caps (UTF-8 bytes / tokens of the text).
+        limits: Byte caps by tool name, overriding max_bytes.
+        preview_chars: Head of the output kept in the message.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore | None = None,
+        max_bytes: int = TOOL_OUTPUT_MAX_BYTES,
+        max_tokens: int = TOOL_OUTPUT_MAX_TOKENS,
+        limits: dict[str, int] = TOOL_OUTPUT_LIMITS,
+        preview_chars: int = TOOL_OUTPUT_PREVIEW_CHARS,
+    ):
+        self.store = store or BlobStore()
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.limits = limits
+        self.preview_chars = preview_chars
+        self.count_tokens = _load_token_counter()
+        self._read_tool: BaseTool | None = None
+
+    def caps(self, tool: BaseTool | None, name: str) -> tuple[int, int]:
+        metadata = (tool.metadata if tool else None) or {}
+        max_bytes = int(metadata.get("max_output_bytes", self.limits.get(name, self.max_bytes)))
+        max_tokens = int(metadata.get("max_output_tokens", self.max_tokens))
+        return max_bytes, max_tokens
+
+    def over_cap(self, text: str, max_bytes: int, max_tokens: int) -> bool:
+        if len(text.encode()) > max_bytes:
+            return True
+        # Every token is at least one character, so short texts are never tokenized
+        return len(text) > max_tokens and self.count_tokens(text) > max_tokens
+
+    def summary(self, text: str, blob_id: str, max_chars: int) -> str:
+        size = len(text.encode())
+        details = f"{size} bytes, {text.count(chr(10)) + 1} lines"
+        sections = text.count(SECTION_SEPARATOR)
+        if sections:
+            details += f", {sections + 1} sections separated by '---'"
+        head = text[:min(self.preview_chars, max_chars)]
+        return (
+            f"{head}\n"
+            f"...[tool output too large ({details}); showing the first {len(head)} of {len(text)} characters. "
+            f"The full output is stored as blob_id={blob_id}: call {READ_TOOL_OUTPUT}"
+            f"(blob_id=\"{blob_id}\", offset={len(head)}) to read more.]"
+        )
+
+    def limit(self, message: ToolMessage, tool: BaseTool | None = None) -> ToolMessage:
+        """`message`, or a copy whose content is a summary of the stored output."""
+        if message.name == READ_TOOL_OUTPUT or message.status == "error":
+            return message
+        text = message_text(message)
+        max_bytes, max_tokens = self.caps(tool, message.name or "")
+        if not self.over_cap(text, max_bytes, max_tokens):
+            return message
+
+        blob_id = self.store.put(text)
+        # The head alone stays well under the cap, whatever the preview size
+        content = self.summary(text, blob_id, min(max_bytes, max_tokens) // 2)
+        TOOL_OUTPUT_SPILLS.inc(tool=message.name)
+        TOOL_OUTPUT_BYTES.inc(len(text.encode()), tool=message.name, kind="returned")
+        TOOL_OUTPUT_BYTES.inc(len(content.encode()), tool=message.name, kind="kept")
+        # Non-text blocks (images) are left as they were; only the text moves to the store
+        if isinstance(message.content, list):
+            others = [block for block in message.content if isinstance(block, dict) and "text" not in block]
+            if others:
+                content = [{"type": "text", "text": content}] + others
+        return message.model_copy(update={
+            "content": content, "response_metadata": {**message.response_metadata, TOOL_OUTPUT_BLOB: blob_id},
+        })
+
+    async def alimit(self, message: ToolMessage, tool: BaseTool | None = None) -> ToolMessage:
+        """`limit` off the event loop: it may tokenize a large output and write it to disk."""
+        return await asyncio.to_thread(self.limit, message, tool)
+
+    def read(self, blob_id: str, offset: int = 0, length: int = TOOL_OUTPUT_PAGE_CHARS) -> str:
+        """One page of a stored output, with the offset of the next page."""
+        try:
+            text = self.store.get(blob_id)
+        except (ValueError, FileNotFoundError):
+            return f"Error: no stored tool output with blob_id={blob_id}"
+        offset = max(0, offset)
+        length = max(1, min(length, TOOL_OUTPUT_PAGE_CHARS))
+        page = text[offset:offset + length]
+        end = offset + len(page)
+        footer = f"[characters {offset}-{end} of {len(text)}"
+        footer += f"; next offset={end}]" if end < len(text) else "; end of output]"
+        return f"{page}\n{footer}"
+
+    def read_tool(self) -> BaseTool:
+        """The `read_tool_output` tool over this limiter's store (one instance, so the prompt cache sees the same tool set)."""
+        if self._read_tool is not None:
+            return self._read_tool
+
+        def read_tool_output(blob_id: str, offset: int = 0, length: int = TOOL_OUTPUT_PAGE_CHARS) -> str:
+            """Read part of a large tool output that was stored instead of returned.
+
+            Args:
+                blob_id: The blob_id given in the truncated tool output.
+                offset: Character offset to start reading at.
+                length: Number of characters to read.
+            """
+            return self.read(blob_id, offset, length)
+
+        # Keep it bound when per-turn tool selection is on: any turn may need to page
+        self._read_tool = StructuredTool.from_function(
+            read_tool_output, parse_docstring=True, metadata={"always_bind": True}
+        )
+        return self._read_tool
+
+
+_limiter: ToolOutputLimiter | None = None
+
+
+def get_tool_output_limiter() -> ToolOutputLimiter | None:
+    """The process-wide limiter, or None when TOOL_OUTPUT_LIMIT is off."""
+    global _limiter
+    if not TOOL_OUTPUT_LIMIT:
+        return None
+    if _limiter is None:
+        _limiter = ToolOutputLimiter()
+    return _limiter
+
+
+def with_read_tool(tools: List[BaseTool], limiter: ToolOutputLimiter | None) -> List[BaseTool]:
+    """`tools` plus `read_tool_output` (once) when outputs are limited."""
+    if limiter is None or not tools or any(tool.name == READ_TOOL_OUTPUT for tool in tools):
+        return tools
+    return list(tools) + [limiter.read_tool()]
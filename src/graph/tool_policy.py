@@ -0,0 +1,129 @@
+"""
+Per-tool response policies: end the turn with the tool result instead of a
+second LLM call.
+
+After a tool call the graph normally goes back to the LLM to phrase the
+result, even when the tool already returns the sentence the user should see
+(`add` -> "The sum of 23 and 45 is 68"). A tool with a response policy
+skips that call: the "respond" node turns the result into the final
+AIMessage and the graph ends. The policy is one of
+
+* return direct: the tool output as it is, or
+* a template: a cheap `str.format` rendering with the tool arguments and
+  `{output}`, e.g. "The product of {a} and {b} is {output}.".
+
+Policies come from the tool's metadata (MCP tool annotations or LangChain
+metadata) "return_direct" / "response_template", from LangChain's
+`BaseTool.return_direct`, or from TOOL_RESPONSE_POLICIES, a JSON object that
+wins over the metadata:
+
+    TOOL_RESPONSE_POLICIES='{"add": "direct", "multiply": "{a} x {b} = {output}", "get_alerts": null}'
+
+("direct" or true = return direct, a string = template, null/false = always
+use the LLM). A turn ends in "respond" only if every tool call of the turn
+has a policy and succeeded and no result was moved to the blob store;
+anything else (errors, partial results, a template that doesn't fit the
+arguments) goes back to the LLM as before.
+"""
+
+import json
+import os
+from typing import Any, List
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.tools import BaseTool
+
+from src.graph.history import message_text
+from src.graph.tool_output import TOOL_OUTPUT_BLOB
+from src.model.agentstate import AgentState
+from src.telemetry import REGISTRY
+
+
+# Config
+TOOL_RESPONSE_POLICIES = json.loads(os.getenv("TOOL_RESPONSE_POLICIES", "{}"))
+RETURN_DIRECT = "direct"
+
+TOOL_RESPONSES = REGISTRY.counter(
+    "tool_responses_total", "Tool turns answered by a response policy or handed back to the LLM", ("outcome",)
+)
+
+
+class ToolResponsePolicy:
+    """
+    Decides, after the tools node, whether a turn can end with its tool results.
+
+    Args:
+        tools: The graph's tools (their metadata carries the policies).
+        overrides: {tool_name: "direct" | template | None}; defaults to
+            TOOL_RESPONSE_POLICIES.
+    """
+
+    def __init__(self, tools: List[BaseTool], overrides: dict[str, Any] | None = None):
+        overrides = TOOL_RESPONSE_POLICIES if overrides is None else overrides
+        self.policies: dict[str, str] = {}
+        for tool in tools:
+            metadata = tool.metadata or {}
+            if tool.name in overrides:
+                policy = overrides[tool.name]
+            elif metadata.get("response_template"):
+                policy = metadata["response_template"]
+            else:
+                policy = metadata.get("return_direct") or tool.return_direct
+            if policy is True:
+                policy = RETURN_DIRECT
+            if isinstance(policy, str) and policy:
+                self.policies[tool.name] = policy
+
+    def __bool__(self) -> bool:
+        return bool(self.policies)
+
+    def render(self, state: AgentState) -> str | None:
+        """The final answer for the tool results at the end of `state`, or None if the LLM should answer."""
+        results: list[ToolMessage] = []
+        for message in reversed(state.messages):
+            if not isinstance(message, ToolMessage):
+                break
+            results.insert(0, message)
+        calls = state.messages[-len(results) - 1] if results else None
+        if not isinstance(calls, AIMessage) or not calls.tool_calls:
+            return None
+
+        by_id = {result.tool_call_id: result for result in results}
+        parts = []
+        for call in calls.tool_calls:
+            policy = self.policies.get(call["name"])
+            result = by_id.get(call["id"])
+            if policy is None or result is None or result.status == "error" \
+                    or TOOL_OUTPUT_BLOB in (result.response_metadata or {}):
+                return None
+            output = message_text(result)
+            if policy == RETURN_DIRECT:
+                parts.append(output)
+                continue
+            try:
+                parts.append(policy.format_map({**call["args"], "output": output, "tool": call["name"]}))
+            except (KeyError, IndexError, ValueError) as e:
+                print(f"Response template of {call['name']} does not fit its call ({e!r}), using the LLM")
+                return None
+        return "\n".join(parts)
+
+    def route(self, state: AgentState) -> str:
+        """Next node after "tools": "respond" when the policies cover the turn, else "LLMAgent"."""
+        if self.render(state) is None:
+            TOOL_RESPONSES.inc(outcome="llm")
+            return "LLMAgent"
+        TOOL_RESPONSES.inc(outcome="policy")
+        return "respond"
+
+    def respond(self, state: AgentState) -> dict[str, Any]:
+        """
+        The "respond" node: the rendered tool results as the final message, an
+        AIMessageChunk so stream consumers render it like a streamed reply.
+        """
+        return {"messages": [AIMessageChunk(content=self.render(state) or "")]}
+
+
+def get_tool_response_policy(tools: List[BaseTool]) -> ToolResponsePolicy | None:
+    """The response policies of `tools`, or None when no tool has one."""
+    policy = ToolResponsePolicy(tools)
+    return policy if policy else None
@@ -0,0 +1,186 @@
+"""
+Per-turn tool subset selection.
+
+Binding every tool of every server in mcp_server.json (Playwright alone has
+dozens) puts all their schemas and manifest lines into every LLM request.
+With TOOL_SELECTION on and more than TOOL_SELECTION_MIN_TOOLS tools, the
+assistant node binds only the TOOL_SELECTION_TOP_K tools most relevant to
+the current turn, retrieved from an index over tool names and descriptions:
+
+* chromadb (declared dependency; default embedding model) when importable,
+  keeping only tools within TOOL_SELECTION_MAX_DISTANCE (cosine distance),
+* otherwise an in-memory BM25 index over the name and description words.
+
+Tools the LLM already called in the current turn stay selected, so it can
+follow up on their results, tools with "always_bind" in their metadata
+(read_tool_output) are always selected, and a turn that matches no tool
+gets all tools.
+The subset keeps the original tool order, and the prompt prefix and bound
+model of each subset come from the PromptCache, so frequent subsets are
+rendered and bound once. Indexes are built once per tool set and the
+TOOL_SELECTION_MAX_INDEXES most recently used ones are kept.
+"""
+
+import asyncio
+import math
+import os
+import re
+import uuid
+import weakref
+from collections import Counter, OrderedDict
+from typing import List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.tools import BaseTool
+
+from src.graph.history import message_text
+from src.telemetry import REGISTRY
+
+try:
+    import chromadb
+except ImportError:
+    chromadb = None
+
+
+# Config
+TOOL_SELECTION = os.getenv("TOOL_SELECTION", "true").lower() == "true"
+TOOL_SELECTION_TOP_K = int(os.getenv("TOOL_SELECTION_TOP_K", "8"))
+TOOL_SELECTION_MIN_TOOLS = int(os.getenv("TOOL_SELECTION_MIN_TOOLS", "16"))   # bind everything up to this many tools
+TOOL_SELECTION_BACKEND = os.getenv("TOOL_SELECTION_BACKEND", "auto")          # "auto", "chromadb" or "lexical"
+TOOL_SELECTION_MAX_DISTANCE = float(os.getenv("TOOL_SELECTION_MAX_DISTANCE", "0.75"))  # chromadb: farther is no match
+TOOL_SELECTION_MAX_INDEXES = int(os.getenv("TOOL_SELECTION_MAX_INDEXES", "16"))         # tool sets indexed at once
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 2     # name words count this many times in a tool's document
+
+TOOLS_SELECTED = REGISTRY.histogram(
+    "tool_selection_tools", "Tools bound per assistant step after selection", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from get how i in is it me my of on or please the this to use what with you".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [word for word in _WORD.findall(_CAMEL.sub(" ", text).lower()) if word not in _STOPWORDS]
+
+
+def tool_document(tool: BaseTool) -> str:
+    return f"{tool.name} {tool.description or ''}"
+
+
+class BM25Index:
+    """In-memory BM25 over tool names (weighted) and descriptions."""
+
+    def __init__(self, tools: List[BaseTool]):
+        self.docs = [
+            Counter(tokenize(tool.name) * NAME_WEIGHT + tokenize(tool.description or "")) for tool in tools
+        ]
+        self.lengths = [sum(doc.values()) for doc in self.docs]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        document_frequency = Counter(word for doc in self.docs for word in doc)
+        n = len(self.docs)
+        self.idf = {word: math.log(1 + (n - df + 0.5) / (df + 0.5)) for word, df in document_frequency.items()}
+
+    def search(self, query: str, k: int) -> list[int]:
+        """Indexes of the k best matching tools (only tools sharing at least one word with the query)."""
+        words = [word for word in set(tokenize(query)) if word in self.idf]
+        scores = []
+        for i, doc in enumerate(self.docs):
+            score = 0.0
+            for word in words:
+                tf = doc.get(word, 0)
+                if tf:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / self.avg_length)
+                    score += self.idf[word] * tf * (BM25_K1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(key=lambda item: -item[0])
+        return [i for _, i in scores[:k]]
+
+
+class ChromaIndex:
+    """Embedding index over tool documents in an in-memory chromadb collection."""
+
+    def __init__(self, tools: List[BaseTool], name: str, max_distance: float = TOOL_SELECTION_MAX_DISTANCE):
+        client = chromadb.EphemeralClient()
+        self.max_distance = max_distance
+        # Unique name: an evicted index of the same tool set may still be in use by an older graph
+        name = f"{name}-{uuid.uuid4().hex[:8]}"
+        self.collection = client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+        self.collection.upsert(ids=[str(i) for i in range(len(tools))], documents=[tool_document(t) for t in tools])
+        # The ephemeral client keeps collections for the life of the process; drop this one with the index
+        weakref.finalize(self, client.delete_collection, name)
+
+    def search(self, query: str, k: int) -> list[int]:
+        """Indexes of the k nearest tools within max_distance; none when nothing is close (bind all tools)."""
+        result = self.collection.query(query_texts=[query], n_results=k, include=["distances"])
+        return [int(i) for i, distance in zip(result["ids"][0], result["distances"][0]) if distance <= self.max_distance]
+
+
+class ToolSelector:
+    """Picks the tools to bind for one assistant step."""
+
+    def __init__(self, tools: List[BaseTool], top_k: int = TOOL_SELECTION_TOP_K, backend: str = TOOL_SELECTION_BACKEND,
+                 index_name: str = "tools"):
+        self.tools = list(tools)
+        self.top_k = top_k
+        self._positions = {tool.name: i for i, tool in enumerate(self.tools)}
+        self._always = {i for i, tool in enumerate(self.tools) if (tool.metadata or {}).get("always_bind")}
+        self.index = None
+        if backend in ("auto", "chromadb") and chromadb is not None:
+            try:
+                self.index = ChromaIndex(self.tools, index_name)
+            except Exception as e:
+                print("chromadb tool index unavailable, using BM25:", e)
+        if self.index is None:
+            self.index = BM25Index(self.tools)
+
+    @staticmethod
+    def _current_turn(messages: List[BaseMessage]) -> tuple[str, set[str]]:
+        """The latest user message and the tools called since then."""
+        called = set()
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                return message_text(message), called
+            if isinstance(message, AIMessage):
+                called.update(call["name"] for call in message.tool_calls)
+        return "", called
+
+    def select(self, messages: List[BaseMessage]) -> List[BaseTool]:
+        query, called = self._current_turn(messages)
+        chosen = set(self.index.search(query, self.top_k)) if query else set()
+        if not chosen:
+            TOOLS_SELECTED.observe(len(self.tools))
+            return self.tools
+        chosen.update(self._positions[name] for name in called if name in self._positions)
+        chosen.update(self._always)
+        TOOLS_SELECTED.observe(len(chosen))
+        # Original order, so the same subset always renders the same prompt prefix
+        return [self.tools[i] for i in sorted(chosen)]
+
+    async def aselect(self, messages: List[BaseMessage]) -> List[BaseTool]:
+        """`select` for the assistant node: a chromadb query embeds the turn, so it runs in a worker thread."""
+        if isinstance(self.index, ChromaIndex):
+            return await asyncio.to_thread(self.select, messages)
+        return self.select(messages)
+
+
+# Indexes by tool set, shared by every graph built for it; least recently used evicted first
+_selectors: OrderedDict[str, ToolSelector] = OrderedDict()
+
+
+def get_tool_selector(tools: List[BaseTool], tools_digest: str) -> ToolSelector | None:
+    """The selector for a tool set, or None when selection is off or the tool set is small enough to bind whole."""
+    if not TOOL_SELECTION or len(tools) <= TOOL_SELECTION_MIN_TOOLS:
+        return None
+    if tools_digest in _selectors:
+        _selectors.move_to_end(tools_digest)
+        return _selectors[tools_digest]
+    selector = _selectors[tools_digest] = ToolSelector(tools, index_name=f"tools-{tools_digest[:16]}")
+    if len(_selectors) > TOOL_SELECTION_MAX_INDEXES:
+        _selectors.popitem(last=False)     # graphs built with it keep using it
+    return selector
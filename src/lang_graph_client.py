@@ -6,11 +6,11 @@ This client is analagous to Cursor or Claude Desktop and you would configure the
 same way by specifying the MCP server configuration in my_mcp/mcp_config.json.
 """
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.graph import StateGraph
 from langchain_core.messages import HumanMessage, AIMessageChunk
 from typing import AsyncGenerator
 from src.graph.state_graph import build_agent_graph, AgentState
+from src.client.session_pool import MCPSessionPool
 import asyncio
 import os
 import json
@@ -106,7 +106,8 @@ async def main():
     """
     Initialize the MCP client and run the agent conversation loop.
 
-    The MultiServerMCPClient allows connection to multiple MCP servers using a single client and config.
+    The MCPSessionPool connects to multiple MCP servers using a single config and keeps
+    their sessions open for the lifetime of the conversation.
     """
     # Load the JSON config
     JSON_DIR = "src/config/"
@@ -116,37 +117,34 @@ async def main():
     with open(config_file, "r") as f:
         mcp_config = json.load(f)
     
-    client = MultiServerMCPClient(connections=mcp_config)
-    tools = await client.get_tools()
-    
-    # async with MultiServerMCPClient(
-    #     connections=mcp_config
-    # ) as client:
-        # the get_tools() method returns a list of tools from all the connected servers
-    #tools = client.get_tools()
-    graph = build_agent_graph(tools=tools)
-
-    # pass a config with a thread_id to use memory
-    graph_config = {
-        "configurable": {
-            "thread_id": "1"
+    # Keep one session per server open for the whole chat instead of
+    # spawning a server subprocess on every tool call
+    async with MCPSessionPool(mcp_config, lazy=True) as pool:
+        # tools of all servers, from the tool snapshot when it is up to date
+        tools = await pool.load_tools()
+        graph = build_agent_graph(tools=tools)
+
+        # pass a config with a thread_id to use memory
+        graph_config = {
+            "configurable": {
+                "thread_id": "1"
+            }
         }
-    }
-
-    while True:
-        user_input = input("\n\nUSER: ")
-        if user_input in ["quit", "exit"]:
-            break
-
-        print("\n ----  USER  ---- \n\n", user_input)
-        print("\n ----  ASSISTANT  ---- \n\n")
-
-        async for response in stream_graph_response(
-            input = AgentState(messages=[HumanMessage(content=user_input)]),
-            graph = graph,
-            config = graph_config
-            ):
-            print(response, end="", flush=True)
+
+        while True:
+            user_input = input("\n\nUSER: ")
+            if user_input in ["quit", "exit"]:
+                break
+
+            print("\n ----  USER  ---- \n\n", user_input)
+            print("\n ----  ASSISTANT  ---- \n\n")
+
+            async for response in stream_graph_response(
+                input = AgentState(messages=[HumanMessage(content=user_input)]),
+                graph = graph,
+                config = graph_config
+                ):
+                print(response, end="", flush=True)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,76 +1,130 @@
 import streamlit as st
 import asyncio
+import atexit
 import os
 import json
-from langchain_mcp_adapters.client import MultiServerMCPClient
+import queue
+import threading
+import uuid
+from typing import Iterator
 from langgraph.graph import StateGraph
-from langchain_core.messages import HumanMessage, AIMessageChunk
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk
 from src.graph.state_graph import build_agent_graph, AgentState
+from src.client.session_pool import MCPSessionPool
 
 
 PROJECT_ROOT1 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 JSON_DIR1 = os.path.join(PROJECT_ROOT1, "src/config")
 
-# Initialize session state
-if "messages" not in st.session_state:
-    st.session_state["messages"] = []
-
-if "graph" not in st.session_state:
-    st.session_state["graph"] = None
+_DONE = object()
 
 
 async def stream_graph_response(input: AgentState, graph: StateGraph, config: dict = {}):
     async for message_chunk, metadata in graph.astream(
         input=input, stream_mode="messages", config=config
     ):
-        if isinstance(message_chunk, AIMessageChunk):
-            if message_chunk.tool_call_chunks:
-                tool_chunk = message_chunk.tool_call_chunks[0]
-                yield f"<TOOL CALL {tool_chunk.get('name', '')}> {tool_chunk.get('args', '')}"
-            else:
+        # AIMessage too: cached responses are emitted whole, not as chunks
+        if isinstance(message_chunk, AIMessage):
+            tool_calls = (
+                message_chunk.tool_call_chunks if isinstance(message_chunk, AIMessageChunk) else message_chunk.tool_calls
+            )
+            for call in tool_calls:
+                if call.get("name"):
+                    yield f"\n\n`<TOOL CALL {call['name']}>`\n\n"
+            if isinstance(message_chunk.content, str):
                 yield message_chunk.content
 
 
-async def init_graph():
-    """Load MCP servers and build graph."""
+class AgentRuntime:
+    """
+    One graph and MCP session pool per Streamlit server process.
+
+    Streamlit reruns the script (in a new thread) on every interaction, so
+    the pool and graph live on an event loop in a background thread that
+    outlives the reruns; every browser session talks to it through
+    `stream()`, and MCP sessions stay open between messages.
+    """
+
+    def __init__(self, mcp_config: dict):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="agent-runtime", daemon=True)
+        self.thread.start()
+        self.pool = MCPSessionPool(mcp_config, lazy=True)
+        self.graph = self.run(self._start())
+
+    def run(self, coroutine):
+        """Run a coroutine on the runtime loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _start(self):
+        await self.pool.start()
+        return build_agent_graph(tools=await self.pool.load_tools())
+
+    def stream(self, user_input: str, thread_id: str) -> Iterator[str]:
+        """Yield the assistant's response as it is generated; closing the iterator cancels the run."""
+        chunks: queue.Queue = queue.Queue()
+        config = {"configurable": {"thread_id": thread_id}}
+
+        async def produce():
+            try:
+                async for chunk in stream_graph_response(
+                    AgentState(messages=[HumanMessage(content=user_input)]), self.graph, config
+                ):
+                    chunks.put(chunk)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(_DONE)
+
+        run = asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        try:
+            while (chunk := chunks.get()) is not _DONE:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            # e.g. the user sent another message mid-answer and Streamlit stopped this rerun
+            run.cancel()
+
+    def close(self):
+        self.run(self.pool.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@st.cache_resource
+def get_runtime() -> AgentRuntime:
+    """Load MCP servers and build graph (once per process, shared by all sessions)."""
     config_file = os.path.join(JSON_DIR1, "mcp_server.json")
     with open(config_file, "r") as f:
         mcp_config = json.load(f)
 
-    client = MultiServerMCPClient(connections=mcp_config)
-    tools = await client.get_tools()
-    return build_agent_graph(tools=tools)
+    runtime = AgentRuntime(mcp_config)
+    # Stop the MCP server subprocesses with the Streamlit server
+    atexit.register(runtime.close)
+    return runtime
 
 
-async def run_agent(user_input: str):
-    """Send user input through the graph and stream assistant response."""
-    if st.session_state["graph"] is None:
-        st.session_state["graph"] = await init_graph()
+# Initialize session state
+if "messages" not in st.session_state:
+    st.session_state["messages"] = []
 
-    graph_config = {"configurable": {"thread_id": "1"}}
-    responses = []
-    async for response in stream_graph_response(
-        AgentState(messages=[HumanMessage(content=user_input)]),
-        st.session_state["graph"],
-        graph_config,
-    ):
-        responses.append(response)
-    return "".join(responses)
+if "thread_id" not in st.session_state:
+    # One conversation per browser session
+    st.session_state["thread_id"] = str(uuid.uuid4())
 
 
 # --------- STREAMLIT UI ---------
 st.title("MCP LangGraph Client")
 
+# Display conversation
+for role, text in st.session_state["messages"]:
+    st.chat_message(role).write(text)
+
 user_input = st.chat_input("Type your message...")
 
 if user_input:
     st.session_state["messages"].append(("user", user_input))
-    assistant_reply = asyncio.run(run_agent(user_input))
+    st.chat_message("user").write(user_input)
+    with st.chat_message("assistant"):
+        assistant_reply = st.write_stream(get_runtime().stream(user_input, st.session_state["thread_id"]))
     st.session_state["messages"].append(("assistant", assistant_reply))
-
-# Display conversation
-for role, text in st.session_state["messages"]:
-    if role == "user":
-        st.chat_message("user").write(text)
-    else:
-        st.chat_message("assistant").write(text)
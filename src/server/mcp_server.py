@@ -7,13 +7,16 @@ cd to the `examples/snippets/clients` directory and run:
 
 
 import os
+import sys
 from typing import Any
 import httpx
+from pydantic import BaseModel, Field
 
 # Create an MCP server
 #mcp = FastMCP("Demo")
 
 from mcp.server.fastmcp import FastMCP
+from mcp.types import ToolAnnotations
 
 
 # Create an MCP server
@@ -25,7 +28,8 @@ mcp = FastMCP(
 
 
 # Add an addition tool
-@mcp.tool()
+# The result is the whole answer: the agent graph renders it with this template instead of asking the LLM
+@mcp.tool(annotations=ToolAnnotations(response_template="The product of {a} and {b} is {output}."))
 def multiply(a: int, b: int) -> int:
     """Multiply two numbers and return the result."""
     return a * b
@@ -37,12 +41,50 @@ def multiply(a: int, b: int) -> int:
 #     """Add two final numbers and return the result."""
 #     return f"The sum is {a + b}"
 
-@mcp.tool()
+# Already a user-facing sentence: returned as the answer without another LLM call
+@mcp.tool(annotations=ToolAnnotations(return_direct=True))
 def add(a: int, b: int) -> str:
     """Add two numbers and return as string."""
     return f"The sum of {a} and {b} is {a + b}"
 
 
+# Batch variants: one tool call (and one LLM step) for a whole list of pairs
+# instead of one add/multiply round trip per pair
+MAX_BATCH_SIZE = int(os.getenv("MCP_MAX_BATCH_SIZE", "10000"))
+
+
+class OperandPair(BaseModel):
+    a: int
+    b: int
+
+
+class BatchResult(BaseModel):
+    results: list[int] = Field(description="results[i] is the result for pairs[i]")
+    count: int
+
+
+def _check_batch(pairs: list[OperandPair]):
+    if len(pairs) > MAX_BATCH_SIZE:
+        raise ValueError(f"at most {MAX_BATCH_SIZE} pairs per call, got {len(pairs)}")
+
+
+@mcp.tool()
+def add_batch(pairs: list[OperandPair]) -> BatchResult:
+    """Add many pairs of numbers in one call. Use this instead of calling add repeatedly."""
+    _check_batch(pairs)
+    # Python ints never overflow, unlike a fixed-width array sum
+    results = [pair.a + pair.b for pair in pairs]
+    return BatchResult(results=results, count=len(results))
+
+
+@mcp.tool()
+def multiply_batch(pairs: list[OperandPair]) -> BatchResult:
+    """Multiply many pairs of numbers in one call. Use this instead of calling multiply repeatedly."""
+    _check_batch(pairs)
+    results = [pair.a * pair.b for pair in pairs]
+    return BatchResult(results=results, count=len(results))
+
+
 # Add a dynamic greeting resource
 @mcp.resource("greeting://{name}")
 def get_greeting(name: str) -> str:
@@ -79,7 +121,8 @@ if __name__ == "__main__":
 
     transport ="stdio"
     if transport == "stdio":
-        print("Running server with stdio transport")
+        # stdout carries the MCP protocol in stdio mode, so log to stderr
+        print("Running server with stdio transport", file=sys.stderr)
         mcp.run(transport="stdio")
 
     # transport = "sse"
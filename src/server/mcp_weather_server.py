@@ -1,27 +1,228 @@
-from typing import Any
+from typing import Any, Awaitable, Callable
+from collections import OrderedDict
+import asyncio
+from contextlib import asynccontextmanager
+import email.utils
+import os
+import time
 import httpx
 from mcp.server.fastmcp import FastMCP
 
-# Initialize FastMCP server
-mcp = FastMCP("weather")
-
 # Constants
-NWS_API_BASE = "https://api.weather.gov"
+NWS_API_BASE = os.getenv("NWS_API_BASE", "https://api.weather.gov")
 USER_AGENT = "weather-app/1.0"
 
+# HTTP client / cache config
+NWS_HTTP2 = os.getenv("NWS_HTTP2", "true").lower() == "true"   # needs `h2`, from the httpx[http2] dependency
+NWS_MAX_CONNECTIONS = int(os.getenv("NWS_MAX_CONNECTIONS", "20"))
+NWS_MAX_KEEPALIVE = int(os.getenv("NWS_MAX_KEEPALIVE", "10"))
+POINTS_CACHE_TTL = float(os.getenv("NWS_POINTS_CACHE_TTL", "86400"))   # used when /points sends no caching headers
+ALERTS_CACHE_TTL = float(os.getenv("NWS_ALERTS_CACHE_TTL", "60"))      # upper bound for /alerts/active/area
+CACHE_MAX_ENTRIES = int(os.getenv("NWS_CACHE_MAX_ENTRIES", "1024"))
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight task.
+
+    Every caller awaits the shared task through asyncio.shield, so one caller
+    being cancelled does not cancel the fetch for the others; the fetch itself
+    is cancelled only once its last waiter has gone. Exceptions raised by the
+    fetch propagate to every waiter.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, list] = {}   # key -> [task, waiter count]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = [asyncio.ensure_future(fn()), 0]
+            self._calls[key] = call
+            call[0].add_done_callback(lambda _: self._forget(key, call))
+
+        task = call[0]
+        call[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            call[1] -= 1
+            if call[1] == 0 and not task.done():
+                self._forget(key, call)
+                task.cancel()
+
+    def _forget(self, key: str, call: list):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+_http_client: httpx.AsyncClient | None = None
+_response_cache = TTLCache()
+_single_flight = SingleFlight()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """One keep-alive client per server process, so repeated lookups reuse TCP/TLS connections."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "application/geo+json"
+            },
+            timeout=30.0,
+            http2=NWS_HTTP2,
+            limits=httpx.Limits(
+                max_connections=NWS_MAX_CONNECTIONS,
+                max_keepalive_connections=NWS_MAX_KEEPALIVE,
+            ),
+        )
+    return _http_client
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    try:
+        yield
+    finally:
+        if _http_client is not None:
+            await _http_client.aclose()
+
+
+def header_ttl(headers: httpx.Headers) -> float | None:
+    """Freshness lifetime from Cache-Control / Expires, or None when the response does not say."""
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives or "no-cache" in directives:
+        return 0.0
+
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                age = float(headers.get("age", 0))
+                return max(0.0, float(directives[name]) - age)
+            except ValueError:
+                pass
+
+    if "expires" in headers:
+        try:
+            expires_at = email.utils.parsedate_to_datetime(headers["expires"]).timestamp()
+            now = email.utils.parsedate_to_datetime(headers["date"]).timestamp() if "date" in headers else time.time()
+            return max(0.0, expires_at - now)
+        except (TypeError, ValueError):
+            return 0.0
+
+    return None
+
+
+def cache_ttl(url: str, headers: httpx.Headers) -> float:
+    """
+    How long a successful response for `url` may be served from cache.
+
+    /points/{lat},{lon} is effectively static per coordinate, so it honours the
+    response's caching headers and falls back to a long TTL. Active alerts
+    change quickly and never live longer than ALERTS_CACHE_TTL. Anything else
+    (e.g. the gridpoint forecast) is cached only as long as the headers allow.
+    """
+    ttl = header_ttl(headers)
+    if "/points/" in url:
+        return POINTS_CACHE_TTL if ttl is None else ttl
+    if "/alerts/active/area/" in url:
+        return ALERTS_CACHE_TTL if ttl is None else min(ttl, ALERTS_CACHE_TTL)
+    return ttl or 0.0
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an NWS URL, used as the cache and single-flight key.
+
+    Lower-cases scheme and host, drops a trailing slash, sorts query
+    parameters, rounds /points coordinates to the 4 decimals NWS accepts and
+    upper-cases the state code of /alerts/active/area.
+    """
+    parsed = httpx.URL(url)
+    path = parsed.path.rstrip("/") or "/"
+
+    if path.startswith("/points/"):
+        try:
+            coordinates = [float(value) for value in path[len("/points/"):].split(",")]
+            path = "/points/" + ",".join(
+                format(round(value, 4), "f").rstrip("0").rstrip(".") for value in coordinates
+            )
+        except ValueError:
+            pass
+    elif path.startswith("/alerts/active/area/"):
+        path = path.upper().replace("/ALERTS/ACTIVE/AREA/", "/alerts/active/area/")
+
+    params = sorted(parsed.params.multi_items())
+    return str(httpx.URL(scheme=parsed.scheme.lower(), host=parsed.host.lower(), port=parsed.port, path=path, params=params))
+
+
+# Initialize FastMCP server
+mcp = FastMCP("weather", lifespan=lifespan)
+
+
 async def make_nws_request(url: str) -> dict[str, Any] | None:
     """Make a request to the NWS API with proper error handling."""
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
+    url = normalize_url(url)
+    cached = _response_cache.get(url)
+    if cached is not None:
+        return cached
+
+    # Concurrent identical lookups share one upstream fetch
+    try:
+        return await _single_flight.do(url, lambda: fetch_nws(url))
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return None
+
+
+async def fetch_nws(url: str) -> dict[str, Any]:
+    """Fetch `url` upstream, cache the parsed JSON and return it (raises on failure)."""
+    response = await get_http_client().get(url)
+    response.raise_for_status()
+    data = response.json()
+    _response_cache.set(url, data, cache_ttl(url, response.headers))
+    return data
 
 def format_alert(feature: dict) -> str:
     """Format an alert feature into a readable string."""
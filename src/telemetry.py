@@ -0,0 +1,473 @@
+"""
+Built-in tracing and metrics for the agent, the MCP pool and the A2A server.
+
+Spans (OpenTelemetry-style trace/span ids, parent links via contextvars) are
+recorded for every A2A request, graph node (LLMAgent, tools), LLM call
+(tokens, time to first token) and MCP tool call (server, tool, bytes in/out,
+session spawned vs reused). Finished spans are queued and written by a
+background thread in batches, so the request path only pays for building the
+span. Exporters (TELEMETRY_EXPORT):
+
+    none  no spans are built (default); metrics are still recorded
+    file  one JSON object per line in TELEMETRY_FILE
+    otlp  OTLP/HTTP JSON batches POSTed to TELEMETRY_OTLP_ENDPOINT
+
+Metrics are kept in process and rendered in the Prometheus text format by
+`metrics_endpoint` (mounted at /metrics by the A2A server). With several
+uvicorn workers each worker reports its own numbers.
+"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+
+# Config
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TELEMETRY = os.getenv("TELEMETRY", "true").lower() == "true"
+TELEMETRY_EXPORT = os.getenv("TELEMETRY_EXPORT", "none")     # "none", "file" or "otlp"
+TELEMETRY_FILE = os.getenv("TELEMETRY_FILE", os.path.join(PROJECT_ROOT, "telemetry_spans.jsonl"))
+TELEMETRY_OTLP_ENDPOINT = os.getenv("TELEMETRY_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TELEMETRY_SAMPLE_RATE = float(os.getenv("TELEMETRY_SAMPLE_RATE", "1.0"))   # fraction of traces exported
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL = 1.0
+EXPORT_QUEUE_SIZE = 10000      # spans beyond this are dropped instead of growing memory
+SERVICE_NAME = "langgraph-mcp-demo"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# -------------------------------
+# Metrics
+# -------------------------------
+def _escape(value) -> str:
+    """A label value as the exposition format quotes it: backslash, double quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.kind = "counter"
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            return [f"{self.name}{_label_text(self.labels, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.kind = "gauge"
+
+    def dec(self, value: float = 1.0, **labels):
+        self.inc(-value, **labels)
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.kind = "histogram"
+        self._values: dict[tuple, list] = {}     # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for key, entry in self._values.items():
+                for bound, count in zip((*self.buckets, "+Inf"), (*entry[:-2], entry[-1])):
+                    le = 'le="' + str(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {count}")
+                labels = _label_text(self.labels, key)
+                lines.append(f"{self.name}_sum{labels} {entry[-2]}")
+                lines.append(f"{self.name}_count{labels} {entry[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """All metrics of the process, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: dict[str, Any] = {}
+        self._collectors: list[Callable[[], list[str]]] = []
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], list[str]]):
+        """Register a function returning extra exposition lines, evaluated at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                print("Metrics collector failed:", e)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+A2A_REQUESTS = REGISTRY.counter("a2a_requests_total", "A2A requests handled", ("mode", "status"))
+A2A_REQUEST_SECONDS = REGISTRY.histogram("a2a_request_duration_seconds", "A2A request duration", ("mode",))
+A2A_IN_FLIGHT = REGISTRY.gauge("a2a_requests_in_flight", "A2A requests being executed")
+NODE_SECONDS = REGISTRY.histogram("graph_node_duration_seconds", "Graph node run duration", ("node",))
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "LLM calls", ("model", "status"))
+LLM_SECONDS = REGISTRY.histogram("llm_request_duration_seconds", "LLM call duration", ("model",))
+LLM_TTFT_SECONDS = REGISTRY.histogram("llm_time_to_first_token_seconds", "LLM time to first token", ("model",))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "LLM tokens", ("model", "kind"))
+MCP_CALLS = REGISTRY.counter("mcp_tool_calls_total", "MCP tool calls", ("server", "tool", "status"))
+MCP_SECONDS = REGISTRY.histogram("mcp_tool_call_duration_seconds", "MCP tool call duration", ("server", "tool"))
+MCP_BYTES = REGISTRY.counter("mcp_tool_bytes_total", "MCP tool call payload bytes", ("server", "direction"))
+MCP_SPAWNS = REGISTRY.counter("mcp_session_spawns_total", "MCP sessions (server processes) started", ("server",))
+SPANS_DROPPED = REGISTRY.counter("telemetry_spans_dropped_total", "Spans dropped because the export queue was full")
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# -------------------------------
+# Tracing
+# -------------------------------
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "sampled")
+
+    def __init__(self, name: str, parent: "Span | None", attributes: dict[str, Any] | None, sampled: bool):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = dict(attributes or {})
+        self.error: str | None = None
+        self.sampled = sampled
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException | str):
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a Span when spans are not exported, so callers never branch."""
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_error(self, error):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def _otlp_payload(spans: list[dict[str, Any]]) -> dict[str, Any]:
+    def value(v):
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "src.telemetry"}, "spans": [{
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "parentSpanId": span["parent_id"] or "",
+            "name": span["name"],
+            "startTimeUnixNano": str(span["start_ns"]),
+            "endTimeUnixNano": str(span["end_ns"]),
+            "attributes": [{"key": k, "value": value(v)} for k, v in span["attributes"].items()],
+            "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+        } for span in spans]}],
+    }]}
+
+
+class SpanExporter:
+    """Writes finished spans from a bounded queue in batches on a daemon thread."""
+
+    def __init__(self, kind: str = TELEMETRY_EXPORT, path: str = TELEMETRY_FILE, endpoint: str = TELEMETRY_OTLP_ENDPOINT):
+        self.kind = kind
+        self.path = path
+        self.endpoint = endpoint
+        self._queue: queue.Queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            SPANS_DROPPED.inc()
+
+    def _drain(self, block: bool) -> list[Span]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=EXPORT_INTERVAL) if block else self._queue.get_nowait())
+            while len(batch) < EXPORT_BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch: list[Span]):
+        spans = [span.to_dict() for span in batch]
+        try:
+            if self.kind == "file":
+                with open(self.path, "a") as f:
+                    f.write("".join(json.dumps(span, default=str) + "\n" for span in spans))
+            elif self.kind == "otlp":
+                httpx.post(self.endpoint, json=_otlp_payload(spans), timeout=5.0)
+        except Exception as e:
+            print("Span export failed:", e)
+
+    def _run(self):
+        while True:
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def flush(self):
+        """Write everything queued so far (e.g. at shutdown)."""
+        while batch := self._drain(block=False):
+            self._write(batch)
+
+
+class Tracer:
+    def __init__(self, exporter: SpanExporter | None = None, sample_rate: float = TELEMETRY_SAMPLE_RATE):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, attributes: dict[str, Any] | None = None, parent: Span | None = None):
+        if self.exporter is None:
+            return NOOP_SPAN
+        parent = parent or _current_span.get()
+        sampled = parent.sampled if parent else random.random() < self.sample_rate
+        return Span(name, parent, attributes, sampled)
+
+    def end_span(self, span):
+        if span is NOOP_SPAN:
+            return
+        span.end_ns = time.time_ns()
+        if span.sampled:
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span | _NoopSpan]:
+        """Span around a block; it is the parent of spans started inside the block."""
+        span = self.start_span(name, attributes)
+        token = _current_span.set(span) if span is not NOOP_SPAN else None
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+            self.end_span(span)
+
+
+tracer = Tracer(SpanExporter() if TELEMETRY and TELEMETRY_EXPORT != "none" else None)
+
+
+# -------------------------------
+# LangChain / LangGraph callbacks
+# -------------------------------
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    Records graph node and LLM call spans/metrics from LangChain callbacks.
+
+    Runs inline (no thread hop per event) and ignores every run that is not a
+    graph node or a chat model call.
+    """
+    run_inline = True
+
+    def __init__(self):
+        # run_id -> [span, start, attributes, first token time, span current before a node started]
+        self._runs: dict[UUID, list] = {}
+
+    def _start(self, run_id: UUID, name: str, attributes: dict[str, Any]) -> Any:
+        span = tracer.start_span(name, attributes)
+        self._runs[run_id] = [span, time.perf_counter(), attributes, None, _current_span.get()]
+        return span
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        # Node runs are the chains named like the node they belong to
+        if metadata and name and metadata.get("langgraph_node") == name:
+            span = self._start(run_id, f"graph.node {name}", {"node": name})
+            if span is not NOOP_SPAN:
+                # Inline callbacks run in the node's own context: LLM and MCP spans of the node nest under it
+                _current_span.set(span)
+
+    def _end_node(self, run_id: UUID, error: BaseException | None = None):
+        run = self._runs.pop(run_id, None)
+        if not run:
+            return
+        span = run[0]
+        NODE_SECONDS.observe(time.perf_counter() - run[1], node=run[2]["node"])
+        if span is not NOOP_SPAN:
+            if error is not None:
+                span.set_error(error)
+            if _current_span.get() is span:
+                _current_span.set(run[4])
+            tracer.end_span(span)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_node(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name", "unknown")
+        self._start(run_id, "llm.call", {"model": model, "messages": len(messages[0]) if messages else 0})
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run and run[3] is None:
+            run[3] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if not run:
+            return
+        span, start, attributes, first_token, _ = run
+        model = attributes["model"]
+        end = time.perf_counter()
+        LLM_REQUESTS.inc(model=model, status="ok")
+        LLM_SECONDS.observe(end - start, model=model)
+        if first_token is not None:
+            LLM_TTFT_SECONDS.observe(first_token - start, model=model)
+            span.set_attribute("ttft_ms", (first_token - start) * 1000)
+
+        usage = None
+        if response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            usage = getattr(message, "usage_metadata", None)
+        if usage:
+            LLM_TOKENS.inc(usage.get("input_tokens", 0), model=model, kind="prompt")
+            LLM_TOKENS.inc(usage.get("output_tokens", 0), model=model, kind="completion")
+            span.set_attribute("prompt_tokens", usage.get("input_tokens", 0))
+            span.set_attribute("completion_tokens", usage.get("output_tokens", 0))
+            # Prompt tokens the provider served from its prompt cache (byte-identical request prefix)
+            cached = (usage.get("input_token_details") or {}).get("cache_read")
+            if cached:
+                LLM_TOKENS.inc(cached, model=model, kind="cached_prompt")
+                span.set_attribute("cached_prompt_tokens", cached)
+        tracer.end_span(span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run:
+            LLM_REQUESTS.inc(model=run[2]["model"], status="error")
+            run[0].set_error(error)
+            tracer.end_span(run[0])
+
+
+_langchain_handler: ContextVar | None = None
+
+
+def install_langchain_callbacks():
+    """
+    Add a TelemetryCallbackHandler to every LangChain/LangGraph run in the
+    process (idempotent). Unlike graph.with_config(callbacks=...), a configure
+    hook is not replaced by callbacks passed at invoke time.
+    """
+    global _langchain_handler
+    if _langchain_handler is None:
+        _langchain_handler = ContextVar("telemetry_callbacks", default=TelemetryCallbackHandler())
+        register_configure_hook(_langchain_handler, inheritable=True)